@@ -553,44 +553,14 @@ public function confirmMapRollNumbers(Request $request, string $examId, string $
             ], 422);
         }
 
-        $errors = [];
-        $updated = 0;
-
         DB::beginTransaction();
         try {
-            foreach ($assignmentPlan['items'] as $item) {
-                $examStudent = ExamStudent::query()
-                    ->where('id', $item['exam_student_id'])
-                    ->where('exam_id', $examId)
-                    ->where('organization_id', $profile->organization_id)
-                    ->where('school_id', $currentSchoolId)
-                    ->whereNull('deleted_at')
-                    ->first();
-
-                if (! $examStudent) {
-                    $errors[] = [
-                        'exam_student_id' => $item['exam_student_id'],
-                        'error' => 'Student not found in this exam',
-                    ];
-
-                    continue;
-                }
-
-                $newNumber = (string) $item['new_roll_number'];
-
-                if (! ExamStudent::isRollNumberUnique($examId, $newNumber, $examStudent->id)) {
-                    $errors[] = [
-                        'exam_student_id' => $examStudent->id,
-                        'error' => "Roll number {$newNumber} is already assigned",
-                    ];
-
-                    continue;
-                }
-
-                $examStudent->exam_roll_number = $newNumber;
-                $examStudent->save();
-                $updated++;
-            }
+            ['updated' => $updated, 'errors' => $errors] = $this->mapService->writeRollNumbers(
+                $assignmentPlan['items'],
+                $examId,
+                $profile->organization_id,
+                $currentSchoolId
+            );
 
             $map->refresh();
             $map->status = ExamSeatingMap::STATUS_APPLIED;
@@ -18,7 +18,12 @@ class RunExamSeatingSolverJob implements ShouldQueue
 {
     use Dispatchable, InteractsWithQueue, Queueable, SerializesModels;
 
-    public int $tries = 1;
+    /**
+     * One retry: the solver checkpoints its incumbent, so a second attempt
+     * after a worker crash or timeout resumes the search instead of
+     * restarting it.
+     */
+    public int $tries = 2;
 
     /** Allow long CP-SAT runs (strict + fallback) for large exams. */
     public int $timeout = 1200;
@@ -146,6 +151,7 @@ public function handle(
                     'mode_used' => $result['mode_used'] ?? null,
                     'strategy' => $this->strategy,
                     'conflict_pairs' => $result['conflict_pairs'] ?? [],
+                    'conflict_summary' => $result['conflict_summary'] ?? null,
                     'message' => $result['message'] ?? null,
                     'applied' => $applied,
                     'assignment_count' => count($result['assignments'] ?? []),
@@ -166,6 +172,7 @@ public function handle(
                     'strategy' => $this->strategy,
                     'conflicts_count' => $result['conflicts_count'] ?? 0,
                     'conflict_pairs' => $result['conflict_pairs'] ?? [],
+                    'conflict_summary' => $result['conflict_summary'] ?? null,
                     'message' => $result['message'] ?? null,
                     'applied' => $applied,
                     'zigzag_group_id' => $result['zigzag_group_id'] ?? null,
@@ -174,6 +181,18 @@ public function handle(
                 $map->save();
             }
         } catch (Throwable $exception) {
+            if ($this->attempts() < $this->tries) {
+                // The retry resumes from the checkpoint. Runs are unique per
+                // idempotency key, so only the final attempt records one.
+                Log::warning('Exam seating solver attempt failed, retrying', [
+                    'map_id' => $this->mapId,
+                    'attempt' => $this->attempts(),
+                    'error' => $exception->getMessage(),
+                ]);
+
+                throw $exception;
+            }
+
             $map->refresh();
             $map->solver_status = ExamSeatingMap::SOLVER_FAILED;
             $map->solver_diagnostics = [
@@ -431,6 +431,7 @@ public function applySolverResults(
                 'mode_used' => $solverResult['mode_used'] ?? null,
                 'conflicts_count' => $solverResult['conflicts_count'] ?? 0,
                 'conflict_pairs' => $solverResult['conflict_pairs'] ?? [],
+                'conflict_summary' => $solverResult['conflict_summary'] ?? null,
             ];
             $map->applied_at = now();
             $map->applied_by = $userId;
@@ -1275,7 +1276,13 @@ public function buildContinuousRollAssignmentsFromMap(
                 $willOverrideCount++;
             }
 
-            $ownerId = $existingByRoll[$newNumber] ?? $plannedByRoll[$newNumber] ?? null;
+            // Students of this map give up their current numbers, so they
+            // may swap or rotate them; only other students' numbers collide.
+            $existingOwnerId = $existingByRoll[$newNumber] ?? null;
+            if ($existingOwnerId !== null && isset($mapStudentIdSet[$existingOwnerId])) {
+                $existingOwnerId = null;
+            }
+            $ownerId = $existingOwnerId ?? $plannedByRoll[$newNumber] ?? null;
             $collision = $ownerId !== null && $ownerId !== (string) $examStudent->id;
             if ($collision) {
                 $collisionCount++;
@@ -1306,6 +1313,117 @@ public function buildContinuousRollAssignmentsFromMap(
         ];
     }
 
+    /**
+     * Write planned roll numbers in bulk instead of one read and one save per
+     * student. Items come from buildContinuousRollAssignmentsFromMap(). Run
+     * inside the caller's transaction: the written students' numbers are
+     * cleared first, because the unique roll-number index is checked row by
+     * row and students may swap or rotate numbers between themselves.
+     *
+     * @param  list<array<string, mixed>>  $items  each with exam_student_id and new_roll_number
+     * @return array{updated: int, errors: list<array{exam_student_id: string, error: string}>}
+     */
+    public function writeRollNumbers(
+        array $items,
+        string $examId,
+        string $organizationId,
+        string $schoolId
+    ): array {
+        /** @var array<string, string> $plannedById */
+        $plannedById = [];
+        foreach ($items as $item) {
+            $plannedById[(string) $item['exam_student_id']] = (string) $item['new_roll_number'];
+        }
+
+        if ($plannedById === []) {
+            return ['updated' => 0, 'errors' => []];
+        }
+
+        $errors = [];
+        $knownIdSet = ExamStudent::query()
+            ->where('exam_id', $examId)
+            ->where('organization_id', $organizationId)
+            ->where('school_id', $schoolId)
+            ->whereNull('deleted_at')
+            ->whereIn('id', array_keys($plannedById))
+            ->pluck('id')
+            ->mapWithKeys(static fn ($id): array => [(string) $id => true])
+            ->all();
+
+        /** @var array<string, string> $writing */
+        $writing = [];
+        foreach ($plannedById as $examStudentId => $rollNumber) {
+            if (! isset($knownIdSet[$examStudentId])) {
+                $errors[] = [
+                    'exam_student_id' => $examStudentId,
+                    'error' => 'Student not found in this exam',
+                ];
+
+                continue;
+            }
+            $writing[$examStudentId] = $rollNumber;
+        }
+
+        // Current holders of the planned numbers. A number is taken when its
+        // holder is not rewritten here; a skipped student keeps its number,
+        // which can take it from another planned student in turn.
+        /** @var array<string, string> $holderByRoll */
+        $holderByRoll = ExamStudent::query()
+            ->where('exam_id', $examId)
+            ->whereNull('deleted_at')
+            ->whereIn('exam_roll_number', array_values($plannedById))
+            ->pluck('id', 'exam_roll_number')
+            ->map(static fn ($id): string => (string) $id)
+            ->all();
+        do {
+            $skipped = false;
+            foreach ($writing as $examStudentId => $rollNumber) {
+                $holderId = $holderByRoll[$rollNumber] ?? null;
+                if ($holderId === null || $holderId === $examStudentId || isset($writing[$holderId])) {
+                    continue;
+                }
+                $errors[] = [
+                    'exam_student_id' => $examStudentId,
+                    'error' => "Roll number {$rollNumber} is already assigned",
+                ];
+                unset($writing[$examStudentId]);
+                $skipped = true;
+            }
+        } while ($skipped);
+
+        $now = now();
+        $scope = [$examId, $organizationId, $schoolId];
+        foreach (array_chunk(array_keys($writing), 1000) as $chunk) {
+            $placeholders = implode(', ', array_fill(0, count($chunk), '?::uuid'));
+            DB::connection('pgsql')->update(
+                "UPDATE exam_students
+                    SET exam_roll_number = NULL
+                    WHERE id IN ({$placeholders})
+                        AND exam_id = ? AND organization_id = ? AND school_id = ?
+                        AND deleted_at IS NULL",
+                array_merge($chunk, $scope)
+            );
+        }
+        foreach (array_chunk($writing, 1000, true) as $chunk) {
+            $values = implode(', ', array_fill(0, count($chunk), '(?, ?)'));
+            $bindings = [$now];
+            foreach ($chunk as $examStudentId => $rollNumber) {
+                array_push($bindings, $examStudentId, $rollNumber);
+            }
+            DB::connection('pgsql')->update(
+                "UPDATE exam_students AS es
+                    SET exam_roll_number = v.roll_number, updated_at = ?
+                    FROM (VALUES {$values}) AS v(id, roll_number)
+                    WHERE es.id = v.id::uuid
+                        AND es.exam_id = ? AND es.organization_id = ? AND es.school_id = ?
+                        AND es.deleted_at IS NULL",
+                array_merge($bindings, $scope)
+            );
+        }
+
+        return ['updated' => count($writing), 'errors' => $errors];
+    }
+
     public function assertEditable(ExamSeatingMap $map): void
     {
         if ($map->isLockedForEditing()) {
@@ -5,6 +5,7 @@
 use App\Models\ExamSeatAssignment;
 use App\Models\ExamSeatingMap;
 use App\Models\ExamStudent;
+use Illuminate\Support\Facades\Http;
 use Illuminate\Support\Facades\Log;
 use RuntimeException;
 use Symfony\Component\Process\Process;
@@ -43,18 +44,32 @@ public function buildSolverInput(
 
         $studentCount = count($inputPayload['students']);
         $cpSatTimeout = $this->resolveCpSatTimeoutSeconds($studentCount);
+        $timingOptions = $this->timingOptions();
+        if (($timingOptions['adaptive_timeout'] ?? false) === true) {
+            // The solver lowers the budget to its prediction; send the cap.
+            $cpSatTimeout = (int) config('exam_seating.max_timeout_seconds', 900);
+        }
 
         $normalizedStrategy = strtolower(trim($strategy));
         if (! in_array($normalizedStrategy, ['default', 'zigzag'], true)) {
             $normalizedStrategy = 'default';
         }
 
-        $payload = array_merge($inputPayload, [
-            'strict_mode' => $strictMode,
-            'seed' => $seed ?? random_int(1, 2_147_483_647),
-            'timeout_seconds' => (float) $cpSatTimeout,
-            'strategy' => $normalizedStrategy,
-        ]);
+        $payload = array_merge(
+            $inputPayload,
+            [
+                'strict_mode' => $strictMode,
+                'seed' => $seed ?? random_int(1, 2_147_483_647),
+                'timeout_seconds' => (float) $cpSatTimeout,
+                'deadline_seconds' => (float) $this->resolveDeadlineSeconds($cpSatTimeout, $strictMode),
+                'strategy' => $normalizedStrategy,
+            ],
+            $timingOptions,
+            $this->metricsOptions(),
+            $this->diagnosticsOptions(),
+            $this->recordingOptions(),
+            $this->modelCacheOptions()
+        );
 
         return [
             'payload' => $payload,
@@ -77,7 +92,29 @@ public function solve(
         string $strategy = 'default'
     ): array {
         $built = $this->buildSolverInput($map, $strictMode, $seed, $strategy);
-        $result = $this->invokeSolver($built['payload']);
+
+        // The solver saves its best layout while it searches. If the worker
+        // dies, the retried job resumes from that checkpoint instead of
+        // starting over. The solver ignores checkpoints of a different roster
+        // or seat selection, so a retry reuses the checkpoint's seed: the seed
+        // picks which seats stay empty.
+        $checkpointPath = $this->checkpointPath($map, $built['checksum']);
+        if ($seed === null && ($checkpointSeed = $this->checkpointSeed($checkpointPath)) !== null) {
+            $built['payload']['seed'] = $checkpointSeed;
+        }
+        $payload = array_merge($built['payload'], [
+            'checkpoint' => [
+                'path' => $checkpointPath,
+                'interval_seconds' => (float) config('exam_seating.checkpoint_interval_seconds', 30),
+            ],
+            'resume_from' => $checkpointPath,
+        ]);
+
+        $result = $this->invokeSolver($payload, (string) $map->organization_id);
+
+        if (in_array($result['status'] ?? '', ['optimal', 'feasible'], true) && is_file($checkpointPath)) {
+            @unlink($checkpointPath);
+        }
 
         return [
             'checksum' => $built['checksum'],
@@ -86,33 +123,126 @@ public function solve(
         ];
     }
 
+    public function checkpointPath(ExamSeatingMap $map, string $inputChecksum): string
+    {
+        $directory = (string) config('exam_seating.checkpoint_directory');
+
+        return rtrim($directory, '/').'/'.$map->id.'-'.substr($inputChecksum, 0, 16).'.json';
+    }
+
+    private function checkpointSeed(string $checkpointPath): ?int
+    {
+        if (! is_file($checkpointPath)) {
+            return null;
+        }
+        $data = json_decode((string) @file_get_contents($checkpointPath), true);
+
+        return is_array($data) && is_int($data['seed'] ?? null) ? $data['seed'] : null;
+    }
+
     /**
      * @param  array<string, mixed>  $payload
      * @return array<string, mixed>
      */
-    public function invokeSolver(array $payload): array
+    public function invokeSolver(array $payload, ?string $organizationId = null): array
     {
-        $pythonPath = (string) config('exam_seating.python_path', 'python');
-        $scriptPath = (string) config('exam_seating.solver_script');
         $cpSatTimeout = (int) ($payload['timeout_seconds'] ?? config('exam_seating.timeout_seconds', 300));
-        // Strict mode may run CP-SAT twice (strict, then fallback).
-        $processTimeout = ($cpSatTimeout * 2) + 60;
-
-        if (! is_file($scriptPath)) {
-            throw new RuntimeException("Exam seating solver script not found at {$scriptPath}");
-        }
-
-        $process = new Process([$pythonPath, $scriptPath]);
-        $process->setInput($this->canonicalJson($payload));
-        $process->setTimeout($processTimeout);
+        // The solver answers before its deadline; the grace covers process
+        // start-up and reading the response.
+        $processTimeout = $this->payloadDeadlineSeconds($payload)
+            + (int) config('exam_seating.process_grace_seconds', 60);
 
         Log::info('Exam seating solver process starting', [
             'students' => count($payload['students'] ?? []),
             'seats' => count($payload['seats'] ?? []),
             'cp_sat_timeout_seconds' => $cpSatTimeout,
+            'deadline_seconds' => $payload['deadline_seconds'] ?? null,
             'process_timeout_seconds' => $processTimeout,
         ]);
 
+        $serviceUrl = (string) config('exam_seating.service_url', '');
+        $decoded = $serviceUrl !== ''
+            ? $this->runSolverViaService($serviceUrl, $payload, $processTimeout, $organizationId)
+            : $this->runSolverProcess($payload, $processTimeout);
+        $this->validateOutputSchema($decoded);
+
+        return $decoded;
+    }
+
+    /**
+     * Submit to the local solver service (solver/seating_service.py), which
+     * caps CP-SAT threads across all queue workers, and poll until done.
+     *
+     * @param  array<string, mixed>  $payload
+     * @return array<string, mixed>
+     */
+    private function runSolverViaService(
+        string $serviceUrl,
+        array $payload,
+        int $timeoutSeconds,
+        ?string $organizationId
+    ): array {
+        $baseUrl = rtrim($serviceUrl, '/');
+        $submitted = Http::timeout(30)->post("{$baseUrl}/jobs", array_merge($payload, [
+            'organization_id' => $organizationId,
+        ]));
+
+        if (! $submitted->successful()) {
+            throw new RuntimeException(
+                'Exam seating solver service rejected the job: '
+                .($submitted->json('message') ?? "HTTP {$submitted->status()}")
+            );
+        }
+
+        $jobId = (string) $submitted->json('job_id');
+        $deadline = microtime(true) + $timeoutSeconds;
+        $pollMicroseconds = (int) config('exam_seating.service_poll_milliseconds', 500) * 1000;
+
+        while (microtime(true) < $deadline) {
+            $polled = Http::timeout(30)->get("{$baseUrl}/jobs/{$jobId}");
+            if ($polled->status() === 404) {
+                // The service restarted or dropped the finished job; it will
+                // never report on this job again.
+                throw new RuntimeException("Exam seating solver service lost job {$jobId}");
+            }
+            $job = $polled->json();
+            $status = $job['status'] ?? null;
+
+            if ($status === 'succeeded' && is_array($job['result'] ?? null)) {
+                return $job['result'];
+            }
+
+            if (in_array($status, ['failed', 'cancelled'], true)) {
+                throw new RuntimeException(
+                    "Exam seating solver service job {$status}"
+                    .(isset($job['result']['message']) ? ": {$job['result']['message']}" : '')
+                );
+            }
+
+            usleep($pollMicroseconds);
+        }
+
+        Http::timeout(30)->delete("{$baseUrl}/jobs/{$jobId}");
+
+        throw new RuntimeException("Exam seating solver service job {$jobId} timed out");
+    }
+
+    /**
+     * @param  array<string, mixed>  $input
+     * @return array<string, mixed>
+     */
+    private function runSolverProcess(array $input, int $processTimeout): array
+    {
+        $pythonPath = (string) config('exam_seating.python_path', 'python');
+        $scriptPath = (string) config('exam_seating.solver_script');
+
+        if (! is_file($scriptPath)) {
+            throw new RuntimeException("Exam seating solver script not found at {$scriptPath}");
+        }
+
+        $process = new Process([$pythonPath, $scriptPath]);
+        $process->setInput($this->canonicalJson($input));
+        $process->setTimeout($processTimeout);
         $process->run();
 
         if (! $process->isSuccessful()) {
@@ -133,8 +263,6 @@ public function invokeSolver(array $payload): array
             throw new RuntimeException('Exam seating solver returned invalid JSON');
         }
 
-        $this->validateOutputSchema($decoded);
-
         return $decoded;
     }
 
@@ -181,6 +309,9 @@ public function validateOutputSchema(array $output): void
     }
 
     /**
+     * Walkways stay disabled seat columns here: maps do not store aisles yet,
+     * so map.aisles is only sent by clients that call the solver directly.
+     *
      * @return list<array<string, mixed>>
      */
     private function buildSeatsPayload(ExamSeatingMap $map): array
@@ -335,6 +466,137 @@ private function isList(array $data): bool
         return array_keys($data) === range(0, count($data) - 1);
     }
 
+    /**
+     * Solve-time log and fitted timing model (solver/seating_timing.py).
+     * Kept out of the input checksum: they do not change the layout problem.
+     *
+     * @return array<string, mixed>
+     */
+    private function timingOptions(): array
+    {
+        $options = [];
+        $solveLog = (string) config('exam_seating.solve_log_path', '');
+        if ($solveLog !== '') {
+            $options['solve_log'] = $solveLog;
+        }
+
+        $timingModel = (string) config('exam_seating.timing_model_path', '');
+        if ($timingModel !== '' && is_file($timingModel)) {
+            $options['timing_model'] = $timingModel;
+            $options['adaptive_timeout'] = (bool) config('exam_seating.adaptive_timeout', false);
+        }
+
+        return $options;
+    }
+
+    /**
+     * Textfile-collector output for one-shot solver processes. The solver
+     * service exports its own metrics, so nothing is sent to it.
+     *
+     * @return array<string, mixed>
+     */
+    private function metricsOptions(): array
+    {
+        $textfile = (string) config('exam_seating.metrics_textfile', '');
+        if ($textfile === '' || (string) config('exam_seating.service_url', '') !== '') {
+            return [];
+        }
+
+        return ['metrics_textfile' => $textfile];
+    }
+
+    /**
+     * Full diagnostics (every conflicting pair) unless compact is opted
+     * into, which keeps the response, and the diagnostics stored on runs and
+     * maps, small on halls with many conflicts. Kept out of the input
+     * checksum.
+     *
+     * @return array<string, mixed>
+     */
+    private function diagnosticsOptions(): array
+    {
+        $mode = strtolower(trim((string) config('exam_seating.diagnostics.mode', 'full')));
+        if ($mode !== 'compact') {
+            return [];
+        }
+
+        return [
+            'diagnostics' => [
+                'mode' => 'compact',
+                'top_pairs' => max(0, (int) config('exam_seating.diagnostics.top_pairs', 20)),
+            ],
+        ];
+    }
+
+    /**
+     * Corpus directory the solver records each anonymised payload and its
+     * outcome into, for replay benchmarks. Kept out of the input checksum.
+     *
+     * @return array<string, mixed>
+     */
+    private function recordingOptions(): array
+    {
+        $directory = (string) config('exam_seating.record_corpus', '');
+
+        return $directory === '' ? [] : ['record_corpus' => $directory];
+    }
+
+    /**
+     * Directory of built CP-SAT models that one-shot solver processes share,
+     * so re-solving a hall with the same class profile skips the model build.
+     * Service workers keep their models in memory. Kept out of the input
+     * checksum.
+     *
+     * @return array<string, mixed>
+     */
+    private function modelCacheOptions(): array
+    {
+        $directory = (string) config('exam_seating.model_cache_directory', '');
+        if ($directory === '' || (string) config('exam_seating.service_url', '') !== '') {
+            return [];
+        }
+
+        return ['model_cache' => $directory];
+    }
+
+    /**
+     * Wall-clock limit for the whole solve: strict and minimising CP-SAT
+     * phases, plus half a budget for alternative layouts, capped so the
+     * response arrives well inside the queue job's timeout.
+     */
+    private function resolveDeadlineSeconds(
+        int $cpSatTimeout,
+        bool $strictMode,
+        bool $alternatives = false
+    ): int
+    {
+        $deadline = $cpSatTimeout * ($strictMode ? 2 : 1);
+        if ($alternatives) {
+            $deadline += (int) ceil($cpSatTimeout / 2);
+        }
+
+        return min((int) config('exam_seating.max_deadline_seconds', 1080), $deadline);
+    }
+
+    /**
+     * @param  array<string, mixed>  $payload
+     */
+    private function payloadDeadlineSeconds(array $payload): int
+    {
+        if (isset($payload['deadline_seconds'])) {
+            return (int) ceil((float) $payload['deadline_seconds']);
+        }
+
+        // Payloads built before the solver took a deadline.
+        $cpSatTimeout = (int) ($payload['timeout_seconds'] ?? config('exam_seating.timeout_seconds', 300));
+
+        return $this->resolveDeadlineSeconds(
+            $cpSatTimeout,
+            (bool) ($payload['strict_mode'] ?? true),
+            isset($payload['alternatives'])
+        );
+    }
+
     private function resolveCpSatTimeoutSeconds(int $studentCount): int
     {
         $base = (int) config('exam_seating.timeout_seconds', 300);
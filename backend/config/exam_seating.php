@@ -7,5 +7,48 @@
     'timeout_seconds' => (int) env('EXAM_SEATING_TIMEOUT_SECONDS', 300),
     // Hard cap for scaled timeout (CP-SAT max_time_in_seconds).
     'max_timeout_seconds' => (int) env('EXAM_SEATING_MAX_TIMEOUT_SECONDS', 900),
+    // Hard wall-clock limit for a whole solve (all phases), sent as
+    // deadline_seconds; keep it under the queue job timeout (1200 s). The
+    // process timeout is the deadline plus process_grace_seconds.
+    'max_deadline_seconds' => (int) env('EXAM_SEATING_MAX_DEADLINE_SECONDS', 1080),
+    'process_grace_seconds' => (int) env('EXAM_SEATING_PROCESS_GRACE_SECONDS', 60),
+    // Optional local solver service (solver/seating_service.py), e.g. http://127.0.0.1:8765.
+    // When set, solves are queued there instead of spawning one process per job.
+    'service_url' => env('EXAM_SEATING_SERVICE_URL'),
+    'service_poll_milliseconds' => (int) env('EXAM_SEATING_SERVICE_POLL_MS', 500),
+    // Incumbent checkpoints for long solves; a retried job resumes from them.
+    'checkpoint_directory' => env('EXAM_SEATING_CHECKPOINT_DIR', storage_path('app/exam-seating/checkpoints')),
+    'checkpoint_interval_seconds' => (int) env('EXAM_SEATING_CHECKPOINT_INTERVAL_SECONDS', 30),
+    // Solve-time log (JSONL) and a timing model fitted from it with
+    // `python solver/seating_timing.py fit <log> --output <model>`. With
+    // adaptive_timeout the solver budgets each map from the model's prediction
+    // (capped at max_timeout_seconds) instead of scaling by student count.
+    'solve_log_path' => env('EXAM_SEATING_SOLVE_LOG', storage_path('logs/exam-seating-solves.jsonl')),
+    'timing_model_path' => env('EXAM_SEATING_TIMING_MODEL', storage_path('app/exam-seating/timing_model.json')),
+    'adaptive_timeout' => (bool) env('EXAM_SEATING_ADAPTIVE_TIMEOUT', false),
+    // Prometheus textfile (node_exporter textfile collector) that one-shot
+    // solver processes merge their metrics into. Unused with service_url: the
+    // service serves GET /metrics itself.
+    'metrics_textfile' => env('EXAM_SEATING_METRICS_TEXTFILE', storage_path('app/exam-seating/metrics/exam_seating.prom')),
+    // Conflict diagnostics in solver responses. "full" lists every pair,
+    // which the map stores and the editor highlights. "compact" (opt-in)
+    // returns only the top_pairs conflicting pairs plus per-class counts and
+    // row/column histograms.
+    'diagnostics' => [
+        'mode' => env('EXAM_SEATING_DIAGNOSTICS', 'full'),
+        'top_pairs' => (int) env('EXAM_SEATING_DIAGNOSTICS_TOP_PAIRS', 20),
+    ],
+    // Directory the solver records every payload (IDs replaced by stable
+    // hashes) and its outcome into, for replaying with
+    // `python solver/seating_replay.py <dir>`. Unset disables recording; with
+    // service_url the path is on the solver service's host.
+    'record_corpus' => env('EXAM_SEATING_RECORD_CORPUS'),
+    // Built CP-SAT models shared by one-shot solver processes, keyed by hall
+    // shape, locked seats and class sizes (not IDs or seed). Opt-in: with it
+    // set the solver spaces empty seats independently of the seed, so
+    // re-solving with a new seed no longer moves the empty seats. Entries are
+    // a few MB each and safe to delete; the solver prunes the least recently
+    // used beyond 1 GB. Unused with service_url.
+    'model_cache_directory' => env('EXAM_SEATING_MODEL_CACHE_DIR'),
     'algorithm_version' => 'ortools-cp-sat-v4-zigzag-strategy',
 ];
@@ -3,22 +3,146 @@
 
 Reads a versioned JSON contract from stdin and writes JSON to stdout.
 Designed for invocation by Laravel Process (no database access).
+
+A batch envelope ({"contract_version": "1.0", "problems": [...]}) solves many
+independent maps in one invocation, spread over a worker pool.
+
+In-process callers (desktop app, tests, benchmarks) build a `SeatingProblem`
+and call `solve_problem()` to get a `SeatingResult`; the JSON CLI is a thin
+wrapper over the same path.
 """
 
 from __future__ import annotations
 
+import hashlib
+import heapq
+import itertools
 import json
+import math
+import multiprocessing
+import os
 import sys
-from dataclasses import dataclass
-from typing import Any
+import time
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable
 
 from ortools.sat.python import cp_model
 
+from seating_corpus import write_recording
+from seating_metrics import write_textfile
+from seating_timing import TimingModel, append_solve_log
+
 CONTRACT_VERSION = "1.0"
 SUPPORTED_VERSIONS = {CONTRACT_VERSION}
 STRATEGY_DEFAULT = "default"
 STRATEGY_ZIGZAG = "zigzag"
 SUPPORTED_STRATEGIES = {STRATEGY_DEFAULT, STRATEGY_ZIGZAG}
+# Zigzag lattice colourings: 2 = (row+col)%2 checkerboard (orthogonal
+# separation), 4 = (row%2, col%2) blocks (king-move separation).
+ZIGZAG_COLORS_DEFAULT = 2
+SUPPORTED_ZIGZAG_COLORS = {2, 4}
+# Free seats the zigzag filler inspects per colour before accepting a conflict.
+ZIGZAG_PROBE_LIMIT = 8
+# Symmetry breaking in the class-level CP-SAT model: "classes" orders
+# interchangeable classes by their first seat, "full" also removes the
+# left-right mirror image when the hall and its locks are mirror-symmetric.
+SYMMETRY_NONE = "none"
+SYMMETRY_CLASSES = "classes"
+SYMMETRY_FULL = "full"
+SUPPORTED_SYMMETRY_MODES = {SYMMETRY_NONE, SYMMETRY_CLASSES, SYMMETRY_FULL}
+# Conflict diagnostics in responses. "full" lists every conflicting pair;
+# "compact" keeps the top pairs (most-conflicted classes first) next to a
+# conflict_summary of per-class counts and row/column histograms, with every
+# pair packed as payload seat indices on request.
+DIAGNOSTICS_FULL = "full"
+DIAGNOSTICS_COMPACT = "compact"
+SUPPORTED_DIAGNOSTICS_MODES = {DIAGNOSTICS_FULL, DIAGNOSTICS_COMPACT}
+DIAGNOSTICS_TOP_PAIRS_DEFAULT = 20
+# Class-level CP-SAT encodings. "boolean": one literal per seat and class
+# with pairwise constraints per class on every adjacent pair. "integer": one
+# class variable per seat (literals channelled with add_map_domain) and one
+# x_a != x_b constraint per pair. "clique": at-most-one per class over each
+# 2x2 seat block instead of per pair (strict phase; minimisation keeps the
+# boolean pair encoding). "auto" picks per problem size (_default_encoding).
+ENCODING_AUTO = "auto"
+ENCODING_BOOLEAN = "boolean"
+ENCODING_INTEGER = "integer"
+ENCODING_CLIQUE = "clique"
+SUPPORTED_ENCODINGS = {ENCODING_AUTO, ENCODING_BOOLEAN, ENCODING_INTEGER, ENCODING_CLIQUE}
+# Below this many seat x class literals `auto` keeps the boolean encoding.
+AUTO_ENCODING_MIN_TERMS = 10_000
+# Engines the planner can chain (reported in the response `plan`).
+ENGINE_ZIGZAG = "zigzag"
+ENGINE_CP_SAT_STRICT = "cp_sat_strict"
+ENGINE_CP_SAT = "cp_sat"
+ENGINE_CONSTRUCTIVE = "constructive"
+ENGINE_ANALYTIC = "analytic"
+ENGINE_LNS = "lns"
+ENGINE_ROW_DP = "row_dp"
+ENGINE_DSATUR = "dsatur"
+ENGINE_COMPONENTS = "components"
+# Rough CP-SAT cost model, calibrated on the class-level model (1,000 students,
+# 20 classes, 1,200 seats: ~100k constraints, ~8 s on one core).
+PLANNER_SECONDS_PER_CONSTRAINT = 8e-5
+PLANNER_BYTES_PER_TERM = 100
+# CP-SAT is planned only when its expected time fits this share of the budget
+# (strict mode may need a second, minimising solve) and its model fits in memory.
+PLANNER_CPSAT_BUDGET_SHARE = 0.5
+PLANNER_MAX_MODEL_MB = 2048.0
+# Exact row DP: routed to when its transition bound is below the cap and its
+# expected time fits the budget share (measured ~2e-7 s per bounded transition
+# on 4-6 column halls with 2-3 classes).
+ROW_DP_MAX_TRANSITIONS = 20_000_000
+ROW_DP_SECONDS_PER_TRANSITION = 2.5e-7
+# DSatur engine: colours locked groups are pre-coloured with (the king-move
+# grid's chromatic number), repair passes over conflicting seats, and the swap
+# probes the repair may spend per seat in the hall.
+DSATUR_LOCKED_COLOURS = 4
+DSATUR_REPAIR_PASSES = 2
+DSATUR_REPAIR_PROBES_PER_SEAT = 20
+# From this many separation groups the planner starts from a DSatur layout.
+DSATUR_MIN_CLASSES = 8
+# Halls whose seat graph falls apart (aisles, partitions, disabled seats) are
+# solved part by part from this many movable students; components smaller
+# than COMPONENT_MIN_SEATS are merged with their neighbours in seat order.
+COMPONENT_MIN_STUDENTS = 200
+COMPONENT_MIN_SEATS = 50
+# Large-neighbourhood search: rows re-optimised per window and per-window budget.
+LNS_WINDOW_ROWS = 4
+LNS_WINDOW_SECONDS = 5.0
+# Alternative layouts per solve, and the share of timeout_seconds their
+# searches may use together.
+MAX_ALTERNATIVES = 10
+ALTERNATIVES_BUDGET_SHARE = 0.5
+# Seconds between incumbent checkpoints when the payload does not set one.
+CHECKPOINT_INTERVAL_DEFAULT = 30.0
+CHECKPOINT_KIND = "seating_checkpoint"
+# Serialised class-level models kept per process (least recently used dropped
+# first) up to this many bytes in all; `model_cache` adds a directory shared between
+# processes, pruned the same way to MODEL_CACHE_DIR_MAX_BYTES (a deploy changes
+# every key, so old entries only leave through pruning). A hit replaces a
+# multi-second build with a parse of the proto.
+MODEL_CACHE_MAX_BYTES = 256 * 1024 * 1024
+MODEL_CACHE_DIR_MAX_BYTES = 1024 * 1024 * 1024
+MODEL_CACHE_KIND = "seating_model"
+# Default CP-SAT budget for problems built in-process (matches the Laravel config).
+DEFAULT_TIMEOUT_SECONDS = 300.0
+# CP-SAT search workers used for large maps when the caller does not cap them.
+DEFAULT_SEARCH_WORKERS = 8
+# Extra wall-clock allowance per batch problem on top of its CP-SAT budgets
+# (strict may run twice) before the batch gives up waiting for it.
+BATCH_GRACE_SECONDS = 30.0
+# How often the batch checks started problems against their deadlines.
+BATCH_POLL_SECONDS = 0.05
+# Time held back from a solve's deadline for the constructive fallback and
+# writing the response: this many seconds, at most this share of the deadline.
+DEADLINE_RESERVE_SECONDS = 5.0
+DEADLINE_RESERVE_SHARE = 0.05
+# Adjacent pairs the model build adds between deadline checks.
+BUILD_DEADLINE_CHECK_PAIRS = 4096
+# Per-row phase step for stratified empty seats (1/phi: most uniform 1-D sequence).
+_GOLDEN_RATIO_CONJUGATE = (math.sqrt(5) - 1) / 2
 
 
 @dataclass(frozen=True)
@@ -29,6 +153,24 @@ class SeatCell:
     is_disabled: bool
     locked: bool
     exam_student_id: str | None
+    # Free-form halls: desk centre and size, in the units of
+    # map.adjacency_distance. Grid halls leave them unset.
+    x: float | None = None
+    y: float | None = None
+    desk_width: float = 0.0
+    desk_depth: float = 0.0
+
+
+@dataclass(frozen=True)
+class Aisle:
+    """A walkway or partition between grid lines: after column `after` (axis
+    "col") or after row `after` (axis "row"). Seats on opposite sides are not
+    adjacent. `span` limits a partition to a range of rows (for a column
+    boundary) or columns (for a row boundary); None runs the whole hall."""
+
+    axis: str
+    after: int
+    span: tuple[int, int] | None = None
 
 
 @dataclass(frozen=True)
@@ -46,15 +188,317 @@ class StudentRecord:
 
 
 @dataclass
-class ParsedInput:
+class SeatingProblem:
+    """One seating map to solve: the typed form of a contract-1.0 payload.
+
+    Build it from JSON with `from_payload()` or directly in Python:
+
+        problem = SeatingProblem.grid(4, 6, strict_mode=True, seed=7)
+        problem.add_student("s1", "class-a").lock_seat(0, 0, "s1")
+        result = solve_problem(problem)
+    """
+
     rows: int
     cols: int
-    seats: list[SeatCell]
-    students: list[StudentRecord]
-    strict_mode: bool
-    seed: int
-    timeout_seconds: float
+    seats: list[SeatCell] = field(default_factory=list)
+    students: list[StudentRecord] = field(default_factory=list)
+    # Free-form halls: desks at most this far apart (edge to edge) are
+    # adjacent, instead of king-move neighbours on the rows x cols grid.
+    adjacency_distance: float | None = None
+    aisles: list[Aisle] = field(default_factory=list)
+    strict_mode: bool = True
+    seed: int = 0
+    timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS
+    # Hard wall-clock limit for the whole solve (all phases), from the start
+    # of the request; None derives it from timeout_seconds (_deadline_seconds).
+    deadline_seconds: float | None = None
     strategy: str = STRATEGY_DEFAULT
+    # Cap on CP-SAT search threads; None keeps the size-based default.
+    search_workers: int | None = None
+    zigzag_colors: int = ZIGZAG_COLORS_DEFAULT
+    # Incumbent checkpoint file written during CP-SAT search, and a checkpoint
+    # to resume from (hints + objective upper bound); see _Checkpointer.
+    checkpoint_path: str | None = None
+    checkpoint_interval_seconds: float = CHECKPOINT_INTERVAL_DEFAULT
+    resume_from: str | None = None
+    # JSONL log of features and solve times, and a model fitted from such
+    # logs (seating_timing.py) that predicts the budget; with adaptive_timeout
+    # the prediction replaces timeout_seconds whenever it is lower.
+    solve_log: str | None = None
+    timing_model: str | None = None
+    adaptive_timeout: bool = False
+    # Prometheus textfile-collector file each one-shot solve is merged into.
+    metrics_textfile: str | None = None
+    # Directory each solve records its anonymised payload and outcome into,
+    # for replay benchmarks (seating_corpus).
+    record_corpus: str | None = None
+    # Directory of serialised CP-SAT models shared between solver processes;
+    # each process also keeps recent models in memory. With it set, the empty
+    # seats no longer depend on the seed, so re-solves with a new seed reuse
+    # the model (the seed still drives the search).
+    model_cache: str | None = None
+    # "classes" by default: on full halls with equal classes it turned 7-20 s
+    # strict solves into under a second, while "full" (mirror cuts too) was a
+    # little slower on feasible halls (seating_benchmark.py --symmetry).
+    symmetry_breaking: str = SYMMETRY_CLASSES
+    encoding: str = ENCODING_AUTO
+    # Let the planner pick the exact row DP for halls whose state space is small.
+    exact_dp: bool = True
+    # Extra layouts returned next to the best one (_find_alternatives): each
+    # differs from every earlier layout on at least `min_distance` seats (None:
+    # a tenth of the seats) and has at most best + `tolerance` conflicts.
+    alternatives_count: int = 0
+    alternatives_min_distance: int | None = None
+    alternatives_tolerance: int = 0
+    diagnostics_mode: str = DIAGNOSTICS_FULL
+    diagnostics_top_pairs: int = DIAGNOSTICS_TOP_PAIRS_DEFAULT
+    diagnostics_packed_pairs: bool = False
+
+    @classmethod
+    def grid(cls, rows: int, cols: int, **options: Any) -> SeatingProblem:
+        """Full rows x cols hall with seats numbered 1.. in reading order."""
+        problem = cls(rows=rows, cols=cols, **options)
+        for r in range(rows):
+            for c in range(cols):
+                problem.add_seat(r, c)
+        return problem
+
+    @classmethod
+    def from_payload(cls, raw: dict[str, Any]) -> SeatingProblem:
+        """Parse a contract payload; raises ValueError with the contract message."""
+        parsed = _parse_input(raw)
+        if isinstance(parsed, dict):
+            raise ValueError(parsed["message"])
+        return parsed
+
+    def add_seat(
+        self,
+        row: int,
+        col: int,
+        seat_number: int | None = None,
+        *,
+        is_disabled: bool = False,
+        locked: bool = False,
+        exam_student_id: str | None = None,
+        x: float | None = None,
+        y: float | None = None,
+        desk_width: float = 0.0,
+        desk_depth: float = 0.0,
+    ) -> SeatingProblem:
+        self.seats.append(
+            SeatCell(
+                row=row,
+                col=col,
+                seat_number=row * self.cols + col + 1 if seat_number is None else seat_number,
+                is_disabled=is_disabled,
+                locked=locked,
+                exam_student_id=exam_student_id,
+                x=x,
+                y=y,
+                desk_width=desk_width,
+                desk_depth=desk_depth,
+            )
+        )
+        return self
+
+    def add_student(
+        self,
+        exam_student_id: str,
+        exam_class_id: str,
+        separation_group_id: str | None = None,
+    ) -> SeatingProblem:
+        self.students.append(
+            StudentRecord(exam_student_id, exam_class_id, separation_group_id or "")
+        )
+        return self
+
+    def disable_seat(self, row: int, col: int) -> SeatingProblem:
+        return self._update_seat(row, col, is_disabled=True, locked=False, exam_student_id=None)
+
+    def lock_seat(
+        self, row: int, col: int, exam_student_id: str | None = None
+    ) -> SeatingProblem:
+        """Pin a student to the seat, or keep it empty when no student is given."""
+        return self._update_seat(
+            row, col, is_disabled=False, locked=True, exam_student_id=exam_student_id
+        )
+
+    def _update_seat(self, row: int, col: int, **changes: Any) -> SeatingProblem:
+        for index, seat in enumerate(self.seats):
+            if seat.row == row and seat.col == col:
+                self.seats[index] = replace(seat, **changes)
+                return self
+        raise KeyError(f"No seat at row={row}, col={col}")
+
+    def to_payload(self) -> dict[str, Any]:
+        payload: dict[str, Any] = {
+            "contract_version": CONTRACT_VERSION,
+            "map": {"rows": self.rows, "cols": self.cols},
+            "seats": [_seat_payload(seat) for seat in self.seats],
+            "students": [
+                {
+                    "exam_student_id": student.exam_student_id,
+                    "exam_class_id": student.exam_class_id,
+                    "separation_group_id": student.separation_group_id,
+                }
+                for student in self.students
+            ],
+            "strict_mode": self.strict_mode,
+            "seed": self.seed,
+            "timeout_seconds": self.timeout_seconds,
+            "strategy": self.strategy,
+            "zigzag_colors": self.zigzag_colors,
+        }
+        if self.deadline_seconds is not None:
+            payload["deadline_seconds"] = self.deadline_seconds
+        if self.adjacency_distance is not None:
+            payload["map"]["adjacency_distance"] = self.adjacency_distance
+        if self.aisles:
+            payload["map"]["aisles"] = [
+                {
+                    f"after_{aisle.axis}": aisle.after,
+                    **({} if aisle.span is None else {"span": list(aisle.span)}),
+                }
+                for aisle in self.aisles
+            ]
+        if self.search_workers is not None:
+            payload["search_workers"] = self.search_workers
+        if self.checkpoint_path is not None:
+            payload["checkpoint"] = {
+                "path": self.checkpoint_path,
+                "interval_seconds": self.checkpoint_interval_seconds,
+            }
+        if self.resume_from is not None:
+            payload["resume_from"] = self.resume_from
+        if self.solve_log is not None:
+            payload["solve_log"] = self.solve_log
+        if self.timing_model is not None:
+            payload["timing_model"] = self.timing_model
+        if self.adaptive_timeout:
+            payload["adaptive_timeout"] = True
+        if self.metrics_textfile is not None:
+            payload["metrics_textfile"] = self.metrics_textfile
+        if self.record_corpus is not None:
+            payload["record_corpus"] = self.record_corpus
+        if self.model_cache is not None:
+            payload["model_cache"] = self.model_cache
+        if self.symmetry_breaking != SYMMETRY_CLASSES:
+            payload["symmetry_breaking"] = self.symmetry_breaking
+        if self.encoding != ENCODING_AUTO:
+            payload["encoding"] = self.encoding
+        if not self.exact_dp:
+            payload["exact_dp"] = False
+        if self.alternatives_count:
+            payload["alternatives"] = {
+                "count": self.alternatives_count,
+                "tolerance": self.alternatives_tolerance,
+            }
+            if self.alternatives_min_distance is not None:
+                payload["alternatives"]["min_distance"] = self.alternatives_min_distance
+        if self.diagnostics_mode != DIAGNOSTICS_FULL:
+            payload["diagnostics"] = {
+                "mode": self.diagnostics_mode,
+                "top_pairs": self.diagnostics_top_pairs,
+                "packed_pairs": self.diagnostics_packed_pairs,
+            }
+        return payload
+
+
+@dataclass(frozen=True)
+class SeatAssignment:
+    exam_student_id: str
+    exam_class_id: str
+    row: int
+    col: int
+    seat_number: int
+
+
+# Response keys held in typed SeatingResult fields; everything else lands in `details`.
+_RESULT_FIELDS = (
+    "contract_version",
+    "status",
+    "strict_mode",
+    "mode_used",
+    "message",
+    "assignments",
+    "conflict_pairs",
+    "conflicts_count",
+)
+
+
+@dataclass
+class SeatingResult:
+    """Typed solver response. `to_dict()` gives the JSON contract shape."""
+
+    status: str
+    assignments: list[SeatAssignment] = field(default_factory=list)
+    conflicts_count: int = 0
+    conflict_pairs: list[dict[str, Any]] = field(default_factory=list)
+    mode_used: str | None = None
+    strict_mode: bool | None = None
+    message: str | None = None
+    contract_version: str = CONTRACT_VERSION
+    # Engine-specific extras (strategy, zigzag_*, ...), passed through as-is.
+    details: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.status in {"optimal", "feasible"}
+
+    def seat_of(self, exam_student_id: str) -> SeatAssignment | None:
+        for assignment in self.assignments:
+            if assignment.exam_student_id == exam_student_id:
+                return assignment
+        return None
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> SeatingResult:
+        return cls(
+            status=data["status"],
+            assignments=[
+                SeatAssignment(
+                    exam_student_id=item["exam_student_id"],
+                    exam_class_id=item["exam_class_id"],
+                    row=item["row"],
+                    col=item["col"],
+                    seat_number=item["seat_number"],
+                )
+                for item in data.get("assignments", [])
+            ],
+            conflicts_count=data.get("conflicts_count", 0),
+            conflict_pairs=data.get("conflict_pairs", []),
+            mode_used=data.get("mode_used"),
+            strict_mode=data.get("strict_mode"),
+            message=data.get("message"),
+            contract_version=data.get("contract_version", CONTRACT_VERSION),
+            details={k: v for k, v in data.items() if k not in _RESULT_FIELDS},
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        data: dict[str, Any] = {
+            "contract_version": self.contract_version,
+            "status": self.status,
+        }
+        if self.strict_mode is not None:
+            data["strict_mode"] = self.strict_mode
+        if self.mode_used is not None:
+            data["mode_used"] = self.mode_used
+        if self.message is not None:
+            data["message"] = self.message
+        data["assignments"] = [
+            {
+                "exam_student_id": item.exam_student_id,
+                "exam_class_id": item.exam_class_id,
+                "row": item.row,
+                "col": item.col,
+                "seat_number": item.seat_number,
+            }
+            for item in self.assignments
+        ]
+        data["conflict_pairs"] = self.conflict_pairs
+        data["conflicts_count"] = self.conflicts_count
+        data.update(self.details)
+        return data
 
 
 def _error(message: str) -> dict[str, Any]:
@@ -68,7 +512,68 @@ def _error(message: str) -> dict[str, Any]:
     }
 
 
-def _parse_input(raw: dict[str, Any]) -> ParsedInput | dict[str, Any]:
+def error_result(message: str) -> dict[str, Any]:
+    """A contract error response, for callers that answer on the solver's
+    behalf (the solver service)."""
+    return _error(message)
+
+
+def _batch_error(message: str) -> dict[str, Any]:
+    return {
+        "contract_version": CONTRACT_VERSION,
+        "status": "error",
+        "message": message,
+        "results": [],
+    }
+
+
+def _seat_payload(seat: SeatCell) -> dict[str, Any]:
+    item: dict[str, Any] = {
+        "row": seat.row,
+        "col": seat.col,
+        "seat_number": seat.seat_number,
+        "is_disabled": seat.is_disabled,
+        "locked": seat.locked,
+        "exam_student_id": seat.exam_student_id,
+    }
+    if seat.x is not None or seat.y is not None:
+        item.update({"x": seat.x, "y": seat.y})
+    if seat.desk_width or seat.desk_depth:
+        item.update({"desk_width": seat.desk_width, "desk_depth": seat.desk_depth})
+    return item
+
+
+def _optional_float(value: Any) -> float | None:
+    return None if value is None else float(value)
+
+
+def _parse_aisles(raw: Any) -> list[Aisle] | dict[str, Any]:
+    if raw is None:
+        return []
+    if not isinstance(raw, list):
+        return _error("map.aisles must be an array")
+    aisles: list[Aisle] = []
+    for item in raw:
+        if not isinstance(item, dict):
+            return _error("Invalid map.aisles entry")
+        axes = [axis for axis in ("col", "row") if f"after_{axis}" in item]
+        if len(axes) != 1:
+            return _error("Each map.aisles entry needs exactly one of after_col or after_row")
+        try:
+            span = item.get("span")
+            aisles.append(
+                Aisle(
+                    axis=axes[0],
+                    after=int(item[f"after_{axes[0]}"]),
+                    span=None if span is None else (int(span[0]), int(span[1])),
+                )
+            )
+        except (TypeError, ValueError, IndexError, KeyError):
+            return _error("Invalid map.aisles entry")
+    return aisles
+
+
+def _parse_input(raw: dict[str, Any]) -> SeatingProblem | dict[str, Any]:
     version = raw.get("contract_version")
     if version is None:
         return _error("Missing contract_version")
@@ -79,10 +584,15 @@ def _parse_input(raw: dict[str, Any]) -> ParsedInput | dict[str, Any]:
         map_info = raw["map"]
         rows = int(map_info["rows"])
         cols = int(map_info["cols"])
-        if rows < 1 or cols < 1:
-            return _error("map.rows and map.cols must be positive integers")
     except (KeyError, TypeError, ValueError):
         return _error("Invalid map dimensions")
+    try:
+        adjacency_distance = _optional_float(map_info.get("adjacency_distance"))
+    except (TypeError, ValueError):
+        return _error("Invalid map.adjacency_distance")
+    aisles = _parse_aisles(map_info.get("aisles"))
+    if isinstance(aisles, dict):
+        return aisles
 
     seats: list[SeatCell] = []
     try:
@@ -95,6 +605,10 @@ def _parse_input(raw: dict[str, Any]) -> ParsedInput | dict[str, Any]:
                     is_disabled=bool(item.get("is_disabled", False)),
                     locked=bool(item.get("locked", False)),
                     exam_student_id=item.get("exam_student_id"),
+                    x=_optional_float(item.get("x")),
+                    y=_optional_float(item.get("y")),
+                    desk_width=float(item.get("desk_width") or 0.0),
+                    desk_depth=float(item.get("desk_depth") or 0.0),
                 )
             )
     except (KeyError, TypeError, ValueError):
@@ -124,8 +638,6 @@ def _parse_input(raw: dict[str, Any]) -> ParsedInput | dict[str, Any]:
         strict_mode = bool(raw["strict_mode"])
         seed = int(raw["seed"])
         timeout_seconds = float(raw["timeout_seconds"])
-        if timeout_seconds <= 0:
-            return _error("timeout_seconds must be positive")
     except (KeyError, TypeError, ValueError):
         return _error("Invalid solver options")
 
@@ -136,22 +648,214 @@ def _parse_input(raw: dict[str, Any]) -> ParsedInput | dict[str, Any]:
         return _error("Invalid strategy")
     else:
         strategy = strategy_raw.strip().lower()
-    if strategy not in SUPPORTED_STRATEGIES:
-        return _error(
-            f"Unsupported strategy: {strategy_raw}. "
-            f"Use one of: {', '.join(sorted(SUPPORTED_STRATEGIES))}"
-        )
 
-    return ParsedInput(
+    deadline_raw = raw.get("deadline_seconds")
+    deadline_seconds: float | None = None
+    if deadline_raw is not None:
+        try:
+            deadline_seconds = float(deadline_raw)
+        except (TypeError, ValueError):
+            return _error("Invalid deadline_seconds")
+
+    search_workers_raw = raw.get("search_workers")
+    search_workers: int | None = None
+    if search_workers_raw is not None:
+        try:
+            search_workers = int(search_workers_raw)
+        except (TypeError, ValueError):
+            return _error("Invalid search_workers")
+
+    zigzag_colors_raw = raw.get("zigzag_colors", ZIGZAG_COLORS_DEFAULT)
+    try:
+        zigzag_colors = int(
+            ZIGZAG_COLORS_DEFAULT if zigzag_colors_raw is None else zigzag_colors_raw
+        )
+    except (TypeError, ValueError):
+        return _error("Invalid zigzag_colors")
+
+    alternatives_raw = raw.get("alternatives")
+    alternatives_count = 0
+    alternatives_min_distance: int | None = None
+    alternatives_tolerance = 0
+    if alternatives_raw is not None:
+        if not isinstance(alternatives_raw, dict):
+            return _error("Invalid alternatives")
+        try:
+            alternatives_count = int(alternatives_raw.get("count", 0))
+            alternatives_tolerance = int(alternatives_raw.get("tolerance", 0))
+            if alternatives_raw.get("min_distance") is not None:
+                alternatives_min_distance = int(alternatives_raw["min_distance"])
+        except (TypeError, ValueError):
+            return _error("Invalid alternatives")
+
+    diagnostics_raw = raw.get("diagnostics")
+    diagnostics_mode = DIAGNOSTICS_FULL
+    diagnostics_top_pairs = DIAGNOSTICS_TOP_PAIRS_DEFAULT
+    diagnostics_packed_pairs = False
+    if diagnostics_raw is not None:
+        if not isinstance(diagnostics_raw, dict) or not isinstance(
+            diagnostics_raw.get("mode", DIAGNOSTICS_FULL), str
+        ):
+            return _error("Invalid diagnostics")
+        diagnostics_mode = diagnostics_raw.get("mode", DIAGNOSTICS_FULL).strip().lower()
+        diagnostics_packed_pairs = bool(diagnostics_raw.get("packed_pairs", False))
+        try:
+            diagnostics_top_pairs = int(
+                diagnostics_raw.get("top_pairs", DIAGNOSTICS_TOP_PAIRS_DEFAULT)
+            )
+        except (TypeError, ValueError):
+            return _error("Invalid diagnostics")
+
+    checkpoint_raw = raw.get("checkpoint")
+    checkpoint_path: str | None = None
+    checkpoint_interval = CHECKPOINT_INTERVAL_DEFAULT
+    if checkpoint_raw is not None:
+        if not isinstance(checkpoint_raw, dict) or not isinstance(checkpoint_raw.get("path"), str):
+            return _error("Invalid checkpoint")
+        checkpoint_path = checkpoint_raw["path"]
+        try:
+            checkpoint_interval = float(
+                checkpoint_raw.get("interval_seconds", CHECKPOINT_INTERVAL_DEFAULT)
+            )
+        except (TypeError, ValueError):
+            return _error("Invalid checkpoint.interval_seconds")
+
+    resume_from = raw.get("resume_from")
+    if resume_from is not None and not isinstance(resume_from, str):
+        return _error("Invalid resume_from")
+
+    solve_log = raw.get("solve_log")
+    if solve_log is not None and not isinstance(solve_log, str):
+        return _error("Invalid solve_log")
+    timing_model = raw.get("timing_model")
+    if timing_model is not None and not isinstance(timing_model, str):
+        return _error("Invalid timing_model")
+    metrics_textfile = raw.get("metrics_textfile")
+    if metrics_textfile is not None and not isinstance(metrics_textfile, str):
+        return _error("Invalid metrics_textfile")
+    record_corpus = raw.get("record_corpus")
+    if record_corpus is not None and not isinstance(record_corpus, str):
+        return _error("Invalid record_corpus")
+    model_cache = raw.get("model_cache")
+    if model_cache is not None and not isinstance(model_cache, str):
+        return _error("Invalid model_cache")
+    adaptive_timeout = raw.get("adaptive_timeout", False)
+    if not isinstance(adaptive_timeout, bool):
+        return _error("Invalid adaptive_timeout")
+    exact_dp = raw.get("exact_dp", True)
+    if not isinstance(exact_dp, bool):
+        return _error("Invalid exact_dp")
+
+    symmetry_raw = raw.get("symmetry_breaking", SYMMETRY_CLASSES)
+    if not isinstance(symmetry_raw, str):
+        return _error("Invalid symmetry_breaking")
+
+    encoding_raw = raw.get("encoding", ENCODING_AUTO)
+    if not isinstance(encoding_raw, str):
+        return _error("Invalid encoding")
+
+    problem = SeatingProblem(
         rows=rows,
         cols=cols,
         seats=seats,
         students=students,
+        adjacency_distance=adjacency_distance,
+        aisles=aisles,
         strict_mode=strict_mode,
         seed=seed,
         timeout_seconds=timeout_seconds,
+        deadline_seconds=deadline_seconds,
         strategy=strategy,
+        search_workers=search_workers,
+        zigzag_colors=zigzag_colors,
+        checkpoint_path=checkpoint_path,
+        checkpoint_interval_seconds=checkpoint_interval,
+        resume_from=resume_from,
+        solve_log=solve_log,
+        timing_model=timing_model,
+        adaptive_timeout=adaptive_timeout,
+        metrics_textfile=metrics_textfile,
+        record_corpus=record_corpus,
+        model_cache=model_cache,
+        exact_dp=exact_dp,
+        alternatives_count=alternatives_count,
+        alternatives_min_distance=alternatives_min_distance,
+        alternatives_tolerance=alternatives_tolerance,
+        diagnostics_mode=diagnostics_mode,
+        diagnostics_top_pairs=diagnostics_top_pairs,
+        diagnostics_packed_pairs=diagnostics_packed_pairs,
+        symmetry_breaking=symmetry_raw.strip().lower(),
+        encoding=encoding_raw.strip().lower(),
     )
+    message = _validate_problem(problem)
+    if message is not None:
+        return _error(message)
+    return problem
+
+
+def _validate_problem(problem: SeatingProblem) -> str | None:
+    """Option checks shared by JSON payloads and in-process problems."""
+    if problem.rows < 1 or problem.cols < 1:
+        return "map.rows and map.cols must be positive integers"
+    for aisle in problem.aisles:
+        lines, across = (
+            (problem.cols, problem.rows) if aisle.axis == "col" else (problem.rows, problem.cols)
+        )
+        if not 0 <= aisle.after < lines - 1:
+            return f"map.aisles after_{aisle.axis} must be between 0 and {lines - 2}"
+        if aisle.span is not None and not 0 <= aisle.span[0] <= aisle.span[1] < across:
+            return "map.aisles span must be [first, last] within the hall"
+    if problem.timeout_seconds <= 0:
+        return "timeout_seconds must be positive"
+    if any(not (seat.desk_width >= 0 and seat.desk_depth >= 0) for seat in problem.seats):
+        return "desk_width and desk_depth must not be negative"
+    positioned = sum(1 for seat in problem.seats if seat.x is not None and seat.y is not None)
+    if problem.adjacency_distance is not None:
+        if not problem.adjacency_distance >= 0:
+            return "map.adjacency_distance must not be negative"
+        if positioned < len(problem.seats):
+            return "Every seat needs x and y when map.adjacency_distance is set"
+        if problem.strategy == STRATEGY_ZIGZAG:
+            return "zigzag strategy needs a grid hall; remove map.adjacency_distance"
+    elif any(seat.x is not None or seat.y is not None for seat in problem.seats):
+        return "map.adjacency_distance is required for seats with x and y"
+    if problem.deadline_seconds is not None and not problem.deadline_seconds > 0:
+        return "deadline_seconds must be positive"
+    if problem.strategy not in SUPPORTED_STRATEGIES:
+        return (
+            f"Unsupported strategy: {problem.strategy}. "
+            f"Use one of: {', '.join(sorted(SUPPORTED_STRATEGIES))}"
+        )
+    if problem.search_workers is not None and problem.search_workers < 1:
+        return "search_workers must be a positive integer"
+    if problem.zigzag_colors not in SUPPORTED_ZIGZAG_COLORS:
+        return "zigzag_colors must be 2 or 4"
+    if problem.checkpoint_interval_seconds <= 0:
+        return "checkpoint.interval_seconds must be positive"
+    if not 0 <= problem.alternatives_count <= MAX_ALTERNATIVES:
+        return f"alternatives.count must be between 0 and {MAX_ALTERNATIVES}"
+    if problem.alternatives_min_distance is not None and problem.alternatives_min_distance < 1:
+        return "alternatives.min_distance must be positive"
+    if problem.alternatives_tolerance < 0:
+        return "alternatives.tolerance must not be negative"
+    if problem.diagnostics_mode not in SUPPORTED_DIAGNOSTICS_MODES:
+        return (
+            f"Unsupported diagnostics.mode: {problem.diagnostics_mode}. "
+            f"Use one of: {', '.join(sorted(SUPPORTED_DIAGNOSTICS_MODES))}"
+        )
+    if problem.diagnostics_top_pairs < 0:
+        return "diagnostics.top_pairs must not be negative"
+    if problem.encoding not in SUPPORTED_ENCODINGS:
+        return (
+            f"Unsupported encoding: {problem.encoding}. "
+            f"Use one of: {', '.join(sorted(SUPPORTED_ENCODINGS))}"
+        )
+    if problem.symmetry_breaking not in SUPPORTED_SYMMETRY_MODES:
+        return (
+            f"Unsupported symmetry_breaking: {problem.symmetry_breaking}. "
+            f"Use one of: {', '.join(sorted(SUPPORTED_SYMMETRY_MODES))}"
+        )
+    return None
 
 
 def _seat_key(seat: SeatCell) -> tuple[int, int]:
@@ -164,80 +868,162 @@ def _build_adjacency(
     cols: int,
     *,
     include_diagonals: bool = True,
+    aisles: list[Aisle] | None = None,
 ) -> list[tuple[int, int]]:
     # Default 8-directional: a diagonal neighbour can still see another student's
-    # paper, so it counts as adjacent. Zigzag mode uses orthogonal-only (4-dir)
-    # because the checkerboard lattice places same-class students on diagonals
-    # by design. Scanning only "forward" offsets yields each pair once.
+    # paper, so it counts as adjacent. 2-colour zigzag uses orthogonal-only
+    # (4-dir) because the checkerboard lattice places same-class students on
+    # diagonals by design. Scanning only "forward" offsets yields each pair once.
+    # Walkways and partitions break line of sight, so pairs across an aisle
+    # are never generated.
     pairs: set[tuple[int, int]] = set()
     offsets = (
         ((0, 1), (1, -1), (1, 0), (1, 1))
         if include_diagonals
         else ((0, 1), (1, 0))
     )
-    for r in range(rows):
-        for c in range(cols):
-            key = (r, c)
-            if key not in seat_index_by_key:
+    for (r, c), i in seat_index_by_key.items():
+        for dr, dc in offsets:
+            j = seat_index_by_key.get((r + dr, c + dc))
+            if j is None or (aisles and _crosses_aisle((r, c), (r + dr, c + dc), aisles)):
                 continue
-            i = seat_index_by_key[key]
-            for dr, dc in offsets:
-                nr, nc = r + dr, c + dc
-                neighbor = (nr, nc)
-                if neighbor in seat_index_by_key:
-                    j = seat_index_by_key[neighbor]
-                    pairs.add((i, j) if i < j else (j, i))
+            pairs.add((i, j) if i < j else (j, i))
+    return sorted(pairs)
+
+
+def _build_distance_adjacency(
+    seats: list[SeatCell],
+    distance: float,
+    *,
+    aisles: list[Aisle] | None = None,
+) -> list[tuple[int, int]]:
+    """Seat pairs whose desks are at most `distance` apart, edge to edge (centre
+    to centre for seats without a desk size), and on the same side of every
+    aisle.
+
+    Seats are bucketed in a uniform-grid spatial hash whose cells span the
+    longest reach between two adjacent desk centres, so each seat is compared
+    only with seats in its own and the neighbouring cells: O(n) for halls of
+    bounded density instead of all pairs. Scanning the same cell and the
+    four "forward" cells yields each pair once.
+    """
+    reach = distance + max(
+        (max(seat.desk_width, seat.desk_depth) for seat in seats), default=0.0
+    )
+    cell = reach if reach > 0 else 1.0
+    buckets: dict[tuple[int, int], list[int]] = {}
+    for idx, seat in enumerate(seats):
+        key = (math.floor(seat.x / cell), math.floor(seat.y / cell))
+        buckets.setdefault(key, []).append(idx)
+
+    def adjacent(a: SeatCell, b: SeatCell) -> bool:
+        gap_x = max(0.0, abs(a.x - b.x) - (a.desk_width + b.desk_width) / 2)
+        gap_y = max(0.0, abs(a.y - b.y) - (a.desk_depth + b.desk_depth) / 2)
+        if math.hypot(gap_x, gap_y) > distance:
+            return False
+        return not (aisles and _crosses_aisle(_seat_key(a), _seat_key(b), aisles))
+
+    pairs: list[tuple[int, int]] = []
+    for (cx, cy), members in buckets.items():
+        for k, i in enumerate(members):
+            for j in members[k + 1:]:
+                if adjacent(seats[i], seats[j]):
+                    pairs.append((i, j) if i < j else (j, i))
+        for dx, dy in ((1, -1), (1, 0), (1, 1), (0, 1)):
+            for i in members:
+                for j in buckets.get((cx + dx, cy + dy), ()):
+                    if adjacent(seats[i], seats[j]):
+                        pairs.append((i, j) if i < j else (j, i))
     return sorted(pairs)
 
 
+def _crosses_aisle(a: tuple[int, int], b: tuple[int, int], aisles: list[Aisle]) -> bool:
+    """Whether an aisle or partition runs between two (row, col) seats.
+
+    A column boundary separates the pair when it lies between their columns and
+    both rows fall inside its span; row boundaries mirror that.
+    """
+    for aisle in aisles:
+        if aisle.axis == "col":
+            across, along = (a[1], b[1]), (a[0], b[0])
+        else:
+            across, along = (a[0], b[0]), (a[1], b[1])
+        if not min(across) <= aisle.after < max(across):
+            continue
+        if aisle.span is None or all(aisle.span[0] <= v <= aisle.span[1] for v in along):
+            return True
+    return False
+
+
 def _select_evenly_spaced_seats(
     assignable_seats: list[SeatCell],
     needed: int,
     seed: int,
 ) -> list[SeatCell]:
-    """Pick `needed` seats spread evenly across the hall.
+    """Pick `needed` seats so the left-over empties are spread in 2-D.
 
     When seats > students, using every seat and leaving leftovers wherever
     CP-SAT finds convenient packs the top densely and dumps empties at the
-    bottom. Index-stride selection keeps skips consistent through the room.
+    bottom. Picking a stride in reading order fixes the rows but lines the
+    empties up into whole empty columns on a half-full hall.
+
+    Instead the empties are stratified: each row gets its proportional share
+    (largest remainder), and inside a row they sit at an even stride whose
+    phase advances by the golden ratio from row to row, so consecutive rows
+    interleave rather than stack (a Kronecker low-discrepancy sequence). The
+    seed shifts the starting phase. Sorting dominates: O(n log n), with no
+    collision handling since stride positions are distinct by construction.
     """
     if needed <= 0:
         return []
-    if needed >= len(assignable_seats):
+    total = len(assignable_seats)
+    if needed >= total:
         return list(assignable_seats)
 
     ordered = sorted(
         assignable_seats,
         key=lambda seat: (seat.row, seat.col, seat.seat_number),
     )
-    n = len(ordered)
-    # Phase from seed so re-solves with different seeds shift the lattice.
-    phase = seed % n
-    rotated = ordered[phase:] + ordered[:phase]
+    seat_rows: list[list[SeatCell]] = []
+    for seat in ordered:
+        if not seat_rows or seat_rows[-1][0].row != seat.row:
+            seat_rows.append([])
+        seat_rows[-1].append(seat)
+
+    empties = total - needed
+    quotas = [empties * len(row_seats) // total for row_seats in seat_rows]
+    remainders = [empties * len(row_seats) % total for row_seats in seat_rows]
+    row_count = len(seat_rows)
+    # Rows with the largest fractional share absorb the leftovers; the seed
+    # rotates which rows win ties so re-solves do not always favour the top.
+    by_remainder = sorted(
+        range(row_count),
+        key=lambda i: (-remainders[i], (i - seed) % row_count),
+    )
+    for i in by_remainder[: empties - sum(quotas)]:
+        quotas[i] += 1
 
+    # Seed 0 centres each stride cell; other seeds slide the lattice.
+    phase = (0.5 + seed * _GOLDEN_RATIO_CONJUGATE) % 1.0
     selected: list[SeatCell] = []
-    used: set[int] = set()
-    for i in range(needed):
-        # Evenly spaced indices in [0, n).
-        idx = int(round(i * (n - 1) / (needed - 1))) if needed > 1 else 0
-        if idx in used:
-            # Resolve rare rounding collisions by walking forward.
-            for delta in range(1, n):
-                cand = (idx + delta) % n
-                if cand not in used:
-                    idx = cand
-                    break
-        used.add(idx)
-        selected.append(rotated[idx])
+    for row_seats, quota in zip(seat_rows, quotas):
+        length = len(row_seats)
+        empty_positions = {
+            int((k + phase) * length / quota) for k in range(quota)
+        }
+        selected.extend(
+            seat for pos, seat in enumerate(row_seats) if pos not in empty_positions
+        )
+        phase = (phase + _GOLDEN_RATIO_CONJUGATE) % 1.0
 
     return selected
 
 
-def _prepare_problem(parsed: ParsedInput) -> dict[str, Any] | tuple[
+def _prepare_problem(parsed: SeatingProblem) -> dict[str, Any] | tuple[
     list[StudentRecord],
     list[SeatCell],
     list[tuple[int, int]],
-    dict[str, str],
+    _IdTables,
     list[dict[str, Any]],
 ]:
     """Validate seat/student data and derive movable assignment problem."""
@@ -323,25 +1109,60 @@ def _prepare_problem(parsed: ParsedInput) -> dict[str, Any] | tuple[
         parsed.strategy != STRATEGY_ZIGZAG
         and len(movable_students) < len(assignable_seats)
     ):
-        assignable_seats = _select_evenly_spaced_seats(
+        # The cached model is keyed on the selected seats: with a model cache
+        # the selection ignores the seed so re-solves share one entry.
+        selection_seed = parsed.seed if parsed.model_cache is None else 0
+        selected = _select_evenly_spaced_seats(
             assignable_seats,
             len(movable_students),
-            parsed.seed,
+            selection_seed,
         )
+        # Spacing must not cost strict separation. On a plain grid (no locked
+        # students or aisles, which the parity certificate does not model),
+        # when the selected seats have no zero-conflict parity split but the
+        # hall does, the empties are spaced within the hall's split instead.
+        # Otherwise every seat is kept when the largest class fits the hall's
+        # single-class capacity but not the selected seats'.
+        classes = list(_movable_class_counts(movable_students).items())
+        if parsed.strict_mode and parsed.adjacency_distance is None:
+            certified = None
+            if (
+                not locked_assignments
+                and not parsed.aisles
+                and parity_split(classes, [parity_groups(selected)]) is None
+            ):
+                certified = _certified_selection(assignable_seats, classes, selection_seed)
+            largest = max((size for _, size in classes), default=0)
+            if certified is not None:
+                selected = certified
+            elif conflict_free_capacity(selected) < largest <= conflict_free_capacity(
+                assignable_seats
+            ):
+                selected = assignable_seats
+        assignable_seats = selected
 
     seat_index_by_key = {_seat_key(seat): idx for idx, seat in enumerate(parsed.seats)}
     all_seat_indices = list(range(len(parsed.seats)))
-    adjacency = _build_adjacency(
-        seat_index_by_key,
-        parsed.rows,
-        parsed.cols,
-        include_diagonals=parsed.strategy != STRATEGY_ZIGZAG,
-    )
+    if parsed.adjacency_distance is not None:
+        adjacency = _build_distance_adjacency(
+            parsed.seats, parsed.adjacency_distance, aisles=parsed.aisles
+        )
+    else:
+        adjacency = _build_adjacency(
+            seat_index_by_key,
+            parsed.rows,
+            parsed.cols,
+            # 4-colour zigzag separates king-move neighbours, so keep diagonals.
+            include_diagonals=(
+                parsed.strategy != STRATEGY_ZIGZAG or parsed.zigzag_colors == 4
+            ),
+            aisles=parsed.aisles,
+        )
 
     # Adjacency uses separation_group_id (main class), not exam section id.
-    class_by_student = {
-        s.exam_student_id: s.separation_group_id for s in parsed.students
-    }
+    class_by_student = _IdTables(
+        {s.exam_student_id: s.separation_group_id for s in parsed.students}
+    )
 
     return (
         movable_students,
@@ -354,40 +1175,83 @@ def _prepare_problem(parsed: ParsedInput) -> dict[str, Any] | tuple[
     )
 
 
-def _class_at_seat_index(
-    seat_idx: int,
-    assignment_by_seat: dict[int, str],
-    class_by_student: dict[str, str],
-    locked_by_seat: dict[int, str],
-) -> str | None:
-    # locked_by_seat maps seat index -> exam_student_id
-    if seat_idx in locked_by_seat:
-        return class_by_student.get(locked_by_seat[seat_idx])
-    student_id = assignment_by_seat.get(seat_idx)
-    if student_id is None:
-        return None
-    return class_by_student[student_id]
+class _IdTables(Mapping[str, str]):
+    """Dense integer numbering of a roster's student and separation group IDs.
+
+    Students are numbered in roster order and groups in sorted ID order, so
+    sorting codes sorts the IDs. Built once when a problem is prepared; the
+    engines' inner loops index lists by these ints instead of hashing UUID
+    strings, and only the written results carry the IDs again. As a mapping
+    it still answers student ID -> group ID for per-student setup.
+    """
+
+    def __init__(self, class_by_student: Mapping[str, str]) -> None:
+        self.student_ids = list(class_by_student)
+        self.student_index = {student_id: i for i, student_id in enumerate(self.student_ids)}
+        self.class_ids = sorted(set(class_by_student.values()))
+        self.class_code = {class_id: code for code, class_id in enumerate(self.class_ids)}
+        self.code_of_student = [
+            self.class_code[class_by_student[student_id]] for student_id in self.student_ids
+        ]
+
+    def __getitem__(self, student_id: str) -> str:
+        return self.class_ids[self.code_of_student[self.student_index[student_id]]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.student_ids)
+
+    def __len__(self) -> int:
+        return len(self.student_ids)
+
+    def code(self, student_id: str) -> int:
+        """Group code of a student; -1 for an ID outside the roster."""
+        index = self.student_index.get(student_id)
+        return -1 if index is None else self.code_of_student[index]
+
+
+def _id_tables(class_by_student: Mapping[str, str]) -> _IdTables:
+    """The prepared problem's tables, or tables for a caller's plain mapping."""
+    if isinstance(class_by_student, _IdTables):
+        return class_by_student
+    return _IdTables(class_by_student)
 
 
 def _find_conflicts(
     assignment_by_seat: dict[int, str],
     adjacency: list[tuple[int, int]],
     all_seats: list[SeatCell],
-    class_by_student: dict[str, str],
+    class_by_student: Mapping[str, str],
     locked_by_seat: dict[int, str],
 ) -> tuple[int, list[dict[str, Any]]]:
+    # Group code per seat index, resolved once: each seat takes part in up to
+    # eight pairs. Locked students win over assignments (locked_by_seat maps
+    # seat index -> exam_student_id).
+    ids = _id_tables(class_by_student)
+    code_at = [-1] * len(all_seats)
+    for idx, student_id in assignment_by_seat.items():
+        code_at[idx] = ids.code(student_id)
+    for idx, student_id in locked_by_seat.items():
+        code_at[idx] = ids.code(student_id)
+    return _conflicts_by_code(code_at, adjacency, all_seats, ids.class_ids)
+
+
+def _conflicts_by_code(
+    code_at: list[int],
+    adjacency: list[tuple[int, int]],
+    all_seats: list[SeatCell],
+    class_ids: list[str],
+) -> tuple[int, list[dict[str, Any]]]:
+    """Conflicting adjacent pairs from a per-seat group code list (-1 for an
+    empty seat)."""
     conflicts: list[dict[str, Any]] = []
     for i, j in adjacency:
-        class_i = _class_at_seat_index(i, assignment_by_seat, class_by_student, locked_by_seat)
-        class_j = _class_at_seat_index(j, assignment_by_seat, class_by_student, locked_by_seat)
-        if class_i is None or class_j is None:
-            continue
-        if class_i == class_j:
+        code_i = code_at[i]
+        if code_i >= 0 and code_i == code_at[j]:
             seat_a = all_seats[i]
             seat_b = all_seats[j]
             conflicts.append(
                 {
-                    "exam_class_id": class_i,
+                    "exam_class_id": class_ids[code_i],
                     "seat_a": {
                         "row": seat_a.row,
                         "col": seat_a.col,
@@ -403,11 +1267,642 @@ def _find_conflicts(
     return len(conflicts), conflicts
 
 
+def search_worker_count(num_students: int, cap: int | None) -> int:
+    """CP-SAT search threads for a roster of `num_students`, at most `cap`."""
+    workers = DEFAULT_SEARCH_WORKERS if num_students >= 200 else 1
+    return workers if cap is None else min(workers, cap)
+
+
+class _SearchMonitor(cp_model.CpSolverSolutionCallback):
+    """Sees every CP-SAT solution: reports it to `on_solution`, then stops the
+    search once `should_stop()` is true."""
+
+    def __init__(
+        self,
+        should_stop: Callable[[], bool] | None = None,
+        on_solution: Callable[[cp_model.CpSolverSolutionCallback], None] | None = None,
+    ) -> None:
+        super().__init__()
+        self._should_stop = should_stop
+        self._on_solution = on_solution
+
+    def on_solution_callback(self) -> None:
+        if self._on_solution is not None:
+            self._on_solution(self)
+        if self._should_stop is not None and self._should_stop():
+            self.stop_search()
+
+
+class _SolveClock:
+    """Seconds from the start of a solve to its first CP-SAT solution, and
+    the time spent in each phase (prepare, plan, build, search, alternatives)."""
+
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.first_solution_seconds: float | None = None
+        self.phases: dict[str, float] = {}
+        # Cache lookups by cache name: "hit" or "miss" (the first one counts).
+        self.cache: dict[str, str] = {}
+        self._lap_started = self.started
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def lap(self, phase: str) -> None:
+        """Charge the time since the previous lap to `phase`."""
+        now = time.monotonic()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._lap_started
+        self._lap_started = now
+
+    def charge(self, phase: str, started: float) -> None:
+        """Charge the time since `started` to `phase` and leave it out of the
+        current lap, for a phase that runs between two other phases' laps."""
+        seconds = time.monotonic() - started
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+        self._lap_started += seconds
+
+    def mark_solution(self) -> None:
+        if self.first_solution_seconds is None:
+            self.first_solution_seconds = self.elapsed()
+
+
+class _DeadlineExceeded(Exception):
+    """A phase outside CP-SAT ran past the deadline (_Deadline.check)."""
+
+
+class _Deadline:
+    """One wall-clock deadline for a whole solve, shared out between phases.
+
+    Each phase takes its part of the time still left, weighed against the
+    phases that may follow it, so time an early phase does not use passes on
+    to the later ones. A reserve is held back for the constructive fallback
+    and the response.
+    """
+
+    def __init__(self, seconds: float, *, started: float | None = None) -> None:
+        self.seconds = seconds
+        self.expires = (time.monotonic() if started is None else started) + seconds
+        self.reserve = min(DEADLINE_RESERVE_SECONDS, seconds * DEADLINE_RESERVE_SHARE)
+
+    def remaining(self) -> float:
+        """Seconds phases may still use, after the reserve."""
+        return max(0.0, self.expires - self.reserve - time.monotonic())
+
+    def share(self, cap: float, *, later: float = 0.0) -> float:
+        """Budget for the next phase: at most `cap`, leaving room for phases
+        worth `later` such caps after it."""
+        return min(cap, self.remaining() / (1.0 + later))
+
+    def check(self) -> None:
+        """Raise _DeadlineExceeded once the phases have used their time, for
+        loops that are not CP-SAT searches and so have no time limit."""
+        if self.remaining() <= 0:
+            raise _DeadlineExceeded
+
+    def reserve_spent(self) -> bool:
+        """Whether fallback work has used its half of the reserve; the other
+        half is kept for writing the response."""
+        return time.monotonic() >= self.expires - self.reserve / 2
+
+
+def _deadline_seconds(problem: SeatingProblem) -> float:
+    """The contract's deadline, or the longest the phases could take before
+    there was one: strict and minimising CP-SAT, then alternatives."""
+    if problem.deadline_seconds is not None:
+        return problem.deadline_seconds
+    phases = (2.0 if problem.strict_mode else 1.0) + _alternatives_weight(problem)
+    return problem.timeout_seconds * phases + DEADLINE_RESERVE_SECONDS
+
+
+def _alternatives_weight(problem: SeatingProblem) -> float:
+    """Budget the alternatives search claims after the best layout, in
+    units of timeout_seconds."""
+    return ALTERNATIVES_BUDGET_SHARE if problem.alternatives_count else 0.0
+
+
+def _problem_fingerprint(problem: SeatingProblem) -> str:
+    """Hash of the hall, roster and mode; a checkpoint only resumes the same
+    problem."""
+    payload = problem.to_payload()
+    canonical = {key: payload[key] for key in ("map", "seats", "students", "strict_mode")}
+    return hashlib.sha256(
+        json.dumps(canonical, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    ).hexdigest()
+
+
+def _selection_fingerprint(assignable_seats: list[SeatCell]) -> str:
+    """Hash of the seats chosen for the movable students. With spare seats the
+    choice depends on the seed, and a checkpoint's layout (and its objective)
+    only carries over to the same choice."""
+    keys = sorted(_seat_key(seat) for seat in assignable_seats)
+    return hashlib.sha256(json.dumps(keys, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+class _Checkpointer:
+    """Writes the CP-SAT incumbent to `path` at most every `interval_seconds`.
+
+    The file holds the class placed on each seat (students within a class are
+    interchangeable), the objective and the best bound, and the seed and seat
+    selection they were found on, so a retry can resume with the same seed
+    (see _load_checkpoint). It is written to a
+    temporary file in the same directory and renamed over `path`, so a reader
+    never sees a partial checkpoint even if the process dies mid-write.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        interval_seconds: float,
+        fingerprint: str,
+        *,
+        seed: int,
+        selection: str,
+    ) -> None:
+        self.path = path
+        self.interval_seconds = interval_seconds
+        self.fingerprint = fingerprint
+        self.seed = seed
+        self.selection = selection
+        self.writes = 0
+        self._last_write = time.monotonic()
+
+    def due(self) -> bool:
+        return time.monotonic() - self._last_write >= self.interval_seconds
+
+    def write(
+        self,
+        *,
+        phase: str,
+        objective: float,
+        bound: float,
+        classes_by_seat: dict[tuple[int, int], str],
+    ) -> None:
+        data = {
+            "kind": CHECKPOINT_KIND,
+            "contract_version": CONTRACT_VERSION,
+            "fingerprint": self.fingerprint,
+            "seed": self.seed,
+            "selection": self.selection,
+            "phase": phase,
+            "objective": int(round(objective)),
+            "bound": int(math.ceil(bound - 1e-6)),
+            "seats": [
+                [row, col, class_id] for (row, col), class_id in sorted(classes_by_seat.items())
+            ],
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(data, handle, separators=(",", ":"))
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, self.path)
+        self.writes += 1
+        self._last_write = time.monotonic()
+
+
+def _load_checkpoint(
+    path: str, fingerprint: str, selection: str
+) -> tuple[dict[str, Any] | None, str]:
+    """Checkpoint data, or None with the reason it cannot be resumed. A
+    checkpoint taken on other seats (a different seed with spare seats) is
+    refused: its layout does not fit them and its objective bounds nothing."""
+    try:
+        with open(path, encoding="utf-8") as handle:
+            data = json.load(handle)
+    except FileNotFoundError:
+        return None, "no checkpoint file"
+    except (OSError, ValueError) as exc:
+        return None, f"unreadable checkpoint: {exc}"
+    if not isinstance(data, dict) or data.get("kind") != CHECKPOINT_KIND:
+        return None, "not a seating checkpoint"
+    if data.get("fingerprint") != fingerprint:
+        return None, "checkpoint belongs to a different hall or roster"
+    if data.get("selection") != selection:
+        return None, f"checkpoint used a different seat selection (seed {data.get('seed')})"
+    return data, "resumed"
+
+
+@dataclass
+class _ClassModel:
+    """A class-level CP-SAT model and the variables the solve reads back:
+    y[pos, code] (seat `pos` holds class `code`) and the conflict literals."""
+
+    model: cp_model.CpModel
+    y: dict[tuple[int, int], cp_model.IntVar]
+    conflict_vars: list[cp_model.IntVar]
+
+
+# key -> (serialised CpModelProto, y indices in (pos, code) order, conflict indices)
+_MODEL_CACHE: dict[str, tuple[bytes, list[int], list[int]]] = {}
+_MODEL_CACHE_SALT: list[str] = []
+
+
+def _model_cache_key(structure: dict[str, Any]) -> str:
+    """Hash of everything the model is built from. The solver's own source is
+    part of it, so a changed model never loads from an older cache."""
+    if not _MODEL_CACHE_SALT:
+        with open(__file__, "rb") as handle:
+            _MODEL_CACHE_SALT.append(hashlib.sha256(handle.read()).hexdigest())
+    canonical = json.dumps(structure, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256((_MODEL_CACHE_SALT[0] + canonical).encode("utf-8")).hexdigest()
+
+
+def _load_class_model(
+    key: str,
+    directory: str | None,
+    y_keys: list[tuple[int, int]],
+) -> _ClassModel | None:
+    """The cached model for `key` from this process or `directory`, else None."""
+    entry = _MODEL_CACHE.pop(key, None)
+    if entry is None and directory is not None:
+        path = os.path.join(directory, f"{key}.model")
+        try:
+            with open(path, "rb") as handle:
+                header, _, data = handle.read().partition(b"\n")
+            # Pruning drops the least recently used files first.
+            os.utime(path)
+            meta = json.loads(header)
+            if meta.get("kind") == MODEL_CACHE_KIND:
+                entry = (data, meta["y"], meta["conflicts"])
+        except (OSError, ValueError, KeyError):
+            entry = None
+    if entry is None or len(entry[1]) != len(y_keys):
+        return None
+    _remember_model(key, entry)
+    data, y_indices, conflict_indices = entry
+    parsed = cp_model.CpModel()
+    parsed.proto.ParseFromString(data)
+    # clone() rebuilds the Python variable handles over the parsed proto.
+    model = parsed.clone()
+    return _ClassModel(
+        model=model,
+        y={
+            y_key: model.get_bool_var_from_proto_index(index)
+            for y_key, index in zip(y_keys, y_indices)
+        },
+        conflict_vars=[model.get_bool_var_from_proto_index(index) for index in conflict_indices],
+    )
+
+
+def _remember_model(key: str, entry: tuple[bytes, list[int], list[int]]) -> None:
+    _MODEL_CACHE[key] = entry
+    total = sum(len(data) for data, _, _ in _MODEL_CACHE.values())
+    while total > MODEL_CACHE_MAX_BYTES and len(_MODEL_CACHE) > 1:
+        oldest = next(iter(_MODEL_CACHE))
+        total -= len(_MODEL_CACHE.pop(oldest)[0])
+
+
+def _store_class_model(
+    key: str,
+    directory: str | None,
+    built: _ClassModel,
+    y_keys: list[tuple[int, int]],
+) -> None:
+    data = built.model.proto.SerializeToString()
+    y_indices = [built.y[y_key].index for y_key in y_keys]
+    conflict_indices = [var.index for var in built.conflict_vars]
+    _remember_model(key, (data, y_indices, conflict_indices))
+    if directory is None:
+        return
+    header = json.dumps(
+        {"kind": MODEL_CACHE_KIND, "y": y_indices, "conflicts": conflict_indices},
+        separators=(",", ":"),
+    )
+    path = os.path.join(directory, f"{key}.model")
+    try:
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as handle:
+            handle.write(header.encode("utf-8") + b"\n" + data)
+        os.replace(tmp_path, path)
+        _prune_model_directory(directory, keep=path)
+    except OSError:
+        pass  # the cache only saves build time; the solve goes on without it
+
+
+def _prune_model_directory(directory: str, *, keep: str) -> None:
+    """Delete the least recently used models, other than `keep`, until the
+    directory fits MODEL_CACHE_DIR_MAX_BYTES."""
+    files = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith(".model") and entry.path != keep:
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue  # removed by a concurrent prune
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+    total = os.path.getsize(keep) + sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= MODEL_CACHE_DIR_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+
+
+def _interchangeable_class_groups(
+    codes: list[int],
+    movable_count: dict[int, int],
+    locked_codes: set[int],
+) -> list[list[int]]:
+    """Classes the model cannot tell apart: same movable count, no locked
+    member. Every adjacency constraint treats codes alike, so any permutation
+    within a group maps solutions to solutions with the same objective."""
+    by_count: dict[int, list[int]] = {}
+    for code in codes:
+        if code not in locked_codes and movable_count.get(code, 0) > 0:
+            by_count.setdefault(movable_count[code], []).append(code)
+    return [group for _, group in sorted(by_count.items()) if len(group) > 1]
+
+
+def _add_class_precedence(
+    model: cp_model.CpModel,
+    y: dict[tuple[int, int], cp_model.IntVar],
+    num_seats: int,
+    group: list[int],
+) -> None:
+    """Value precedence: class group[k + 1] may take a seat only after
+    group[k] has taken an earlier one, so the classes appear in order of
+    their first seat (one representative per permutation of the group)."""
+    for earlier, later in zip(group, group[1:]):
+        model.add(y[(0, later)] == 0)
+        seen_prev = y[(0, earlier)]
+        for pos in range(1, num_seats):
+            # seen_prev == 1 iff `earlier` holds some seat before `pos`.
+            model.add(y[(pos, later)] <= seen_prev)
+            if pos == num_seats - 1:
+                break
+            seen = model.new_bool_var(f"seen_{earlier}_{pos}")
+            model.add_max_equality(seen, [seen_prev, y[(pos, earlier)]])
+            seen_prev = seen
+
+
+def _mirror_symmetric(
+    all_seats: list[SeatCell],
+    pos_by_global: dict[int, int],
+    locked_by_seat: dict[int, str],
+    class_by_student: Mapping[str, str],
+    adjacency: list[tuple[int, int]],
+) -> bool:
+    """True if reflecting the hall left-right maps free seats to free seats,
+    locked seats to locked seats of the same class, and adjacent pairs to
+    adjacent pairs (desk geometry and aisles need not be symmetric)."""
+    def kind(idx: int) -> tuple[str, str | None]:
+        if idx in pos_by_global:
+            return ("free", None)
+        if idx in locked_by_seat:
+            return ("locked", class_by_student.get(locked_by_seat[idx]))
+        return ("blocked", None)
+
+    index_by_key = {_seat_key(seat): idx for idx, seat in enumerate(all_seats)}
+    axis = min(seat.col for seat in all_seats) + max(seat.col for seat in all_seats)
+    mirror_of: dict[int, int] = {}
+    for idx, seat in enumerate(all_seats):
+        mirror = index_by_key.get((seat.row, axis - seat.col))
+        if mirror is None or kind(mirror) != kind(idx):
+            return False
+        mirror_of[idx] = mirror
+    pairs = set(adjacency)
+    return all(
+        (min(mirror_of[a], mirror_of[b]), max(mirror_of[a], mirror_of[b])) in pairs
+        for a, b in adjacency
+    )
+
+
+def _add_mirror_breaking(
+    model: cp_model.CpModel,
+    y: dict[tuple[int, int], cp_model.IntVar],
+    assignable_seats: list[SeatCell],
+    codes: list[int],
+    distinguished: int | None,
+) -> None:
+    """Keep the layout whose left half holds no more of a statistic than its
+    right half. The statistic (seats of a class outside every precedence
+    group, else occupied seats) is unchanged by class permutations, so this
+    composes with _add_class_precedence."""
+    axis = min(seat.col for seat in assignable_seats) + max(seat.col for seat in assignable_seats)
+
+    def weight(pos: int) -> Any:
+        if distinguished is not None:
+            return y[(pos, distinguished)]
+        return sum(y[(pos, code)] for code in codes)
+
+    left = [pos for pos, seat in enumerate(assignable_seats) if 2 * seat.col < axis]
+    right = [pos for pos, seat in enumerate(assignable_seats) if 2 * seat.col > axis]
+    model.add(sum(weight(pos) for pos in left) <= sum(weight(pos) for pos in right))
+
+
+def _default_encoding(num_seats: int, num_classes: int, *, strict: bool) -> str:
+    """Encoding chosen by `auto`, from seating_benchmark.py runs per size bucket.
+
+    The pairwise boolean model stays fastest for small halls and for few
+    classes, where the minimising search runs to its budget and the boolean
+    model ends with fewer conflicts. Above ~10k seat x class literals strict
+    solves gain from the 2x2 block cliques (1,295 seats, 12 classes: 2.8 s
+    against 3.8 s) and minimisation from one integer disequality per pair
+    (13.9 s against 18.7 s).
+    """
+    if num_seats * num_classes < AUTO_ENCODING_MIN_TERMS:
+        return ENCODING_BOOLEAN
+    return ENCODING_CLIQUE if strict else ENCODING_INTEGER
+
+
+def _block_cliques(
+    assignable_seats: list[SeatCell],
+    adjacent_positions: set[tuple[int, int]],
+) -> list[list[int]]:
+    """2x2 seat blocks whose assignable seats are pairwise adjacent, skipping
+    blocks whose pairs earlier blocks already cover."""
+    pos_by_key = {_seat_key(seat): pos for pos, seat in enumerate(assignable_seats)}
+    cliques = []
+    covered: set[tuple[int, int]] = set()
+    for row, col in pos_by_key:
+        block = [
+            pos_by_key[key]
+            for key in ((row, col), (row, col + 1), (row + 1, col), (row + 1, col + 1))
+            if key in pos_by_key
+        ]
+        pairs = {(min(a, b), max(a, b)) for i, a in enumerate(block) for b in block[i + 1 :]}
+        if pairs and pairs <= adjacent_positions and not pairs <= covered:
+            cliques.append(block)
+            covered |= pairs
+    return cliques
+
+
+def _build_class_model(
+    assignable_seats: list[SeatCell],
+    adjacency: list[tuple[int, int]],
+    all_seats: list[SeatCell],
+    pos_by_global: dict[int, int],
+    locked_by_seat: dict[int, str],
+    class_by_student: Mapping[str, str],
+    class_to_code: dict[str, int],
+    movable_count: dict[int, int],
+    *,
+    strict: bool,
+    encoding: str,
+    symmetry: str,
+    max_conflicts: int | None,
+    deadline: _Deadline | None = None,
+) -> _ClassModel:
+    """The class-level model of one seating phase, before hints and cuts.
+
+    The constraint families that grow with seats x classes (one per seat,
+    adjacent pair or block and class) go straight into the CpModelProto as
+    literal indices: the Python expression wrapper costs about six times as
+    much per constraint (`seating_benchmark.py --build`). The per-class and
+    symmetry constraints keep using the wrapper.
+    """
+    model = cp_model.CpModel()
+    constraints = model.proto.constraints
+    codes = list(class_to_code.values())
+    num_seats = len(assignable_seats)
+
+    y: dict[tuple[int, int], cp_model.IntVar] = {}
+    # Integer encoding: x[pos] is the class code at the seat (0 = empty) and
+    # empty[pos] the literal x[pos] == 0; y literals are channelled to x.
+    x: dict[int, cp_model.IntVar] = {}
+    empty: dict[int, cp_model.IntVar] = {}
+    for pos in range(num_seats):
+        if encoding == ENCODING_INTEGER:
+            x[pos] = model.new_int_var(0, len(codes), f"x_{pos}")
+            empty[pos] = model.new_bool_var(f"empty_{pos}")
+            for code in codes:
+                y[(pos, code)] = model.new_bool_var(f"y_{pos}_{code}")
+            model.add_map_domain(x[pos], [empty[pos], *(y[(pos, code)] for code in codes)])
+            continue
+        for code in codes:
+            y[(pos, code)] = model.new_bool_var(f"y_{pos}_{code}")
+        # Each seat holds at most one class (empty seats allowed when seats > students).
+        constraints.add().at_most_one.literals.extend(y[(pos, code)].index for code in codes)
+    # Literal index of y[pos, code]; -index - 1 is its negation.
+    lit = {key: var.index for key, var in y.items()}
+
+    covered_pairs: set[tuple[int, int]] = set()
+    if encoding == ENCODING_CLIQUE:
+        adjacent_positions = {
+            (min(pos_by_global[a], pos_by_global[b]), max(pos_by_global[a], pos_by_global[b]))
+            for a, b in adjacency
+            if a in pos_by_global and b in pos_by_global
+        }
+        for block in _block_cliques(assignable_seats, adjacent_positions):
+            for code in codes:
+                constraints.add().at_most_one.literals.extend(lit[(pos, code)] for pos in block)
+            covered_pairs.update(
+                (min(a, b), max(a, b)) for i, a in enumerate(block) for b in block[i + 1 :]
+            )
+
+    # Each class occupies exactly as many assignable seats as it has movable
+    # students (none for classes present only on locked seats).
+    for code in codes:
+        linear = constraints.add().linear
+        linear.vars.extend(lit[(pos, code)] for pos in range(num_seats))
+        linear.coeffs.extend([1] * num_seats)
+        linear.domain.extend([movable_count.get(code, 0)] * 2)
+
+    conflict_vars: list[cp_model.IntVar] = []
+
+    for pair_index, (adj_a, adj_b) in enumerate(adjacency):
+        if deadline is not None and pair_index % BUILD_DEADLINE_CHECK_PAIRS == 0:
+            deadline.check()
+        a_assign = adj_a in pos_by_global
+        b_assign = adj_b in pos_by_global
+        if not a_assign and not b_assign:
+            continue
+
+        if a_assign and b_assign:
+            pos_a = pos_by_global[adj_a]
+            pos_b = pos_by_global[adj_b]
+            if encoding == ENCODING_INTEGER:
+                # An occupied seat's class differs from its neighbour's (an
+                # empty neighbour is 0, never a class code): x_a - x_b != 0.
+                different = constraints.add()
+                different.enforcement_literal.append(-empty[pos_a].index - 1)
+                if not strict:
+                    conflict = model.new_bool_var(f"conflict_{adj_a}_{adj_b}")
+                    different.enforcement_literal.append(-conflict.index - 1)
+                    conflict_vars.append(conflict)
+                different.linear.vars.extend((x[pos_a].index, x[pos_b].index))
+                different.linear.coeffs.extend((1, -1))
+                different.linear.domain.extend((cp_model.INT_MIN, -1, 1, cp_model.INT_MAX))
+            elif strict:
+                if (min(pos_a, pos_b), max(pos_a, pos_b)) in covered_pairs:
+                    continue
+                # Two adjacent seats may not share any class.
+                for code in codes:
+                    constraints.add().at_most_one.literals.extend(
+                        (lit[(pos_a, code)], lit[(pos_b, code)])
+                    )
+            else:
+                conflict = model.new_bool_var(f"conflict_{adj_a}_{adj_b}")
+                for code in codes:
+                    # conflict is forced to 1 iff both seats hold the same class:
+                    # conflict or not y_a or not y_b.
+                    constraints.add().bool_or.literals.extend(
+                        (conflict.index, -lit[(pos_a, code)] - 1, -lit[(pos_b, code)] - 1)
+                    )
+                conflict_vars.append(conflict)
+            continue
+
+        # One seat locked, one assignable: keep the assignable seat off the
+        # locked neighbour's class.
+        if a_assign:
+            locked_student_id = locked_by_seat.get(adj_b)
+            assignable_pos = pos_by_global[adj_a]
+        else:
+            locked_student_id = locked_by_seat.get(adj_a)
+            assignable_pos = pos_by_global[adj_b]
+
+        if locked_student_id is None:
+            continue
+        locked_class_id = class_by_student.get(locked_student_id)
+        if locked_class_id is None or locked_class_id not in class_to_code:
+            continue
+        locked_code = class_to_code[locked_class_id]
+        if strict:
+            model.add(y[(assignable_pos, locked_code)] == 0)
+        else:
+            conflict_vars.append(y[(assignable_pos, locked_code)])
+
+    if max_conflicts is not None:
+        # Any layout under the ceiling will do: a satisfaction search stops
+        # at its first solution.
+        if conflict_vars:
+            model.add(sum(conflict_vars) <= max_conflicts)
+    elif not strict and conflict_vars:
+        model.minimize(sum(conflict_vars))
+
+    if symmetry != SYMMETRY_NONE:
+        locked_codes = {
+            class_to_code[class_by_student[student_id]]
+            for student_id in locked_by_seat.values()
+            if class_by_student.get(student_id) in class_to_code
+        }
+        groups = _interchangeable_class_groups(codes, movable_count, locked_codes)
+        for group in groups:
+            _add_class_precedence(model, y, num_seats, group)
+        if symmetry == SYMMETRY_FULL and _mirror_symmetric(
+            all_seats, pos_by_global, locked_by_seat, class_by_student, adjacency
+        ):
+            grouped = {code for group in groups for code in group}
+            distinguished = max(
+                (code for code in codes if code not in grouped and movable_count.get(code)),
+                key=lambda code: (movable_count.get(code, 0), -code),
+                default=None,
+            )
+            _add_mirror_breaking(model, y, assignable_seats, codes, distinguished)
+    return _ClassModel(model=model, y=y, conflict_vars=conflict_vars)
+
+
 def _solve_assignment(
     movable_students: list[StudentRecord],
     assignable_seats: list[SeatCell],
     adjacency: list[tuple[int, int]],
-    class_by_student: dict[str, str],
+    class_by_student: Mapping[str, str],
     locked_assignments: list[dict[str, Any]],
     all_seats: list[SeatCell],
     all_seat_indices: list[int],
@@ -415,16 +1910,32 @@ def _solve_assignment(
     strict: bool,
     seed: int,
     timeout_seconds: float,
+    search_workers: int | None = None,
+    should_stop: Callable[[], bool] | None = None,
+    checkpoint: _Checkpointer | None = None,
+    resume: dict[str, Any] | None = None,
+    clock: _SolveClock | None = None,
+    symmetry: str = SYMMETRY_CLASSES,
+    encoding: str = ENCODING_AUTO,
+    hint: dict[tuple[int, int], str] | None = None,
+    avoid: list[dict[tuple[int, int], str]] | None = None,
+    min_distance: int = 0,
+    max_conflicts: int | None = None,
+    deadline: _Deadline | None = None,
+    cache_model: bool = False,
+    model_cache: str | None = None,
 ) -> dict[str, Any]:
+    """Seat the movable students with the class-level CP-SAT model. With
+    `cache_model` the built model is kept for later solves of the same hall
+    shape and class profile, in this process and in the `model_cache`
+    directory when given."""
+    seat_index_by_key = {_seat_key(seat): idx for idx, seat in enumerate(all_seats)}
+    locked_by_seat: dict[int, str] = {
+        seat_index_by_key[(item["row"], item["col"])]: item["exam_student_id"]
+        for item in locked_assignments
+    }
+
     if not movable_students:
-        locked_by_seat = {
-            next(
-                idx
-                for idx, seat in enumerate(all_seats)
-                if seat.row == item["row"] and seat.col == item["col"]
-            ): item["exam_student_id"]
-            for item in locked_assignments
-        }
         conflict_count, conflict_pairs = _find_conflicts(
             {},
             adjacency,
@@ -455,112 +1966,206 @@ def _solve_assignment(
             "conflicts_count": conflict_count,
         }
 
-    seat_index_by_key = {_seat_key(seat): idx for idx, seat in enumerate(all_seats)}
     assignable_indices = [seat_index_by_key[_seat_key(seat)] for seat in assignable_seats]
     pos_by_global = {global_idx: pos for pos, global_idx in enumerate(assignable_indices)}
     num_students = len(movable_students)
     num_seats = len(assignable_seats)
 
-    locked_by_seat: dict[int, str] = {}
-    for item in locked_assignments:
-        idx = next(
-            i
-            for i, seat in enumerate(all_seats)
-            if seat.row == item["row"] and seat.col == item["col"]
-        )
-        locked_by_seat[idx] = item["exam_student_id"]
-
     # Lightweight class-level model. Students within a class are interchangeable
     # for adjacency, so we only decide *which class* (if any) occupies each
     # assignable seat: y[pos, code] == 1  ⇔  seat `pos` holds a student of class
     # `code`. This keeps the model small (seats × classes booleans) and solves
     # 1000+ seat halls to proven-optimal in seconds — the previous per-student
     # add_element / add_all_different formulation timed out above ~250 students.
-    model = cp_model.CpModel()
-
+    movable_by_class: dict[str, int] = {}
+    for student in movable_students:
+        group = student.separation_group_id
+        movable_by_class[group] = movable_by_class.get(group, 0) + 1
+    locked_seats_by_class: dict[str, list[int]] = {}
+    for seat_idx, student_id in sorted(locked_by_seat.items()):
+        if student_id in class_by_student:
+            locked_seats_by_class.setdefault(class_by_student[student_id], []).append(seat_idx)
+    # Codes follow the class-size profile (then locked seats), not the IDs, so
+    # rosters that differ only in student and class identities build the same
+    # model and share its cache entry.
     class_ids = sorted(
-        {
-            *(student.separation_group_id for student in movable_students),
-            *(
-                class_by_student[student_id]
-                for student_id in locked_by_seat.values()
-                if student_id in class_by_student
-            ),
-        }
+        {*movable_by_class, *locked_seats_by_class},
+        key=lambda class_id: (
+            -movable_by_class.get(class_id, 0),
+            locked_seats_by_class.get(class_id, []),
+            class_id,
+        ),
     )
     class_to_code = {class_id: index + 1 for index, class_id in enumerate(class_ids)}
     codes = list(class_to_code.values())
+    movable_count = {
+        class_to_code[class_id]: count for class_id, count in movable_by_class.items()
+    }
 
-    movable_count: dict[int, int] = {}
-    for student in movable_students:
-        code = class_to_code[student.separation_group_id]
-        movable_count[code] = movable_count.get(code, 0) + 1
-
-    y: dict[tuple[int, int], cp_model.IntVar] = {}
-    for pos in range(num_seats):
-        for code in codes:
-            y[(pos, code)] = model.new_bool_var(f"y_{pos}_{code}")
-        # Each seat holds at most one class (empty seats allowed when seats > students).
-        model.add(sum(y[(pos, code)] for code in codes) <= 1)
-
-    # Each class occupies exactly as many assignable seats as it has movable students.
-    for code, count in movable_count.items():
-        model.add(sum(y[(pos, code)] for pos in range(num_seats)) == count)
-
-    conflict_vars: list[cp_model.IntVar] = []
+    if encoding == ENCODING_AUTO:
+        encoding = _default_encoding(num_seats, len(codes), strict=strict)
+    if encoding == ENCODING_CLIQUE and not strict:
+        encoding = ENCODING_BOOLEAN
+    # Resumed and hinted runs keep the hinted layout reachable, and cuts make
+    # the classes distinguishable: skip symmetry breaking, which could cut
+    # off the hint or every remaining layout.
+    if resume is not None:
+        hint = {(row, col): class_id for row, col, class_id in resume["seats"]}
+    if hint is not None or avoid:
+        symmetry = SYMMETRY_NONE
+
+    build_started = time.monotonic()
+    locked_codes_by_seat = {
+        seat_idx: class_to_code[class_id]
+        for class_id, seat_indices in locked_seats_by_class.items()
+        for seat_idx in seat_indices
+    }
+    y_keys = [(pos, code) for pos in range(num_seats) for code in codes]
+    key = None
+    built = None
+    if cache_model:
+        key = _model_cache_key(
+            {
+                "strict": strict,
+                "encoding": encoding,
+                "symmetry": symmetry,
+                "max_conflicts": max_conflicts,
+                # Per seat: free (-1), blocked (0) or the locked student's code.
+                "seats": [
+                    [seat.row, seat.col, locked_codes_by_seat.get(idx, -(idx in pos_by_global))]
+                    for idx, seat in enumerate(all_seats)
+                ],
+                "assignable": assignable_indices,
+                "adjacency": adjacency,
+                "counts": [movable_count.get(code, 0) for code in codes],
+            }
+        )
+        built = _load_class_model(key, model_cache, y_keys)
+        if clock is not None:
+            clock.cache.setdefault("model", "miss" if built is None else "hit")
+    if built is None:
+        try:
+            built = _build_class_model(
+                assignable_seats,
+                adjacency,
+                all_seats,
+                pos_by_global,
+                locked_by_seat,
+                class_by_student,
+                class_to_code,
+                movable_count,
+                strict=strict,
+                encoding=encoding,
+                symmetry=symmetry,
+                max_conflicts=max_conflicts,
+                deadline=deadline,
+            )
+        except _DeadlineExceeded:
+            return {
+                "contract_version": CONTRACT_VERSION,
+                "status": "timeout",
+                "strict_mode": strict,
+                "mode_used": "strict" if strict else "fallback",
+                "message": "Deadline reached while building the model",
+                "assignments": locked_assignments,
+                "conflict_pairs": [],
+                "conflicts_count": 0,
+            }
+        if key is not None:
+            _store_class_model(key, model_cache, built, y_keys)
+    model, y, conflict_vars = built.model, built.y, built.conflict_vars
+    if clock is not None:
+        # The last lap may be a cascade phase ago; strict's search is not build.
+        clock.charge("build", build_started)
+
+    # No-good cuts: keep at most len(kept) - min_distance seats on the class
+    # an earlier layout gave them.
+    for layout in avoid or ():
+        kept = [
+            y[(pos, class_to_code[layout[_seat_key(seat)]])]
+            for pos, seat in enumerate(assignable_seats)
+            if layout.get(_seat_key(seat)) in class_to_code
+        ]
+        model.add(sum(kept) <= len(kept) - min_distance)
+
+    if hint is not None:
+        # Start from a checkpoint of this exact problem or a heuristic layout.
+        hinted = [class_to_code.get(hint.get(_seat_key(seat), "")) for seat in assignable_seats]
+        model.proto.solution_hint.vars.extend(y[key].index for key in y_keys)
+        model.proto.solution_hint.values.extend(
+            int(hinted[pos] == code) for pos, code in y_keys
+        )
+    if resume is not None and resume["phase"] != "strict" and not strict and conflict_vars:
+        # The checkpointed layout is complete on these seats, so its conflict
+        # count bounds the optimum. A strict checkpoint records no objective
+        # (0) and only serves as a hint.
+        model.add(sum(conflict_vars) <= resume["objective"])
+
+    phase = "strict" if strict else "fallback"
+    y_indices = [y[key].index for key in y_keys]
+
+    def codes_at_positions(response: Any) -> dict[int, int]:
+        """Class code per occupied seat, read off the response's solution
+        vector in one call rather than one value lookup per literal."""
+        values = response.solution
+        return {
+            pos: code for (pos, code), index in zip(y_keys, y_indices) if values[index]
+        }
 
-    for adj_a, adj_b in adjacency:
-        a_assign = adj_a in pos_by_global
-        b_assign = adj_b in pos_by_global
-        if not a_assign and not b_assign:
-            continue
+    def save_incumbent(response: Any, objective: float, bound: float) -> None:
+        classes_by_seat = {
+            _seat_key(assignable_seats[pos]): class_ids[code - 1]
+            for pos, code in codes_at_positions(response).items()
+        }
+        checkpoint.write(
+            phase=phase, objective=objective, bound=bound, classes_by_seat=classes_by_seat
+        )
 
-        if a_assign and b_assign:
-            pos_a = pos_by_global[adj_a]
-            pos_b = pos_by_global[adj_b]
+    def on_solution(callback: cp_model.CpSolverSolutionCallback) -> None:
+        if clock is not None:
+            clock.mark_solution()
+        if checkpoint is not None and checkpoint.due():
             if strict:
-                # Two adjacent seats may not share any class.
-                for code in codes:
-                    model.add(y[(pos_a, code)] + y[(pos_b, code)] <= 1)
+                save_incumbent(callback.response_proto, 0, 0)
             else:
-                conflict = model.new_bool_var(f"conflict_{adj_a}_{adj_b}")
-                for code in codes:
-                    # conflict is forced to 1 iff both seats hold the same class.
-                    model.add(conflict >= y[(pos_a, code)] + y[(pos_b, code)] - 1)
-                conflict_vars.append(conflict)
-            continue
-
-        # One seat locked, one assignable: keep the assignable seat off the
-        # locked neighbour's class.
-        if a_assign:
-            locked_student_id = locked_by_seat.get(adj_b)
-            assignable_pos = pos_by_global[adj_a]
-        else:
-            locked_student_id = locked_by_seat.get(adj_a)
-            assignable_pos = pos_by_global[adj_b]
-
-        if locked_student_id is None:
-            continue
-        locked_class_id = class_by_student.get(locked_student_id)
-        if locked_class_id is None or locked_class_id not in class_to_code:
-            continue
-        locked_code = class_to_code[locked_class_id]
-        if strict:
-            model.add(y[(assignable_pos, locked_code)] == 0)
-        else:
-            conflict_vars.append(y[(assignable_pos, locked_code)])
-
-    if not strict and conflict_vars:
-        model.minimize(sum(conflict_vars))
+                save_incumbent(
+                    callback.response_proto,
+                    callback.objective_value,
+                    callback.best_objective_bound,
+                )
 
     solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = timeout_seconds
+    # Model building came out of this phase's share of the deadline.
+    solver.parameters.max_time_in_seconds = (
+        timeout_seconds if deadline is None else min(timeout_seconds, deadline.remaining())
+    )
     solver.parameters.random_seed = seed
+    if avoid and hint is not None:
+        solver.parameters.repair_hint = True
     # Parallel search helps large maps; small maps stay single-worker so output
-    # is reproducible for the same seed.
-    solver.parameters.num_search_workers = 8 if num_students >= 200 else 1
+    # is reproducible for the same seed. Batch callers cap the thread count so
+    # concurrent problems do not oversubscribe the machine.
+    solver.parameters.num_search_workers = search_worker_count(
+        num_students, search_workers
+    )
+
+    if should_stop is not None or checkpoint is not None or clock is not None:
+        status_code = solver.solve(
+            model,
+            _SearchMonitor(
+                should_stop=should_stop,
+                on_solution=on_solution if checkpoint is not None or clock is not None else None,
+            ),
+        )
+    else:
+        status_code = solver.solve(model)
 
-    status_code = solver.solve(model)
+    response = solver.response_proto
+    if checkpoint is not None and status_code in {cp_model.OPTIMAL, cp_model.FEASIBLE}:
+        if strict or not conflict_vars:
+            save_incumbent(response, 0, 0)
+        else:
+            save_incumbent(response, solver.objective_value, solver.best_objective_bound)
 
     if status_code == cp_model.INFEASIBLE:
         return {
@@ -589,12 +2194,7 @@ def _solve_assignment(
     cp_status = "optimal" if status_code == cp_model.OPTIMAL else "feasible"
 
     # Recover which class landed in each assignable seat.
-    code_at_pos: dict[int, int] = {}
-    for pos in range(num_seats):
-        for code in codes:
-            if solver.value(y[(pos, code)]) == 1:
-                code_at_pos[pos] = code
-                break
+    code_at_pos = codes_at_positions(response)
 
     positions_by_code: dict[int, list[int]] = {}
     for pos, code in code_at_pos.items():
@@ -661,37 +2261,41 @@ def _constructive_assign(
     movable_students: list[StudentRecord],
     assignable_seats: list[SeatCell],
     adjacency: list[tuple[int, int]],
-    class_by_student: dict[str, str],
+    class_by_student: Mapping[str, str],
     locked_assignments: list[dict[str, Any]],
     all_seats: list[SeatCell],
     *,
     seed: int,
     prefer_zero_conflicts: bool,
+    deadline: _Deadline | None = None,
 ) -> dict[str, Any]:
-    """Fast deterministic seating for large exams (seconds, not minutes)."""
+    """Fast deterministic seating for large exams (seconds, not minutes).
+
+    Runs in the deadline's reserve: once its share is spent, the remaining
+    students take the next free seats without probing for conflict-free ones.
+    """
     seat_index_by_key = {_seat_key(seat): idx for idx, seat in enumerate(all_seats)}
     assignable_indices = [seat_index_by_key[_seat_key(seat)] for seat in assignable_seats]
     neighbors = _neighbor_globals(adjacency)
+    ids = _id_tables(class_by_student)
 
-    locked_by_seat: dict[int, str] = {}
-    occupied_class: dict[int, str] = {}
+    # Group code per seat index (-1 empty).
+    occupied_code = [-1] * len(all_seats)
     for item in locked_assignments:
-        idx = seat_index_by_key[(item["row"], item["col"])]
-        student_id = item["exam_student_id"]
-        locked_by_seat[idx] = student_id
-        occupied_class[idx] = class_by_student.get(
-            student_id, str(item.get("exam_class_id", ""))
+        occupied_code[seat_index_by_key[(item["row"], item["col"])]] = ids.code(
+            item["exam_student_id"]
         )
 
     # Round-robin by separation group keeps same main-class students spaced.
-    by_class: dict[str, list[StudentRecord]] = {}
+    by_class: dict[int, list[tuple[StudentRecord, int]]] = {}
     for student in movable_students:
-        by_class.setdefault(student.separation_group_id, []).append(student)
+        code = ids.code(student.exam_student_id)
+        by_class.setdefault(code, []).append((student, code))
 
     class_order = sorted(by_class.keys())
     # Stable shuffle of class order from seed for variety without randomness drift.
     rotated = class_order[seed % len(class_order) :] + class_order[: seed % len(class_order)]
-    interleaved: list[StudentRecord] = []
+    interleaved: list[tuple[StudentRecord, int]] = []
     queues = {cid: list(by_class[cid]) for cid in rotated}
     while any(queues.values()):
         for cid in rotated:
@@ -709,30 +2313,38 @@ def _constructive_assign(
         ),
     )
 
-    assignment_by_seat: dict[int, str] = {}
+    placed: list[tuple[int, StudentRecord]] = []
     used_positions: set[int] = set()
 
-    def seat_conflicts(global_idx: int, class_id: str) -> bool:
+    def seat_conflicts(global_idx: int, code: int) -> bool:
         for neighbor in neighbors.get(global_idx, []):
-            if occupied_class.get(neighbor) == class_id:
+            if occupied_code[neighbor] == code:
                 return True
         return False
 
-    for student in interleaved:
+    # ordered_positions[first_free:] holds every unused position.
+    first_free = 0
+    probe = prefer_zero_conflicts
+    for student, code in interleaved:
+        if probe and deadline is not None and deadline.reserve_spent():
+            probe = False
         chosen_pos: int | None = None
-        if prefer_zero_conflicts:
-            for pos in ordered_positions:
+        if probe:
+            for k in range(first_free, len(ordered_positions)):
+                pos = ordered_positions[k]
                 if pos in used_positions:
                     continue
                 global_idx = assignable_indices[pos]
-                if not seat_conflicts(global_idx, student.separation_group_id):
+                if not seat_conflicts(global_idx, code):
                     chosen_pos = pos
                     break
         if chosen_pos is None:
-            for pos in ordered_positions:
-                if pos not in used_positions:
-                    chosen_pos = pos
-                    break
+            while first_free < len(ordered_positions) and (
+                ordered_positions[first_free] in used_positions
+            ):
+                first_free += 1
+            if first_free < len(ordered_positions):
+                chosen_pos = ordered_positions[first_free]
         if chosen_pos is None:
             return {
                 "contract_version": CONTRACT_VERSION,
@@ -747,31 +2359,24 @@ def _constructive_assign(
 
         global_idx = assignable_indices[chosen_pos]
         used_positions.add(chosen_pos)
-        assignment_by_seat[global_idx] = student.exam_student_id
-        occupied_class[global_idx] = student.separation_group_id
+        placed.append((global_idx, student))
+        occupied_code[global_idx] = code
 
-    exam_class_by_student = {
-        s.exam_student_id: s.exam_class_id for s in movable_students
-    }
     result_assignments = list(locked_assignments)
-    for global_idx, student_id in assignment_by_seat.items():
+    for global_idx, student in placed:
         seat = all_seats[global_idx]
         result_assignments.append(
             {
-                "exam_student_id": student_id,
-                "exam_class_id": exam_class_by_student[student_id],
+                "exam_student_id": student.exam_student_id,
+                "exam_class_id": student.exam_class_id,
                 "row": seat.row,
                 "col": seat.col,
                 "seat_number": seat.seat_number,
             }
         )
 
-    conflict_count, conflict_pairs = _find_conflicts(
-        assignment_by_seat,
-        adjacency,
-        all_seats,
-        class_by_student,
-        locked_by_seat,
+    conflict_count, conflict_pairs = _conflicts_by_code(
+        occupied_code, adjacency, all_seats, ids.class_ids
     )
 
     status = "optimal" if conflict_count == 0 else "feasible"
@@ -790,12 +2395,14 @@ def _constructive_assign(
 
 
 def _interleave_students_by_class(
-    students: list[StudentRecord],
+    students: list[tuple[StudentRecord, int]],
     seed: int,
-) -> list[StudentRecord]:
-    by_class: dict[str, list[StudentRecord]] = {}
-    for student in students:
-        by_class.setdefault(student.separation_group_id, []).append(student)
+) -> list[tuple[StudentRecord, int]]:
+    """(student, group code) pairs round-robin by group, groups in code order
+    rotated by the seed."""
+    by_class: dict[int, list[tuple[StudentRecord, int]]] = {}
+    for student, code in students:
+        by_class.setdefault(code, []).append((student, code))
 
     if not by_class:
         return []
@@ -803,52 +2410,101 @@ def _interleave_students_by_class(
     class_order = sorted(by_class.keys())
     rotate = seed % len(class_order)
     rotated = class_order[rotate:] + class_order[:rotate]
-    queues = {cid: list(by_class[cid]) for cid in rotated}
-    interleaved: list[StudentRecord] = []
-    while any(queues.values()):
+    interleaved: list[tuple[StudentRecord, int]] = []
+    longest = max(len(members) for members in by_class.values())
+    for depth in range(longest):
         for cid in rotated:
-            if queues[cid]:
-                interleaved.append(queues[cid].pop(0))
+            members = by_class[cid]
+            if depth < len(members):
+                interleaved.append(members[depth])
     return interleaved
 
 
+def _lattice_color(seat: SeatCell, colors: int) -> int:
+    # Same-colour seats are never neighbours: (row+col)%2 splits the grid into
+    # two orthogonal independent sets, (row%2, col%2) into four king-move ones.
+    if colors == 4:
+        return (seat.row % 2) * 2 + seat.col % 2
+    return (seat.row + seat.col) % 2
+
+
+class _SeatFreeList:
+    """Seats of one lattice colour in fill order, with O(1) removal anywhere.
+
+    A doubly linked list over positions lets the zigzag filler probe a few
+    seats from the head and take any of them without rescanning used seats.
+    """
+
+    def __init__(self, seat_indices: list[int]) -> None:
+        self.seat_indices = seat_indices
+        size = len(seat_indices)
+        self._next = [pos + 1 if pos + 1 < size else -1 for pos in range(size)]
+        self._prev = [pos - 1 for pos in range(size)]
+        self.head = 0 if size else -1
+        self.size = size
+
+    def __len__(self) -> int:
+        return self.size
+
+    def iter_from_head(self, limit: int) -> list[int]:
+        """Up to `limit` list positions from the head."""
+        positions: list[int] = []
+        pos = self.head
+        while pos != -1 and len(positions) < limit:
+            positions.append(pos)
+            pos = self._next[pos]
+        return positions
+
+    def remove(self, pos: int) -> int:
+        prev_pos, next_pos = self._prev[pos], self._next[pos]
+        if prev_pos == -1:
+            self.head = next_pos
+        else:
+            self._next[prev_pos] = next_pos
+        if next_pos != -1:
+            self._prev[next_pos] = prev_pos
+        self.size -= 1
+        return self.seat_indices[pos]
+
+
 def _solve_zigzag(
     movable_students: list[StudentRecord],
     assignable_seats: list[SeatCell],
     adjacency: list[tuple[int, int]],
-    class_by_student: dict[str, str],
+    class_by_student: Mapping[str, str],
     locked_assignments: list[dict[str, Any]],
     all_seats: list[SeatCell],
     *,
     seed: int,
+    colors: int = ZIGZAG_COLORS_DEFAULT,
 ) -> dict[str, Any]:
-    """Full-hall checkerboard zigzag for one dominant class.
-
-    The largest separation group is auto-selected and seated on one color of the
-    (row+col)%2 lattice so same-class students are never orthogonal neighbours.
-    Remaining students fill the complementary color (then leftover primary seats).
-    Conflict counting for this mode uses orthogonal adjacency only.
+    """Full-hall lattice zigzag: the largest classes each own a seat colour.
+
+    Seats are coloured (row+col)%2 (2 colours, orthogonal separation) or
+    (row%2, col%2) (4 colours, king-move separation). The `colors` largest
+    separation groups are auto-selected and each seated on its own colour, so
+    none of them has a same-class neighbour. Smaller classes are packed whole
+    into the leftover seats of one colour where they fit; everyone else
+    (including overflow) fills the remaining seats from per-colour free lists,
+    probing a few seats from each head for one without a same-class neighbour.
+    Work is O(students + seats), so full halls take milliseconds. Conflict
+    counting uses the adjacency that matches the colouring.
     """
     seat_index_by_key = {_seat_key(seat): idx for idx, seat in enumerate(all_seats)}
     neighbors = _neighbor_globals(adjacency)
+    ids = _id_tables(class_by_student)
 
-    locked_by_seat: dict[int, str] = {}
-    occupied_class: dict[int, str] = {}
+    # Group code per seat index (-1 empty); locked seats first.
+    occupied_code = [-1] * len(all_seats)
+    locked_seats: list[int] = []
     for item in locked_assignments:
         idx = seat_index_by_key[(item["row"], item["col"])]
-        student_id = item["exam_student_id"]
-        locked_by_seat[idx] = student_id
-        occupied_class[idx] = class_by_student.get(
-            student_id, str(item.get("exam_class_id", ""))
-        )
+        occupied_code[idx] = ids.code(item["exam_student_id"])
+        locked_seats.append(idx)
 
     if not movable_students:
-        conflict_count, conflict_pairs = _find_conflicts(
-            {},
-            adjacency,
-            all_seats,
-            class_by_student,
-            locked_by_seat,
+        conflict_count, conflict_pairs = _conflicts_by_code(
+            occupied_code, adjacency, all_seats, ids.class_ids
         )
         status = "optimal" if conflict_count == 0 else "feasible"
         return {
@@ -862,119 +2518,124 @@ def _solve_zigzag(
             "conflicts_count": conflict_count,
         }
 
-    largest_id, largest_count = _largest_movable_class(movable_students)
-    large_students = [
-        s for s in movable_students if s.separation_group_id == largest_id
-    ]
-    other_students = [
-        s for s in movable_students if s.separation_group_id != largest_id
-    ]
-
-    # Prefer the parity that already hosts locked members of the large group.
-    locked_parity_counts = {0: 0, 1: 0}
-    for idx, student_id in locked_by_seat.items():
-        if class_by_student.get(student_id) != largest_id:
-            continue
-        seat = all_seats[idx]
-        locked_parity_counts[(seat.row + seat.col) % 2] += 1
-
-    even_seats = [s for s in assignable_seats if (s.row + s.col) % 2 == 0]
-    odd_seats = [s for s in assignable_seats if (s.row + s.col) % 2 == 1]
-    even_seats.sort(key=lambda s: (s.seat_number, s.row, s.col))
-    odd_seats.sort(key=lambda s: (s.seat_number, s.row, s.col))
-
-    def parity_score(parity: int, seats_for_parity: list[SeatCell]) -> tuple[int, int, int]:
-        fits = 1 if len(seats_for_parity) >= largest_count else 0
-        return (fits, locked_parity_counts[parity], len(seats_for_parity))
-
-    scored = [
-        (parity_score(0, even_seats), 0, even_seats),
-        (parity_score(1, odd_seats), 1, odd_seats),
-    ]
-    scored.sort(key=lambda item: item[0], reverse=True)
-    if scored[0][0] == scored[1][0]:
-        # Seed chooses which checkerboard color hosts the largest class.
-        prefer = seed % 2
-        scored = sorted(scored, key=lambda item: 0 if item[1] == prefer else 1)
+    # Groups by code: codes follow sorted IDs, so ties still break by ID.
+    by_group: dict[int, list[StudentRecord]] = {}
+    for student in movable_students:
+        by_group.setdefault(ids.code(student.exam_student_id), []).append(student)
+    ranked_groups = sorted(by_group, key=lambda gid: (-len(by_group[gid]), gid))
+    lattice_groups = ranked_groups[:colors]
+
+    ordered_seats = sorted(assignable_seats, key=lambda s: (s.seat_number, s.row, s.col))
+    seats_by_color: dict[int, list[int]] = {color: [] for color in range(colors)}
+    for seat in ordered_seats:
+        seats_by_color[_lattice_color(seat, colors)].append(
+            seat_index_by_key[_seat_key(seat)]
+        )
+    free_lists = {color: _SeatFreeList(seats_by_color[color]) for color in range(colors)}
+
+    # Prefer the colour that already hosts locked members of the group.
+    locked_color_counts: dict[tuple[int, int], int] = {}
+    for idx in locked_seats:
+        key = (occupied_code[idx], _lattice_color(all_seats[idx], colors))
+        locked_color_counts[key] = locked_color_counts.get(key, 0) + 1
+
+    color_by_group: dict[int, int] = {}
+    for group_id in lattice_groups:
+        needed = len(by_group[group_id])
+        open_colors = [c for c in range(colors) if c not in color_by_group.values()]
+        # Seed breaks ties so re-solves can swap which colour hosts a class.
+        color_by_group[group_id] = max(
+            open_colors,
+            key=lambda c: (
+                1 if len(free_lists[c]) >= needed else 0,
+                locked_color_counts.get((group_id, c), 0),
+                len(free_lists[c]),
+                -((c - seed) % colors),
+            ),
+        )
 
-    primary_parity = scored[0][1]
-    primary_seats = list(scored[0][2])
-    secondary_seats = list(scored[1][2])
+    placed: list[tuple[int, StudentRecord]] = []
 
-    assignment_by_seat: dict[int, str] = {}
-    used_keys: set[tuple[int, int]] = set()
+    def place(student: StudentRecord, code: int, idx: int) -> None:
+        placed.append((idx, student))
+        occupied_code[idx] = code
 
-    def take_seats(pool: list[SeatCell], needed: int) -> list[SeatCell]:
-        taken: list[SeatCell] = []
-        for seat in pool:
-            key = _seat_key(seat)
-            if key in used_keys:
+    overflow_students: list[tuple[StudentRecord, int]] = []
+    overflow_groups: list[int] = []
+    for group_id in lattice_groups:
+        own = free_lists[color_by_group[group_id]]
+        members = by_group[group_id]
+        for student in members:
+            if not len(own):
+                overflow_students.append((student, group_id))
                 continue
-            taken.append(seat)
-            used_keys.add(key)
-            if len(taken) >= needed:
-                break
-        return taken
-
-    large_primary = take_seats(primary_seats, len(large_students))
-    remaining_large = len(large_students) - len(large_primary)
-    large_overflow = take_seats(secondary_seats, remaining_large) if remaining_large else []
-    large_seat_list = large_primary + large_overflow
-
-    if len(large_seat_list) < len(large_students):
-        return {
-            "contract_version": CONTRACT_VERSION,
-            "status": "infeasible",
-            "strict_mode": False,
-            "mode_used": "zigzag",
-            "strategy": STRATEGY_ZIGZAG,
-            "message": "Not enough usable seats for zigzag placement of the largest class",
-            "assignments": locked_assignments,
-            "conflict_pairs": [],
-            "conflicts_count": 0,
-            "zigzag_group_id": largest_id,
-            "zigzag_parity": primary_parity,
-        }
-
-    for student, seat in zip(large_students, large_seat_list):
-        idx = seat_index_by_key[_seat_key(seat)]
-        assignment_by_seat[idx] = student.exam_student_id
-        occupied_class[idx] = student.separation_group_id
-
-    remaining_secondary = [
-        s for s in secondary_seats if _seat_key(s) not in used_keys
-    ]
-    remaining_primary = [
-        s for s in primary_seats if _seat_key(s) not in used_keys
-    ]
-    other_pool = remaining_secondary + remaining_primary
-
-    interleaved_others = _interleave_students_by_class(other_students, seed)
+            place(student, group_id, own.remove(own.head))
+        if len(members) > len(seats_by_color[color_by_group[group_id]]):
+            overflow_groups.append(group_id)
 
-    def seat_conflicts(global_idx: int, class_id: str) -> bool:
+    def seat_conflicts(global_idx: int, code: int) -> bool:
         for neighbor in neighbors.get(global_idx, []):
-            if occupied_class.get(neighbor) == class_id:
+            if occupied_code[neighbor] == code:
                 return True
         return False
 
-    for student in interleaved_others:
-        chosen: SeatCell | None = None
-        # Prefer zero orthogonal same-class conflicts among the remaining pool.
-        for seat in other_pool:
-            key = _seat_key(seat)
-            if key in used_keys:
-                continue
-            idx = seat_index_by_key[key]
-            if not seat_conflicts(idx, student.separation_group_id):
-                chosen = seat
-                break
-        if chosen is None:
-            for seat in other_pool:
-                key = _seat_key(seat)
-                if key not in used_keys:
-                    chosen = seat
-                    break
-        if chosen is None:
+    def take_seat(student: StudentRecord, code: int, colors_to_try: list[int]) -> bool:
+        for color in colors_to_try:
+            free = free_lists[color]
+            for pos in free.iter_from_head(ZIGZAG_PROBE_LIMIT):
+                if not seat_conflicts(free.seat_indices[pos], code):
+                    place(student, code, free.remove(pos))
+                    return True
+        fullest = max(colors_to_try, key=lambda c: len(free_lists[c]))
+        if not len(free_lists[fullest]):
+            return False
+        place(student, code, free_lists[fullest].remove(free_lists[fullest].head))
+        return True
+
+    # Smaller classes that fit whole into one colour's remaining seats are
+    # packed there (largest first, into the roomiest colour): a class kept on a
+    # single colour can never sit next to itself. The rest are spread with
+    # probing, unowned colours first.
+    remaining = {color: len(free_lists[color]) for color in range(colors)}
+    packed: dict[int, list[tuple[StudentRecord, int]]] = {color: [] for color in range(colors)}
+    spread: list[tuple[StudentRecord, int]] = []
+    for group_id in ranked_groups[colors:]:
+        members = [(student, group_id) for student in by_group[group_id]]
+        color = max(remaining, key=lambda c: (remaining[c], -((c - seed) % colors)))
+        if remaining[color] >= len(members):
+            remaining[color] -= len(members)
+            packed[color].extend(members)
+        else:
+            spread.extend(members)
+
+    for color in range(colors):
+        free = free_lists[color]
+        students_here = _interleave_students_by_class(packed[color], seed)
+        # Leave this colour's spare seats at an even stride (phase staggered
+        # per colour so holes of different colours do not line up side by
+        # side), so the probed remainder lands on scattered seats rather than
+        # one dense block at the end.
+        positions = free.iter_from_head(len(free))
+        holes = len(positions) - len(students_here)
+        phase = (color + 0.5) / colors
+        hole_indices = (
+            {int((k + phase) * len(positions) / holes) for k in range(holes)}
+            if holes > 0
+            else set()
+        )
+        chosen = [pos for i, pos in enumerate(positions) if i not in hole_indices]
+        for (student, code), pos in zip(students_here, chosen):
+            place(student, code, free.remove(pos))
+
+    claimed = set(color_by_group.values())
+    filler_colors = [c for c in range(colors) if c not in claimed] + sorted(
+        claimed, key=lambda c: -len(free_lists[c])
+    )
+    largest_code = lattice_groups[0]
+    largest_id = ids.class_ids[largest_code]
+    largest_color = color_by_group[largest_code]
+    for student, code in overflow_students + _interleave_students_by_class(spread, seed):
+        if not take_seat(student, code, filler_colors):
             return {
                 "contract_version": CONTRACT_VERSION,
                 "status": "infeasible",
@@ -986,52 +2647,41 @@ def _solve_zigzag(
                 "conflict_pairs": [],
                 "conflicts_count": 0,
                 "zigzag_group_id": largest_id,
-                "zigzag_parity": primary_parity,
+                "zigzag_parity": largest_color,
             }
 
-        key = _seat_key(chosen)
-        used_keys.add(key)
-        idx = seat_index_by_key[key]
-        assignment_by_seat[idx] = student.exam_student_id
-        occupied_class[idx] = student.separation_group_id
-
-    exam_class_by_student = {
-        s.exam_student_id: s.exam_class_id for s in movable_students
-    }
     result_assignments = list(locked_assignments)
-    for global_idx, student_id in assignment_by_seat.items():
+    for global_idx, student in placed:
         seat = all_seats[global_idx]
         result_assignments.append(
             {
-                "exam_student_id": student_id,
-                "exam_class_id": exam_class_by_student[student_id],
+                "exam_student_id": student.exam_student_id,
+                "exam_class_id": student.exam_class_id,
                 "row": seat.row,
                 "col": seat.col,
                 "seat_number": seat.seat_number,
             }
         )
 
-    conflict_count, conflict_pairs = _find_conflicts(
-        assignment_by_seat,
-        adjacency,
-        all_seats,
-        class_by_student,
-        locked_by_seat,
+    conflict_count, conflict_pairs = _conflicts_by_code(
+        occupied_code, adjacency, all_seats, ids.class_ids
     )
 
-    overflow_used = len(large_overflow) > 0
+    overflow_used = bool(overflow_groups)
     status = "optimal" if conflict_count == 0 else "feasible"
     message = None
     if overflow_used:
+        group_id = overflow_groups[0]
         message = (
-            f"Largest class '{largest_id}' ({largest_count} students) exceeds one "
-            f"checkerboard color ({len(primary_seats)} seats); overflow used the "
-            f"other color, so some side-by-side same-class seats may remain."
+            f"Class '{ids.class_ids[group_id]}' ({len(by_group[group_id])} students) exceeds one "
+            f"zigzag colour ({len(seats_by_color[color_by_group[group_id]])} seats); "
+            f"overflow used other colours, so some neighbouring same-class seats "
+            f"may remain."
         )
     elif conflict_count > 0:
         message = (
-            "Zigzag seating applied; some orthogonal same-class neighbours remain "
-            "among smaller classes."
+            "Zigzag seating applied; some same-class neighbours remain among "
+            "smaller classes."
         )
 
     return {
@@ -1045,12 +2695,238 @@ def _solve_zigzag(
         "conflicts_count": conflict_count,
         "message": message,
         "zigzag_group_id": largest_id,
-        "zigzag_parity": primary_parity,
+        "zigzag_parity": largest_color,
         "zigzag_overflow": overflow_used,
+        "zigzag_colors": colors,
+        "zigzag_groups": [
+            {
+                "group_id": ids.class_ids[group_id],
+                "color": color_by_group[group_id],
+                "students": len(by_group[group_id]),
+            }
+            for group_id in lattice_groups
+        ],
+    }
+
+
+def _dsatur_colouring(
+    nodes: list[int],
+    neighbors: dict[int, list[int]],
+    precoloured: dict[int, int],
+) -> dict[int, int]:
+    """DSatur: repeatedly colour the node whose neighbours already use the most
+    distinct colours (ties: most uncoloured neighbours, then node order) with
+    the smallest colour none of them uses. Precoloured nodes keep theirs."""
+    colour_of = dict(precoloured)
+    node_set = set(nodes)
+    seen: dict[int, set[int]] = {node: set() for node in nodes}
+    for node, colour in precoloured.items():
+        for neighbor in neighbors.get(node, []):
+            if neighbor in seen:
+                seen[neighbor].add(colour)
+    open_degree = {
+        node: sum(1 for neighbor in neighbors.get(node, []) if neighbor in node_set)
+        for node in nodes
+    }
+    order = {node: i for i, node in enumerate(nodes)}
+    heap = [(-len(seen[node]), -open_degree[node], order[node], node) for node in nodes]
+    heapq.heapify(heap)
+    while heap:
+        saturation, _, _, node = heapq.heappop(heap)
+        if node in colour_of or -saturation != len(seen[node]):
+            continue  # coloured already, or a stale entry
+        used = seen[node]
+        colour = 0
+        while colour in used:
+            colour += 1
+        colour_of[node] = colour
+        for neighbor in neighbors.get(node, []):
+            if neighbor not in node_set or neighbor in colour_of:
+                continue
+            open_degree[neighbor] -= 1
+            if colour not in seen[neighbor]:
+                seen[neighbor].add(colour)
+                heapq.heappush(
+                    heap,
+                    (-len(seen[neighbor]), -open_degree[neighbor], order[neighbor], neighbor),
+                )
+    return {node: colour_of[node] for node in nodes}
+
+
+def _solve_dsatur(
+    movable_students: list[StudentRecord],
+    assignable_seats: list[SeatCell],
+    adjacency: list[tuple[int, int]],
+    class_by_student: Mapping[str, str],
+    locked_assignments: list[dict[str, Any]],
+    all_seats: list[SeatCell],
+    *,
+    deadline: _Deadline | None = None,
+) -> dict[str, Any]:
+    """Graph-colouring seating for exams with many separation groups.
+
+    The adjacency graph of the assignable seats is DSatur-coloured, with each
+    locked class that still has movable students pre-coloured on its own
+    colour. Every colour class is an independent set, so the separation groups
+    are packed into colour classes best-fit decreasing (a group goes to its
+    locked colour when it fits, and is split across colours only when no
+    colour has room for all of it). A short repair pass then swaps
+    conflicting students with students of other groups while that lowers
+    the conflict count. Near-linear in seats + pairs, with a capped repair:
+    about 0.15 s for 5,000 seats.
+    """
+    seat_index_by_key = {_seat_key(seat): idx for idx, seat in enumerate(all_seats)}
+    neighbors = _neighbor_globals(adjacency)
+    ids = _id_tables(class_by_student)
+    # Group code per seat index (-1 empty), locked seats first. Groups are
+    # keyed by code; codes follow sorted IDs, so ties still break by ID.
+    class_at = [-1] * len(all_seats)
+    locked_seats: list[int] = []
+    for item in locked_assignments:
+        idx = seat_index_by_key[(item["row"], item["col"])]
+        class_at[idx] = ids.code(item["exam_student_id"])
+        locked_seats.append(idx)
+    by_group: dict[int, list[StudentRecord]] = {}
+    for student in movable_students:
+        by_group.setdefault(ids.code(student.exam_student_id), []).append(student)
+
+    # Locked members pre-colour their group's home colour. Homes are spread
+    # over the king-move grid's four colours by movable load, so each colour
+    # can still host its groups; adjacent locked seats may share a colour,
+    # since only the free seats around them need to differ from it.
+    locked_groups = {class_at[idx] for idx in locked_seats} & set(by_group)
+    load = [0] * DSATUR_LOCKED_COLOURS
+    locked_colour: dict[int, int] = {}
+    for group_id in sorted(locked_groups, key=lambda gid: (-len(by_group[gid]), gid)):
+        colour = min(range(DSATUR_LOCKED_COLOURS), key=lambda c: (load[c], c))
+        locked_colour[group_id] = colour
+        load[colour] += len(by_group[group_id])
+    precoloured = {
+        idx: locked_colour[class_at[idx]] for idx in locked_seats if class_at[idx] in locked_colour
+    }
+    nodes = [
+        seat_index_by_key[_seat_key(seat)]
+        for seat in sorted(assignable_seats, key=lambda s: (s.seat_number, s.row, s.col))
+    ]
+    colour_of = _dsatur_colouring(nodes, neighbors, precoloured)
+    seats_by_colour: dict[int, list[int]] = {}
+    for idx in nodes:
+        seats_by_colour.setdefault(colour_of[idx], []).append(idx)
+
+    # Best-fit decreasing: each group takes the fullest colour that still holds
+    # all of it, so large colours stay open for the large groups that follow.
+    room = {colour: len(seats) for colour, seats in seats_by_colour.items()}
+    groups_by_colour: dict[int, list[tuple[int, int]]] = {c: [] for c in seats_by_colour}
+    for group_id in sorted(by_group, key=lambda gid: (-len(by_group[gid]), gid)):
+        needed = len(by_group[group_id])
+        home = locked_colour.get(group_id)
+        if home is None or room.get(home, 0) < needed:
+            fitting = [c for c in room if room[c] >= needed]
+            home = min(fitting, key=lambda c: (room[c], c)) if fitting else None
+        if home is not None:
+            room[home] -= needed
+            groups_by_colour[home].append((group_id, needed))
+            continue
+        for colour in sorted(room, key=lambda c: (-room[c], c)):
+            if not needed:
+                break
+            share = min(needed, room[colour])
+            if share:
+                room[colour] -= share
+                groups_by_colour[colour].append((group_id, share))
+                needed -= share
+
+    # Colours list their seats in hall order. A split group takes the tail of
+    # its first colour and the head of the next, so its parts sit at opposite
+    # ends of the hall rather than side by side.
+    parts: dict[int, int] = {}
+    for colour, seats in seats_by_colour.items():
+        hosted = groups_by_colour[colour]
+        first_parts = []
+        later_parts = []
+        whole = []
+        for group_id, share in hosted:
+            if share == len(by_group[group_id]):
+                whole.append((group_id, share))
+            elif parts.setdefault(group_id, 0) == 0:
+                first_parts.append((group_id, share))
+            else:
+                later_parts.append((group_id, share))
+            parts[group_id] = parts.get(group_id, 0) + 1
+        cursor = 0
+        for group_id, share in later_parts + whole + first_parts:
+            for idx in seats[cursor : cursor + share]:
+                class_at[idx] = group_id
+            cursor += share
+
+    def conflicts_at(idx: int, group_id: int) -> int:
+        if group_id < 0:
+            return 0
+        return sum(1 for n in neighbors.get(idx, []) if n != idx and class_at[n] == group_id)
+
+    # Repair: swap a conflicting seat with the next seat in hall order, of
+    # another group or left empty, whose exchange lowers the total. Probes are capped per
+    # seat so halls with unavoidable conflicts stay fast, and the repair stops
+    # when the deadline has no time left for it.
+    probes = DSATUR_REPAIR_PROBES_PER_SEAT * len(nodes)
+    for _ in range(DSATUR_REPAIR_PASSES):
+        improved = False
+        for position, a in enumerate(nodes):
+            if probes <= 0 or (deadline is not None and deadline.remaining() <= 0):
+                break
+            group_a = class_at[a]
+            if not conflicts_at(a, group_a):
+                continue
+            for step in range(1, len(nodes)):
+                if probes <= 0:
+                    break
+                probes -= 1
+                b = nodes[(position + step) % len(nodes)]
+                group_b = class_at[b]
+                if group_b == group_a or conflicts_at(b, group_a):
+                    continue
+                before = conflicts_at(a, group_a) + conflicts_at(b, group_b)
+                class_at[a], class_at[b] = group_b, group_a
+                if conflicts_at(a, group_b) + conflicts_at(b, group_a) < before:
+                    improved = True
+                    break
+                class_at[a], class_at[b] = group_a, group_b
+        if not improved:
+            break
+
+    pending = {gid: iter(members) for gid, members in by_group.items()}
+    result_assignments = list(locked_assignments)
+    for idx in nodes:
+        if class_at[idx] < 0:
+            continue
+        student = next(pending[class_at[idx]])
+        seat = all_seats[idx]
+        result_assignments.append(
+            {
+                "exam_student_id": student.exam_student_id,
+                "exam_class_id": student.exam_class_id,
+                "row": seat.row,
+                "col": seat.col,
+                "seat_number": seat.seat_number,
+            }
+        )
+
+    conflict_count, conflict_pairs = _conflicts_by_code(
+        class_at, adjacency, all_seats, ids.class_ids
+    )
+    return {
+        "contract_version": CONTRACT_VERSION,
+        "status": "optimal" if conflict_count == 0 else "feasible",
+        "strict_mode": False,
+        "mode_used": ENGINE_DSATUR,
+        "assignments": result_assignments,
+        "conflict_pairs": conflict_pairs,
+        "conflicts_count": conflict_count,
+        "dsatur_colours": len(seats_by_colour),
     }
 
 
-def _conflict_free_capacity(assignable_seats: list[SeatCell]) -> int:
+def conflict_free_capacity(assignable_seats: list[SeatCell]) -> int:
     """Max students of a *single* class that can be seated with zero 8-directional
     neighbours: the largest of the four (row%2, col%2) parity groups. Cells that
     share a parity differ by >=2 in a row or column, so each group is an
@@ -1063,12 +2939,131 @@ def _conflict_free_capacity(assignable_seats: list[SeatCell]) -> int:
     return max(groups.values()) if groups else 0
 
 
-def _largest_movable_class(movable_students: list[StudentRecord]) -> tuple[str, int]:
+def parity_groups(seats: list[SeatCell]) -> tuple[int, int, int, int]:
+    """Seats in each (row % 2, col % 2) parity group, in that order."""
+    groups = [0, 0, 0, 0]
+    for seat in seats:
+        groups[(seat.row % 2) * 2 + seat.col % 2] += 1
+    return (groups[0], groups[1], groups[2], groups[3])
+
+
+def _parity_pack(
+    classes: list[tuple[str, int]],
+    rooms: list[tuple[int, int, int, int]],
+) -> tuple[list[dict[str, int]], list[list[int]]] | None:
+    """parity_split, plus the seats left free in each room's parity groups."""
+    free = [list(groups) for groups in rooms]
+    split: list[dict[str, int]] = [{} for _ in rooms]
+    for class_id, size in sorted(classes, key=lambda item: (-item[1], item[0])):
+        # Each room offers its largest free group.
+        offers = sorted(
+            ((max(groups), r, groups.index(max(groups))) for r, groups in enumerate(free)),
+            key=lambda offer: (-offer[0], offer[1]),
+        )
+        whole = [offer for offer in offers if offer[0] >= size]
+        left = size
+        for room_free, r, g in [whole[-1]] if whole else offers:
+            take = min(left, room_free)
+            if take <= 0:
+                break
+            free[r][g] -= take
+            split[r][class_id] = take
+            left -= take
+        if left:
+            return None
+    return split, free
+
+
+def parity_split(
+    classes: list[tuple[str, int]],
+    rooms: list[tuple[int, int, int, int]],
+) -> list[dict[str, int]] | None:
+    """Class-to-room split that keeps each class's share of a room inside one
+    parity group of that room, or None when the greedy packing finds none.
+
+    No two seats of a parity group are king-move neighbours, so such a split
+    certifies a zero-conflict layout. Classes go largest first, whole into the
+    tightest group that holds them, otherwise spread over the largest free
+    groups, one group per room (two groups of one room always share
+    neighbours)."""
+    packed = _parity_pack(classes, rooms)
+    return None if packed is None else packed[0]
+
+
+def _certified_selection(
+    assignable_seats: list[SeatCell],
+    classes: list[tuple[str, int]],
+    seed: int,
+) -> list[SeatCell] | None:
+    """Evenly spaced seats that keep the hall's parity split: each parity
+    group loses only the seats the split leaves free in it. None when the
+    hall has no split."""
+    packed = _parity_pack(classes, [parity_groups(assignable_seats)])
+    if packed is None:
+        return None
+    (slack,) = packed[1]
+    by_group: list[list[SeatCell]] = [[], [], [], []]
+    for seat in assignable_seats:
+        by_group[(seat.row % 2) * 2 + seat.col % 2].append(seat)
+    return [
+        seat
+        for group, seats in enumerate(by_group)
+        for seat in _select_evenly_spaced_seats(seats, len(seats) - slack[group], seed)
+    ]
+
+
+def _clique_cover_capacity(
+    assignable_seats: list[SeatCell],
+    all_seats: list[SeatCell],
+    adjacency: list[tuple[int, int]],
+) -> int:
+    """Upper bound on the seats of a single class without neighbours in a
+    free-form or aisled hall: the number of cliques in a greedy clique cover,
+    since each clique holds at most one of them. On a full king-move grid the
+    cover is the 2x2 blocks, matching conflict_free_capacity."""
+    index_by_key = {_seat_key(seat): idx for idx, seat in enumerate(all_seats)}
+    order = {
+        index_by_key[_seat_key(seat)]: rank
+        for rank, seat in enumerate(
+            sorted(
+                assignable_seats,
+                key=lambda seat: (
+                    (seat.row, seat.col) if seat.x is None else (seat.y, seat.x),
+                    seat.seat_number,
+                ),
+            )
+        )
+    }
+    neighbors: dict[int, set[int]] = {idx: set() for idx in order}
+    for a, b in adjacency:
+        if a in order and b in order:
+            neighbors[a].add(b)
+            neighbors[b].add(a)
+    covered: set[int] = set()
+    cliques = 0
+    for idx in sorted(order, key=order.__getitem__):
+        if idx in covered:
+            continue
+        clique = [idx]
+        for other in sorted(neighbors[idx] - covered, key=order.__getitem__):
+            if all(other in neighbors[member] for member in clique[1:]):
+                clique.append(other)
+        covered.update(clique)
+        cliques += 1
+    return cliques
+
+
+def _movable_class_counts(movable_students: list[StudentRecord]) -> dict[str, int]:
     counts: dict[str, int] = {}
     for student in movable_students:
         counts[student.separation_group_id] = (
             counts.get(student.separation_group_id, 0) + 1
         )
+    return counts
+
+
+def _largest_movable_class(movable_students: list[StudentRecord]) -> tuple[str, int]:
+    counts = _movable_class_counts(movable_students)
     if not counts:
         return ("", 0)
     return max(counts.items(), key=lambda kv: (kv[1], kv[0]))
@@ -1084,27 +3079,1004 @@ def _capacity_message(class_id: str, class_count: int, capacity: int) -> str:
     )
 
 
-def solve(raw: dict[str, Any]) -> dict[str, Any]:
-    parsed = _parse_input(raw)
-    if isinstance(parsed, dict):
-        return parsed
+def _row_dp_layout(
+    movable_students: list[StudentRecord],
+    assignable_seats: list[SeatCell],
+    class_by_student: Mapping[str, str],
+    locked_assignments: list[dict[str, Any]],
+    all_seats: list[SeatCell],
+) -> tuple[list[str], list[list[int | None]], list[list[int]]]:
+    """Movable classes (codes 0..k-1), per-row locked class codes by column
+    (other locked classes get codes >= k), and per-row assignable columns."""
+    ids = _id_tables(class_by_student)
+    # Sorted table codes keep the classes in ID order.
+    movable_codes = sorted({ids.code(s.exam_student_id) for s in movable_students})
+    class_ids = [ids.class_ids[code] for code in movable_codes]
+    dp_code = {code: dp for dp, code in enumerate(movable_codes)}
+    rows = max((seat.row for seat in all_seats), default=-1) + 1
+    cols = max((seat.col for seat in all_seats), default=-1) + 1
+    fixed: list[list[int | None]] = [[None] * cols for _ in range(rows)]
+    for item in locked_assignments:
+        code = dp_code.setdefault(ids.code(item["exam_student_id"]), len(dp_code))
+        fixed[item["row"]][item["col"]] = code
+    free: list[list[int]] = [[] for _ in range(rows)]
+    for seat in sorted(assignable_seats, key=_seat_key):
+        free[seat.row].append(seat.col)
+    return class_ids, fixed, free
+
+
+def _row_dp_transitions(free: list[list[int]], class_sizes: list[int]) -> int:
+    """Upper bound on DP transitions: consecutive row-pattern pairs times the
+    remaining-count vectors (the largest class is implied by the seat total)."""
+    if not class_sizes:
+        return 0
+    k = len(class_sizes)
+    combos = math.prod(size + 1 for size in class_sizes) // (max(class_sizes) + 1)
+    patterns = [k ** len(cols) for cols in free]
+    return combos * sum(a * b for a, b in zip([1, *patterns], patterns))
+
+
+def _row_patterns(
+    fixed_row: list[int | None],
+    free_cols: list[int],
+    k: int,
+    *,
+    strict: bool,
+) -> list[tuple[tuple[int | None, ...], int, tuple[int, ...]]]:
+    """Every way to fill a row's assignable seats: (layout, in-row conflicts,
+    seats used per class). Strict keeps only conflict-free rows."""
+    patterns = []
+    for classes in itertools.product(range(k), repeat=len(free_cols)):
+        layout = list(fixed_row)
+        for col, code in zip(free_cols, classes):
+            layout[col] = code
+        internal = sum(
+            1 for a, b in zip(layout, layout[1:]) if a is not None and a == b
+        )
+        if strict and internal:
+            continue
+        used = [0] * k
+        for code in classes:
+            used[code] += 1
+        patterns.append((tuple(layout), internal, tuple(used)))
+    return patterns
+
+
+def _row_pair_costs(
+    upper: list[tuple[int | None, ...]],
+    lower: list[tuple[int | None, ...]],
+) -> list[list[int]]:
+    """Vertical and diagonal conflicts between every pair of adjacent-row layouts."""
+    costs = []
+    for above in upper:
+        watched = [
+            (col, code) for col, code in enumerate(above) if code is not None
+        ]
+        row_costs = []
+        for below in lower:
+            width = len(below)
+            row_costs.append(
+                sum(
+                    1
+                    for col, code in watched
+                    for near in (col - 1, col, col + 1)
+                    if 0 <= near < width and below[near] == code
+                )
+            )
+        costs.append(row_costs)
+    return costs
 
-    prepared = _prepare_problem(parsed)
-    if isinstance(prepared, dict):
-        return prepared
 
-    (
-        movable_students,
-        assignable_seats,
-        adjacency,
-        class_by_student,
+def _solve_row_dp(
+    movable_students: list[StudentRecord],
+    assignable_seats: list[SeatCell],
+    adjacency: list[tuple[int, int]],
+    class_by_student: Mapping[str, str],
+    locked_assignments: list[dict[str, Any]],
+    all_seats: list[SeatCell],
+    *,
+    strict: bool,
+    deadline: _Deadline | None = None,
+) -> dict[str, Any]:
+    """Exact transfer-matrix DP over rows for narrow halls with few classes.
+
+    The hall is swept top to bottom. A state is the class layout of the last
+    row plus how many students of each class are still unseated; each row
+    pattern moves it forward at the cost of its in-row conflicts and its
+    conflicts with the row above (king-move adjacency). Equal states are
+    merged keeping the cheaper one, patterns are grouped by the class counts
+    they use so infeasible counts are pruned once per group, and strict runs
+    only keep conflict-free rows and transitions. The optimum is proven and
+    the sweep order is fixed, so equal inputs give equal layouts. Raises
+    _DeadlineExceeded when the deadline passes between rows.
+    """
+    class_ids, fixed, free = _row_dp_layout(
+        movable_students, assignable_seats, class_by_student, locked_assignments, all_seats
+    )
+    k = len(class_ids)
+    ids = _id_tables(class_by_student)
+    # The DP numbers the movable groups 0..k-1; group_code maps those back to
+    # the tables' codes.
+    group_code = [ids.class_code[class_id] for class_id in class_ids]
+    dp_code = {code: dp for dp, code in enumerate(group_code)}
+    student_codes = [dp_code[ids.code(s.exam_student_id)] for s in movable_students]
+    sizes = [0] * k
+    for code in student_codes:
+        sizes[code] += 1
+    # Remaining counts are packed into one mixed-radix int so a transition is
+    # one subtraction; the per-class digits are only checked per count group.
+    radix = [1] * k
+    for code in range(1, k):
+        radix[code] = radix[code - 1] * (sizes[code - 1] + 1)
+
+    def pack(counts: tuple[int, ...]) -> int:
+        return sum(count * base for count, base in zip(counts, radix))
+
+    layer: dict[tuple[int, int], int] = {(0, pack(tuple(sizes))): 0}
+    remaining_by_key: dict[int, tuple[int, ...]] = {pack(tuple(sizes)): tuple(sizes)}
+    previous: list[tuple[int | None, ...]] = []
+    previous_shape: tuple[Any, ...] = ()
+    backs: list[dict[tuple[int, int], tuple[int, int]]] = []
+    row_patterns: list[list[tuple[int | None, ...]]] = []
+    pair_cache: dict[tuple[Any, ...], list[list[int]]] = {}
+    pattern_cache: dict[tuple[Any, ...], list[Any]] = {}
+    for row, (fixed_row, free_cols) in enumerate(zip(fixed, free)):
+        if deadline is not None:
+            deadline.check()
+        shape = (tuple(fixed_row), tuple(free_cols))
+        if shape not in pattern_cache:
+            pattern_cache[shape] = _row_patterns(fixed_row, free_cols, k, strict=strict)
+        patterns = pattern_cache[shape]
+        layouts = [layout for layout, _, _ in patterns]
+        pair_key = (previous_shape, shape) if row else None
+        if pair_key is None:
+            pair = [[0] * len(patterns)]
+        else:
+            if pair_key not in pair_cache:
+                pair_cache[pair_key] = _row_pair_costs(previous, layouts)
+            pair = pair_cache[pair_key]
+        groups: dict[tuple[int, ...], list[tuple[int, int]]] = {}
+        for index, (_, internal, used) in enumerate(patterns):
+            groups.setdefault(used, []).append((index, internal))
+
+        nxt: dict[tuple[int, int], int] = {}
+        back: dict[tuple[int, int], tuple[int, int]] = {}
+        for state, cost in layer.items():
+            last, packed = state
+            remaining = remaining_by_key[packed]
+            pair_row = pair[last]
+            for used, members in groups.items():
+                if any(u > r for u, r in zip(used, remaining)):
+                    continue
+                packed_next = packed - pack(used)
+                if packed_next not in remaining_by_key:
+                    remaining_by_key[packed_next] = tuple(
+                        r - u for r, u in zip(remaining, used)
+                    )
+                for index, internal in members:
+                    total = cost + internal + pair_row[index]
+                    if strict and total:
+                        continue
+                    key = (index, packed_next)
+                    if total < nxt.get(key, total + 1):
+                        nxt[key] = total
+                        back[key] = state
+        layer = nxt
+        backs.append(back)
+        row_patterns.append(layouts)
+        previous, previous_shape = layouts, shape
+
+    finals = [(cost, state) for state, cost in layer.items() if state[1] == 0]
+    if not finals:
+        return {
+            "contract_version": CONTRACT_VERSION,
+            "status": "infeasible",
+            "strict_mode": strict,
+            "mode_used": "strict" if strict else "fallback",
+            "message": "No assignment satisfies constraints",
+            "assignments": locked_assignments,
+            "conflict_pairs": [],
+            "conflicts_count": 0,
+        }
+    _, state = min(finals)
+    chosen: list[tuple[int | None, ...]] = []
+    for row in range(len(backs) - 1, -1, -1):
+        chosen.append(row_patterns[row][state[0]])
+        state = backs[row][state]
+    chosen.reverse()
+
+    seat_by_key = {_seat_key(seat): seat for seat in assignable_seats}
+    seats_by_code: dict[int, list[SeatCell]] = {}
+    for row, (layout, free_cols) in enumerate(zip(chosen, free)):
+        for col in free_cols:
+            seats_by_code.setdefault(layout[col], []).append(seat_by_key[(row, col)])
+    # Stable seat order per class so roll numbers flow naturally across the hall.
+    for seats in seats_by_code.values():
+        seats.sort(key=lambda seat: seat.seat_number)
+
+    global_by_key = {_seat_key(seat): idx for idx, seat in enumerate(all_seats)}
+    code_at = [-1] * len(all_seats)
+    for item in locked_assignments:
+        code_at[global_by_key[(item["row"], item["col"])]] = ids.code(item["exam_student_id"])
+    result_assignments = list(locked_assignments)
+    next_seat = {code: iter(seats) for code, seats in seats_by_code.items()}
+    for student, code in zip(movable_students, student_codes):
+        seat = next(next_seat[code])
+        code_at[global_by_key[_seat_key(seat)]] = group_code[code]
+        result_assignments.append(
+            {
+                "exam_student_id": student.exam_student_id,
+                "exam_class_id": student.exam_class_id,
+                "row": seat.row,
+                "col": seat.col,
+                "seat_number": seat.seat_number,
+            }
+        )
+
+    conflict_count, conflict_pairs = _conflicts_by_code(
+        code_at, adjacency, all_seats, ids.class_ids
+    )
+    return {
+        "contract_version": CONTRACT_VERSION,
+        "status": "optimal",
+        "strict_mode": strict,
+        "mode_used": "strict" if strict else "fallback",
+        "assignments": result_assignments,
+        "conflict_pairs": conflict_pairs,
+        "conflicts_count": conflict_count,
+    }
+
+
+def _seat_components(
+    adjacency: list[tuple[int, int]],
+    nodes: set[int],
+) -> list[list[int]]:
+    """Connected components of the seat graph restricted to `nodes`
+    (union-find), each in seat order, ordered by their first seat."""
+    parent = {node: node for node in nodes}
+
+    def find(node: int) -> int:
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for a, b in adjacency:
+        if a in parent and b in parent:
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[root_a] = root_b
+    groups: dict[int, list[int]] = {}
+    for node in sorted(nodes):
+        groups.setdefault(find(node), []).append(node)
+    return list(groups.values())
+
+
+def _count_components(
+    adjacency: list[tuple[int, int]],
+    nodes: set[int],
+) -> int:
+    return len(_seat_components(adjacency, nodes))
+
+
+def _hall_parts(parsed: SeatingProblem, adjacency: list[tuple[int, int]]) -> list[list[int]]:
+    """Usable seats split into independent parts: seat-graph components,
+    merged in seat order until each holds COMPONENT_MIN_SEATS seats."""
+    usable = {idx for idx, seat in enumerate(parsed.seats) if not seat.is_disabled}
+    parts: list[list[int]] = []
+    for component in _seat_components(adjacency, usable):
+        if parts and len(parts[-1]) < COMPONENT_MIN_SEATS:
+            parts[-1].extend(component)
+        else:
+            parts.append(component)
+    if len(parts) > 1 and len(parts[-1]) < COMPONENT_MIN_SEATS:
+        parts[-2].extend(parts.pop())
+    return parts
+
+
+def _solve_by_parts(
+    parsed: SeatingProblem,
+    prepared: tuple[Any, ...],
+    parts: list[list[int]],
+    *,
+    should_stop: Callable[[], bool] | None = None,
+    deadline: _Deadline,
+    require_strict: bool = False,
+) -> dict[str, Any] | None:
+    """Solve each independent part of the hall as its own problem and merge
+    the layouts.
+
+    No adjacent pair spans two parts, so each part's model is exact for its
+    seats. Movable students are dealt out in class order along an evenly
+    interleaved sequence of the parts' selected seats, which fills every part
+    and gives it its proportional share of each class, within one student.
+    Parts share the deadline in proportion to their seats; time a part does
+    not use passes on to the next. With require_strict, a part that cannot be
+    separated returns None: the even deal can overload a part even when the
+    whole hall separates, so the caller solves the hall as one model.
+    """
+    movable_students, assignable_seats, _, _, _, _, all_seats = prepared
+    seat_index_by_key = {_seat_key(seat): idx for idx, seat in enumerate(all_seats)}
+    part_of = {idx: p for p, part in enumerate(parts) for idx in part}
+    room = [0] * len(parts)
+    for seat in assignable_seats:
+        room[part_of[seat_index_by_key[_seat_key(seat)]]] += 1
+    slots = sorted(((k + 0.5) / count, p) for p, count in enumerate(room) for k in range(count))
+    members: list[set[str]] = [
+        {all_seats[idx].exam_student_id for idx in part if all_seats[idx].exam_student_id}
+        for part in parts
+    ]
+    by_class = sorted(movable_students, key=lambda s: s.separation_group_id)
+    for (_, p), student in zip(slots, by_class):
+        members[p].add(student.exam_student_id)
+
+    results: list[dict[str, Any]] = []
+    seats_left = sum(len(part) for part in parts)
+    for part, ids in zip(parts, members):
+        share = deadline.remaining() * len(part) / seats_left
+        seats_left -= len(part)
+        sub = replace(
+            parsed,
+            seats=[all_seats[idx] for idx in part],
+            students=[s for s in parsed.students if s.exam_student_id in ids],
+            deadline_seconds=max(share, 1e-3),
+            solve_log=None,
+            timing_model=None,
+            adaptive_timeout=False,
+        )
+        result = _solve_seating(sub, should_stop=should_stop)
+        if require_strict and result.get("mode_used") != "strict":
+            return None
+        if result["status"] not in {"optimal", "feasible"}:
+            return result
+        results.append(result)
+
+    return {
+        "contract_version": CONTRACT_VERSION,
+        "status": "optimal"
+        if all(result["status"] == "optimal" for result in results)
+        else "feasible",
+        "strict_mode": parsed.strict_mode,
+        # Strict only when every part is; otherwise the first part that was not.
+        "mode_used": next(
+            (result["mode_used"] for result in results if result["mode_used"] != "strict"),
+            "strict",
+        ),
+        "assignments": [item for result in results for item in result["assignments"]],
+        "conflict_pairs": [pair for result in results for pair in result["conflict_pairs"]],
+        "conflicts_count": sum(result["conflicts_count"] for result in results),
+        "message": next((result["message"] for result in results if result.get("message")), None),
+    }
+
+
+def _problem_features(
+    parsed: SeatingProblem,
+    movable_students: list[StudentRecord],
+    assignable_seats: list[SeatCell],
+    adjacency: list[tuple[int, int]],
+    *,
+    capacity: int,
+    largest_count: int,
+) -> dict[str, Any]:
+    usable = {idx for idx, seat in enumerate(parsed.seats) if not seat.is_disabled}
+    locked = sum(1 for seat in parsed.seats if seat.locked)
+    seat_index_by_key = {_seat_key(seat): idx for idx, seat in enumerate(parsed.seats)}
+    assignable = {seat_index_by_key[_seat_key(seat)] for seat in assignable_seats}
+    return {
+        "seats": len(assignable_seats),
+        "students": len(movable_students),
+        "classes": len({s.separation_group_id for s in parsed.students}),
+        "adjacent_pairs": sum(1 for a, b in adjacency if a in assignable or b in assignable),
+        "largest_class_ratio": round(largest_count / capacity, 3) if capacity else 0.0,
+        "locked_density": round(locked / len(usable), 3) if usable else 0.0,
+        "components": _count_components(adjacency, usable),
+    }
+
+
+def _estimate_model(features: dict[str, Any], *, strict: bool) -> dict[str, Any]:
+    """Size and cost of the class-level CP-SAT model, before building it."""
+    seats, classes, pairs = features["seats"], features["classes"], features["adjacent_pairs"]
+    variables = seats * classes + (0 if strict else pairs)
+    constraints = seats + classes + pairs * classes
+    terms = 2 * seats * classes + pairs * classes * (2 if strict else 3)
+    # Locks pin parts of the hall and make the remaining search tighter.
+    difficulty = 1.0 + 2.0 * features["locked_density"]
+    return {
+        "variables": variables,
+        "constraints": constraints,
+        "memory_mb": round(terms * PLANNER_BYTES_PER_TERM / 1e6, 1),
+        "expected_seconds": round(constraints * PLANNER_SECONDS_PER_CONSTRAINT * difficulty, 2),
+    }
+
+
+def _plan_engines(
+    parsed: SeatingProblem,
+    features: dict[str, Any],
+    *,
+    separable: bool,
+    row_dp_transitions: int,
+) -> dict[str, Any]:
+    """Choose the engine chain from problem features and the time budget.
+
+    Narrow halls with few classes, whose row DP state space is small, are
+    solved exactly by the row DP. Otherwise CP-SAT stays the primary engine
+    while its model is expected to finish inside the budget. Halls whose
+    model cannot, start from an analytic lattice packing (no search) and
+    improve it with windowed CP-SAT (LNS). With many separation groups a
+    DSatur layout comes first: kept when conflict-free, otherwise the LNS
+    start or the CP-SAT hint. Free-form halls (map.adjacency_distance) have no
+    grid rows for the row DP or the lattice, so they start from DSatur; the
+    row DP also assumes unbroken rows and fills every seat, so halls with
+    aisles or with seats left for the model to empty skip it.
+    """
+    if parsed.strategy == STRATEGY_ZIGZAG:
+        return {
+            "chain": [ENGINE_ZIGZAG],
+            "reason": "zigzag strategy requested",
+            "features": features,
+        }
+
+    strict = parsed.strict_mode and separable
+    estimates = _estimate_model(features, strict=strict)
+    estimates["row_dp_transitions"] = row_dp_transitions
+    if (
+        parsed.exact_dp
+        and parsed.adjacency_distance is None
+        and not parsed.aisles
+        and features["seats"] == features["students"]
+        and row_dp_transitions <= ROW_DP_MAX_TRANSITIONS
+        and row_dp_transitions * ROW_DP_SECONDS_PER_TRANSITION
+        <= parsed.timeout_seconds * PLANNER_CPSAT_BUDGET_SHARE
+    ):
+        return {
+            "chain": [ENGINE_ROW_DP],
+            "reason": "row DP state space small enough to solve exactly",
+            "features": features,
+            "estimates": estimates,
+        }
+    fits_budget = (
+        estimates["expected_seconds"]
+        <= parsed.timeout_seconds * PLANNER_CPSAT_BUDGET_SHARE
+    )
+    fits_memory = estimates["memory_mb"] <= PLANNER_MAX_MODEL_MB
+    if fits_budget and fits_memory:
+        if not parsed.strict_mode:
+            chain = [ENGINE_CP_SAT]
+        elif separable:
+            chain = [ENGINE_CP_SAT_STRICT, ENGINE_CP_SAT, ENGINE_CONSTRUCTIVE]
+        else:
+            chain = [ENGINE_CP_SAT, ENGINE_CONSTRUCTIVE]
+        reason = "model expected to finish within the time budget"
+    else:
+        # The lattice packing needs grid rows; free-form halls start from DSatur.
+        chain = [
+            ENGINE_ANALYTIC if parsed.adjacency_distance is None else ENGINE_DSATUR,
+            ENGINE_LNS,
+        ]
+        reason = (
+            "model too large for memory"
+            if not fits_memory
+            else "model not expected to finish within the time budget"
+        )
+    if features["classes"] >= DSATUR_MIN_CLASSES:
+        chain = [
+            ENGINE_DSATUR,
+            *(chain[1:] if chain[0] in {ENGINE_ANALYTIC, ENGINE_DSATUR} else chain),
+        ]
+    return {
+        "chain": chain,
+        "reason": reason,
+        "features": features,
+        "estimates": estimates,
+    }
+
+
+def _improve_by_lns(
+    start: dict[str, Any],
+    movable_students: list[StudentRecord],
+    assignable_seats: list[SeatCell],
+    adjacency: list[tuple[int, int]],
+    class_by_student: Mapping[str, str],
+    locked_assignments: list[dict[str, Any]],
+    all_seats: list[SeatCell],
+    *,
+    seed: int,
+    time_budget: float,
+    search_workers: int | None = None,
+) -> dict[str, Any]:
+    """Large-neighbourhood search over row bands.
+
+    Each window frees the students seated in a few rows that touch a
+    conflict and re-solves just that band with the class-level CP-SAT model,
+    treating every other seat as locked. Windows are small, so each solve is
+    fast even when the whole-hall model would not fit the budget.
+    """
+    deadline = time.monotonic() + time_budget
+    student_index = {s.exam_student_id: i for i, s in enumerate(movable_students)}
+    seats_by_row: dict[int, list[SeatCell]] = {}
+    for seat in assignable_seats:
+        seats_by_row.setdefault(seat.row, []).append(seat)
+    rows = sorted(seats_by_row)
+
+    def by_row(result: dict[str, Any]) -> list[list[tuple[int, dict[str, Any]]]]:
+        """(movable student index, assignment) pairs per hall row, resolved
+        once per accepted layout so windows only index lists."""
+        placed: list[list[tuple[int, dict[str, Any]]]] = [[] for _ in range(rows[-1] + 1)]
+        for item in result["assignments"]:
+            index = student_index.get(item["exam_student_id"])
+            if index is not None:
+                placed[item["row"]].append((index, item))
+        return placed
+
+    def conflict_rows(result: dict[str, Any]) -> set[int]:
+        return {
+            pair[seat]["row"] for pair in result["conflict_pairs"] for seat in ("seat_a", "seat_b")
+        }
+
+    best = start
+    placed, touched_rows = by_row(best), conflict_rows(best)
+    for offset in (0, LNS_WINDOW_ROWS // 2):
+        if best["conflicts_count"] == 0:
+            break
+        for first in range(rows[0] - offset, rows[-1] + 1, LNS_WINDOW_ROWS):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or best["conflicts_count"] == 0:
+                return best
+            window_rows = range(max(first, 0), min(first + LNS_WINDOW_ROWS, len(placed)))
+            if not any(row in touched_rows for row in window_rows):
+                continue
+            band_seats = [seat for row in window_rows for seat in seats_by_row.get(row, ())]
+            window_students = [
+                movable_students[index] for row in window_rows for index, _ in placed[row]
+            ]
+            if not window_students:
+                continue
+            fixed = list(locked_assignments)
+            for row, row_items in enumerate(placed):
+                if row not in window_rows:
+                    fixed.extend(item for _, item in row_items)
+            candidate = _solve_assignment(
+                window_students,
+                band_seats,
+                adjacency,
+                class_by_student,
+                fixed,
+                all_seats,
+                [],
+                strict=False,
+                seed=seed,
+                timeout_seconds=min(LNS_WINDOW_SECONDS, remaining),
+                search_workers=search_workers,
+            )
+            if (
+                candidate["status"] in {"optimal", "feasible"}
+                and candidate["conflicts_count"] < best["conflicts_count"]
+            ):
+                best = candidate
+                placed, touched_rows = by_row(best), conflict_rows(best)
+    return best
+
+
+def _solve_without_model(
+    parsed: SeatingProblem,
+    movable_students: list[StudentRecord],
+    assignable_seats: list[SeatCell],
+    adjacency: list[tuple[int, int]],
+    class_by_student: Mapping[str, str],
+    locked_assignments: list[dict[str, Any]],
+    all_seats: list[SeatCell],
+    *,
+    start: str = ENGINE_ANALYTIC,
+    deadline: _Deadline | None = None,
+) -> dict[str, Any]:
+    """Analytic king-move lattice packing (or a DSatur layout), then LNS on
+    what conflicts remain."""
+    if start == ENGINE_DSATUR:
+        packed = _solve_dsatur(
+            movable_students,
+            assignable_seats,
+            adjacency,
+            class_by_student,
+            locked_assignments,
+            all_seats,
+            deadline=deadline,
+        )
+    else:
+        packed = _solve_zigzag(
+            movable_students,
+            assignable_seats,
+            adjacency,
+            class_by_student,
+            locked_assignments,
+            all_seats,
+            seed=parsed.seed,
+            colors=4,
+        )
+    if packed["status"] not in {"optimal", "feasible"}:
+        return packed
+    result = {
+        "contract_version": CONTRACT_VERSION,
+        "status": packed["status"],
+        "strict_mode": parsed.strict_mode,
+        "mode_used": start,
+        "assignments": packed["assignments"],
+        "conflict_pairs": packed["conflict_pairs"],
+        "conflicts_count": packed["conflicts_count"],
+    }
+    if result["conflicts_count"] == 0:
+        return result
+
+    improved = _improve_by_lns(
+        result,
+        movable_students,
+        assignable_seats,
+        adjacency,
+        class_by_student,
+        locked_assignments,
+        all_seats,
+        seed=parsed.seed,
+        time_budget=(
+            parsed.timeout_seconds
+            if deadline is None
+            else deadline.share(parsed.timeout_seconds, later=_alternatives_weight(parsed))
+        ),
+        search_workers=parsed.search_workers,
+    )
+    if improved is result:
+        return result
+    return {
+        **improved,
+        "status": "optimal" if improved["conflicts_count"] == 0 else "feasible",
+        "strict_mode": parsed.strict_mode,
+        "mode_used": ENGINE_LNS,
+    }
+
+
+def _seat_layout(
+    result: dict[str, Any],
+    class_by_student: Mapping[str, str],
+    locked_assignments: list[dict[str, Any]],
+) -> dict[tuple[int, int], str]:
+    """Class per seat of the movable students in a result."""
+    locked_ids = {item["exam_student_id"] for item in locked_assignments}
+    return {
+        (item["row"], item["col"]): class_by_student[item["exam_student_id"]]
+        for item in result["assignments"]
+        if item["exam_student_id"] not in locked_ids
+    }
+
+
+def _find_alternatives(
+    parsed: SeatingProblem,
+    prepared: tuple[Any, ...],
+    best: dict[str, Any],
+    *,
+    should_stop: Callable[[], bool] | None = None,
+    deadline: _Deadline | None = None,
+) -> list[dict[str, Any]]:
+    """Up to `alternatives_count` more layouts, each at least `min_distance`
+    seats (class per seat) away from the best and every earlier alternative,
+    with at most best + `tolerance` conflicts.
+
+    Each alternative is a CP-SAT satisfaction solve over the class-level
+    model with one no-good cut per layout found so far and the conflict
+    ceiling as a constraint, so the first solution is taken. Like LNS it
+    first re-solves row bands of the best layout with every other seat held,
+    which is fast even when the ceiling is tight, and only then searches the
+    whole hall, hinted with the best layout. Searching stops at the first
+    alternative that cannot be found in the remaining budget.
+    """
+    (
+        movable_students,
+        assignable_seats,
+        adjacency,
+        class_by_student,
+        locked_assignments,
+        all_seat_indices,
+        all_seats,
+    ) = prepared
+    seat_index_by_key = {_seat_key(seat): idx for idx, seat in enumerate(all_seats)}
+    locked_by_seat = {
+        seat_index_by_key[(item["row"], item["col"])]: item["exam_student_id"]
+        for item in locked_assignments
+    }
+    fixed_conflicts, _ = _find_conflicts(
+        {}, adjacency, all_seats, class_by_student, locked_by_seat
+    )
+    ceiling = best["conflicts_count"] + parsed.alternatives_tolerance - fixed_conflicts
+    distance = parsed.alternatives_min_distance or max(2, len(assignable_seats) // 10)
+    layouts = [_seat_layout(best, class_by_student, locked_assignments)]
+    budget = parsed.timeout_seconds * ALTERNATIVES_BUDGET_SHARE
+    if deadline is not None:
+        budget = deadline.share(budget)
+    stop_at = time.monotonic() + budget
+
+    alternatives: list[dict[str, Any]] = []
+    for _ in range(parsed.alternatives_count):
+        candidate = _alternative_in_band(
+            parsed,
+            prepared,
+            best,
+            layouts,
+            distance=distance,
+            ceiling=best["conflicts_count"] + parsed.alternatives_tolerance,
+            stop_at=stop_at,
+        )
+        remaining = stop_at - time.monotonic()
+        if candidate is None and remaining > 0:
+            candidate = _solve_assignment(
+                movable_students,
+                assignable_seats,
+                adjacency,
+                class_by_student,
+                locked_assignments,
+                all_seats,
+                all_seat_indices,
+                strict=ceiling <= 0,
+                seed=parsed.seed,
+                # A satisfaction solve stops at its first layout, so each one may
+                # use what is left rather than an even share.
+                timeout_seconds=remaining,
+                search_workers=parsed.search_workers,
+                should_stop=should_stop,
+                encoding=parsed.encoding,
+                # The best layout is complete and within the ceiling; the search
+                # only has to move it `distance` seats away.
+                hint=layouts[0],
+                avoid=layouts,
+                min_distance=distance,
+                max_conflicts=None if ceiling <= 0 else ceiling,
+                deadline=deadline,
+                cache_model=True,
+                model_cache=parsed.model_cache,
+            )
+        if candidate is None or candidate["status"] not in {"optimal", "feasible"}:
+            break
+        layout = _seat_layout(candidate, class_by_student, locked_assignments)
+        alternatives.append(
+            {
+                "assignments": candidate["assignments"],
+                "conflict_pairs": candidate["conflict_pairs"],
+                "conflicts_count": candidate["conflicts_count"],
+                "distance": min(
+                    sum(1 for key, class_id in earlier.items() if layout.get(key) != class_id)
+                    for earlier in layouts
+                ),
+            }
+        )
+        layouts.append(layout)
+    return alternatives
+
+
+def _alternative_in_band(
+    parsed: SeatingProblem,
+    prepared: tuple[Any, ...],
+    best: dict[str, Any],
+    layouts: list[dict[tuple[int, int], str]],
+    *,
+    distance: int,
+    ceiling: int,
+    stop_at: float,
+) -> dict[str, Any] | None:
+    """An alternative that differs from the best layout only inside one band
+    of LNS_WINDOW_ROWS rows, or None. The cuts hold inside the band, so the
+    result is `distance` seats away from every layout in `layouts`; bands
+    start after the ones earlier alternatives used."""
+    (
+        movable_students,
+        assignable_seats,
+        adjacency,
+        class_by_student,
+        locked_assignments,
+        _,
+        all_seats,
+    ) = prepared
+    student_by_id = {s.exam_student_id: s for s in movable_students}
+    locked_ids = {item["exam_student_id"] for item in locked_assignments}
+    seat_index_by_key = {_seat_key(seat): idx for idx, seat in enumerate(all_seats)}
+    rows = sorted({seat.row for seat in assignable_seats})
+    firsts = [
+        first
+        for offset in (0, LNS_WINDOW_ROWS // 2)
+        for first in range(rows[0] - offset, rows[-1] + 1, LNS_WINDOW_ROWS)
+    ]
+    shift = (len(layouts) - 1) % len(firsts)
+    for first in firsts[shift:] + firsts[:shift]:
+        remaining = stop_at - time.monotonic()
+        if remaining <= 0:
+            return None
+        window_rows = range(first, first + LNS_WINDOW_ROWS)
+        band_seats = [seat for seat in assignable_seats if seat.row in window_rows]
+        if len(band_seats) < distance:
+            continue
+        window_students: list[StudentRecord] = []
+        fixed = list(locked_assignments)
+        for item in best["assignments"]:
+            if item["exam_student_id"] in locked_ids:
+                continue
+            if item["row"] in window_rows:
+                window_students.append(student_by_id[item["exam_student_id"]])
+            else:
+                fixed.append(item)
+        fixed_conflicts, _ = _find_conflicts(
+            {},
+            adjacency,
+            all_seats,
+            class_by_student,
+            {
+                seat_index_by_key[(item["row"], item["col"])]: item["exam_student_id"]
+                for item in fixed
+            },
+        )
+        band_ceiling = ceiling - fixed_conflicts
+        candidate = _solve_assignment(
+            window_students,
+            band_seats,
+            adjacency,
+            class_by_student,
+            fixed,
+            all_seats,
+            [],
+            strict=band_ceiling <= 0,
+            seed=parsed.seed,
+            timeout_seconds=min(LNS_WINDOW_SECONDS, remaining),
+            search_workers=parsed.search_workers,
+            hint=layouts[0],
+            avoid=layouts,
+            min_distance=distance,
+            max_conflicts=None if band_ceiling <= 0 else band_ceiling,
+        )
+        if (
+            candidate["status"] in {"optimal", "feasible"}
+            and candidate["conflicts_count"] <= ceiling
+        ):
+            return candidate
+    return None
+
+
+def solve_problem(
+    problem: SeatingProblem,
+    *,
+    should_stop: Callable[[], bool] | None = None,
+) -> SeatingResult:
+    """Solve in-process. `should_stop` is polled at each CP-SAT solution so
+    interactive callers can cancel a long search and keep the incumbent."""
+    message = _validate_problem(problem)
+    if message is not None:
+        return SeatingResult.from_dict(_error(message))
+    return SeatingResult.from_dict(_solve_parsed(problem, should_stop=should_stop))
+
+
+def solve(raw: dict[str, Any]) -> dict[str, Any]:
+    """JSON contract entry point: payload dict in, response dict out."""
+    return _solve_measured(raw)[0]
+
+
+def _solve_measured(raw: dict[str, Any]) -> tuple[dict[str, Any], dict[str, Any]]:
+    """`solve` plus the run's metrics sample (seating_metrics)."""
+    clock = _SolveClock()
+    parsed = _parse_input(raw)
+    if isinstance(parsed, dict):
+        return parsed, _metrics_sample(None, parsed, clock)
+    result = _solve_parsed(parsed, clock=clock)
+    sample = _metrics_sample(parsed, result, clock)
+    if parsed.metrics_textfile is not None:
+        try:
+            write_textfile(parsed.metrics_textfile, sample)
+        except OSError as exc:
+            result["metrics_error"] = str(exc)
+    if parsed.record_corpus is not None:
+        try:
+            write_recording(parsed.record_corpus, raw, result, sample)
+        except OSError as exc:
+            result["record_error"] = str(exc)
+    return result, sample
+
+
+def _metrics_sample(
+    parsed: SeatingProblem | None,
+    result: dict[str, Any],
+    clock: _SolveClock,
+) -> dict[str, Any]:
+    """What the metrics exporter records about one solve."""
+    seconds = clock.elapsed()
+    plan = result.get("plan") or {}
+    estimates = plan.get("estimates") or {}
+    resume = result.get("resume")
+    return {
+        "status": result.get("status"),
+        "mode_used": result.get("mode_used"),
+        "strategy": parsed.strategy if parsed is not None else None,
+        "engine": (plan.get("chain") or [None])[0],
+        "seconds": seconds,
+        "phases": dict(clock.phases),
+        "variables": estimates.get("variables"),
+        "constraints": estimates.get("constraints"),
+        "conflicts": result.get("conflicts_count"),
+        "cache": {
+            **clock.cache,
+            **({} if resume is None else {"checkpoint": "hit" if resume["used"] else "miss"}),
+        },
+        "timed_out": result.get("status") == "timeout"
+        or (parsed is not None and seconds >= parsed.timeout_seconds),
+    }
+
+
+def _solve_parsed(
+    parsed: SeatingProblem,
+    *,
+    should_stop: Callable[[], bool] | None = None,
+    clock: _SolveClock | None = None,
+) -> dict[str, Any]:
+    result = _solve_seating(parsed, should_stop=should_stop, clock=clock)
+    if parsed.diagnostics_mode == DIAGNOSTICS_COMPACT and result["status"] in {
+        "optimal",
+        "feasible",
+    }:
+        for layout in [result, *result.get("alternatives", [])]:
+            _compact_conflicts(layout, parsed)
+    return result
+
+
+def _compact_conflicts(layout: dict[str, Any], parsed: SeatingProblem) -> None:
+    """Trim a layout's conflict_pairs to the top pairs and add a
+    conflict_summary, in place.
+
+    The summary counts conflicts per class and conflicting seats per row and
+    per column (a seat in two conflicts counts twice); `packed_pairs` lists
+    every pair as two indices into the payload's seats.
+    """
+    pairs = layout["conflict_pairs"]
+    by_class: dict[str, int] = {}
+    rows = [0] * parsed.rows
+    cols = [0] * parsed.cols
+    for pair in pairs:
+        by_class[pair["exam_class_id"]] = by_class.get(pair["exam_class_id"], 0) + 1
+        for end in (pair["seat_a"], pair["seat_b"]):
+            rows[end["row"]] += 1
+            cols[end["col"]] += 1
+    summary: dict[str, Any] = {
+        "by_class": dict(sorted(by_class.items(), key=lambda item: (-item[1], item[0]))),
+        "rows": rows,
+        "cols": cols,
+        "pairs_omitted": max(0, len(pairs) - parsed.diagnostics_top_pairs),
+    }
+    if parsed.diagnostics_packed_pairs:
+        index_by_key = {_seat_key(seat): idx for idx, seat in enumerate(parsed.seats)}
+        summary["packed_pairs"] = [
+            index_by_key[(end["row"], end["col"])]
+            for pair in pairs
+            for end in (pair["seat_a"], pair["seat_b"])
+        ]
+    ranked = sorted(pairs, key=lambda pair: -by_class[pair["exam_class_id"]])
+    layout["conflict_pairs"] = ranked[: parsed.diagnostics_top_pairs]
+    layout["conflict_summary"] = summary
+
+
+def _solve_seating(
+    parsed: SeatingProblem,
+    *,
+    should_stop: Callable[[], bool] | None = None,
+    clock: _SolveClock | None = None,
+) -> dict[str, Any]:
+    clock = clock or _SolveClock()
+    prepared = _prepare_problem(parsed)
+    clock.lap("prepare")
+    if isinstance(prepared, dict):
+        return prepared
+
+    (
+        movable_students,
+        assignable_seats,
+        adjacency,
+        class_by_student,
         locked_assignments,
         all_seat_indices,
         all_seats,
     ) = prepared
 
     if parsed.strategy == STRATEGY_ZIGZAG:
-        return _solve_zigzag(
+        result = _solve_zigzag(
             movable_students,
             assignable_seats,
             adjacency,
@@ -1112,23 +4084,419 @@ def solve(raw: dict[str, Any]) -> dict[str, Any]:
             locked_assignments,
             all_seats,
             seed=parsed.seed,
+            colors=parsed.zigzag_colors,
+        )
+        result["plan"] = {"chain": [ENGINE_ZIGZAG], "reason": "zigzag strategy requested"}
+        clock.lap("search")
+        return result
+
+    # Under 8-directional adjacency a single class can occupy at most ~a
+    # quarter of the hall without neighbours.
+    capacity = (
+        conflict_free_capacity(assignable_seats)
+        if parsed.adjacency_distance is None and not parsed.aisles
+        else _clique_cover_capacity(assignable_seats, all_seats, adjacency)
+    )
+    largest_name, largest_count = _largest_movable_class(movable_students)
+    separable = largest_count <= capacity
+    features = _problem_features(
+        parsed,
+        movable_students,
+        assignable_seats,
+        adjacency,
+        capacity=capacity,
+        largest_count=largest_count,
+    )
+    strict = parsed.strict_mode and separable
+    timing = _predict_timing(parsed, features, _estimate_model(features, strict=strict), strict)
+    if parsed.adaptive_timeout and "recommended_timeout_seconds" in timing:
+        parsed = replace(
+            parsed,
+            timeout_seconds=min(parsed.timeout_seconds, timing["recommended_timeout_seconds"]),
+        )
+    deadline = _Deadline(_deadline_seconds(parsed), started=clock.started)
+    # No single phase may outlast the whole solve's deadline.
+    parsed = replace(parsed, timeout_seconds=min(parsed.timeout_seconds, deadline.seconds))
+    parts = (
+        _hall_parts(parsed, adjacency)
+        if len(movable_students) >= COMPONENT_MIN_STUDENTS
+        and features["components"] > 1
+        and not parsed.alternatives_count
+        and parsed.checkpoint_path is None
+        and parsed.resume_from is None
+        else []
+    )
+    if len(parts) > 1:
+        plan = {
+            "chain": [ENGINE_COMPONENTS],
+            "reason": f"seat graph splits into {len(parts)} independent parts",
+            "features": features,
+        }
+    else:
+        class_ids, _, free = _row_dp_layout(
+            movable_students, assignable_seats, class_by_student, locked_assignments, all_seats
+        )
+        class_counts = _movable_class_counts(movable_students)
+        class_sizes = [class_counts[class_id] for class_id in class_ids]
+        plan = _plan_engines(
+            parsed,
+            features,
+            separable=separable,
+            row_dp_transitions=_row_dp_transitions(free, class_sizes),
+        )
+    clock.lap("plan")
+
+    if plan["chain"][0] == ENGINE_COMPONENTS:
+        result = _solve_by_parts(
+            parsed,
+            prepared,
+            parts,
+            should_stop=should_stop,
+            deadline=deadline,
+            require_strict=parsed.strict_mode and separable,
+        )
+        if result is None:
+            # Strict global solve before any relaxed layout.
+            plan["chain"].extend([ENGINE_CP_SAT_STRICT, ENGINE_CP_SAT, ENGINE_CONSTRUCTIVE])
+            result = _solve_with_cp_sat(
+                parsed,
+                prepared,
+                separable=separable,
+                capacity=capacity,
+                largest_name=largest_name,
+                largest_count=largest_count,
+                should_stop=should_stop,
+                clock=clock,
+                deadline=deadline,
+            )
+    elif plan["chain"][0] == ENGINE_ROW_DP:
+        result = _solve_exact(
+            parsed,
+            prepared,
+            separable=separable,
+            capacity=capacity,
+            largest_name=largest_name,
+            largest_count=largest_count,
+            deadline=deadline,
+        )
+    elif plan["chain"][-1] == ENGINE_LNS:
+        result = _solve_without_model(
+            parsed,
+            movable_students,
+            assignable_seats,
+            adjacency,
+            class_by_student,
+            locked_assignments,
+            all_seats,
+            start=plan["chain"][0],
+            deadline=deadline,
+        )
+        if not separable and result["conflicts_count"] > 0:
+            result["message"] = _capacity_message(largest_name, largest_count, capacity)
+    else:
+        coloured = (
+            _solve_dsatur(
+                movable_students,
+                assignable_seats,
+                adjacency,
+                class_by_student,
+                locked_assignments,
+                all_seats,
+                deadline=deadline,
+            )
+            if plan["chain"][0] == ENGINE_DSATUR
+            else None
+        )
+        if coloured is not None and coloured["conflicts_count"] == 0:
+            # No conflicts is the optimum; CP-SAT has nothing left to improve.
+            result = {
+                **coloured,
+                "strict_mode": parsed.strict_mode,
+                "mode_used": "strict" if parsed.strict_mode else "fallback",
+            }
+        else:
+            result = _solve_with_cp_sat(
+                parsed,
+                prepared,
+                separable=separable,
+                capacity=capacity,
+                largest_name=largest_name,
+                largest_count=largest_count,
+                should_stop=should_stop,
+                clock=clock,
+                deadline=deadline,
+                hint=(
+                    None
+                    if coloured is None
+                    else _seat_layout(coloured, class_by_student, locked_assignments)
+                ),
+            )
+    clock.lap("search")
+    if parsed.alternatives_count and result["status"] in {"optimal", "feasible"}:
+        result["alternatives"] = _find_alternatives(
+            parsed, prepared, result, should_stop=should_stop, deadline=deadline
         )
+        clock.lap("alternatives")
+    result["plan"] = plan
+    if parsed.timing_model is None and parsed.solve_log is None:
+        # Timings vary run to run; keep default responses reproducible.
+        return result
+
+    solve_seconds = clock.elapsed()
+    timing.update(
+        {
+            "timeout_seconds_used": parsed.timeout_seconds,
+            "deadline_seconds": _rounded(deadline.seconds),
+            "first_solution_seconds": _rounded(
+                clock.first_solution_seconds
+                if clock.first_solution_seconds is not None
+                else (solve_seconds if result["status"] in {"optimal", "feasible"} else None)
+            ),
+            "optimal_seconds": _rounded(solve_seconds if result["status"] == "optimal" else None),
+            "solve_seconds": _rounded(solve_seconds),
+        }
+    )
+    result["timing"] = timing
+    if parsed.solve_log is not None:
+        _log_solve(parsed, plan, result, strict)
+    return result
+
+
+def _rounded(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds, 3)
+
+
+def _predict_timing(
+    parsed: SeatingProblem,
+    features: dict[str, Any],
+    estimates: dict[str, Any],
+    strict: bool,
+) -> dict[str, Any]:
+    """Recommended budget from the fitted timing model, when one is configured."""
+    if parsed.timing_model is None:
+        return {}
+    try:
+        model = TimingModel.load(parsed.timing_model)
+    except (OSError, ValueError, KeyError) as exc:
+        return {"model_error": str(exc)}
+    record = {"features": features, "estimates": estimates, "strict": strict}
+    return {
+        "predicted_seconds": _rounded(model.predict_seconds(record)),
+        "recommended_timeout_seconds": _rounded(model.recommend_timeout(record)),
+        "quantile": model.quantile,
+    }
+
+
+def _log_solve(
+    parsed: SeatingProblem,
+    plan: dict[str, Any],
+    result: dict[str, Any],
+    strict: bool,
+) -> None:
+    record = {
+        "features": plan["features"],
+        "estimates": _estimate_model(plan["features"], strict=strict),
+        "strict": strict,
+        "chain": plan["chain"],
+        "status": result["status"],
+        "mode_used": result.get("mode_used"),
+        "conflicts_count": result.get("conflicts_count", 0),
+        "timeout_seconds": parsed.timeout_seconds,
+        "timing": {
+            key: result["timing"][key]
+            for key in ("first_solution_seconds", "optimal_seconds", "solve_seconds")
+        },
+    }
+    try:
+        append_solve_log(parsed.solve_log, record)
+    except OSError as exc:
+        result["timing"]["log_error"] = str(exc)
+
+
+def _solve_exact(
+    parsed: SeatingProblem,
+    prepared: tuple[Any, ...],
+    *,
+    separable: bool,
+    capacity: int,
+    largest_name: str,
+    largest_count: int,
+    deadline: _Deadline | None = None,
+) -> dict[str, Any]:
+    """Row DP with the CP-SAT cascade's outcomes: strict when a conflict-free
+    layout exists, otherwise the proven minimum-conflict layout. A DP that
+    runs past the deadline falls back to constructive placement."""
+    (
+        movable_students,
+        assignable_seats,
+        adjacency,
+        class_by_student,
+        locked_assignments,
+        _all_seat_indices,
+        all_seats,
+    ) = prepared
+    try:
+        if parsed.strict_mode and separable:
+            strict_result = _solve_row_dp(
+                movable_students,
+                assignable_seats,
+                adjacency,
+                class_by_student,
+                locked_assignments,
+                all_seats,
+                strict=True,
+                deadline=deadline,
+            )
+            if strict_result["status"] == "optimal":
+                return strict_result
+
+        result = _solve_row_dp(
+            movable_students,
+            assignable_seats,
+            adjacency,
+            class_by_student,
+            locked_assignments,
+            all_seats,
+            strict=False,
+            deadline=deadline,
+        )
+    except _DeadlineExceeded:
+        result = _constructive_assign(
+            movable_students,
+            assignable_seats,
+            adjacency,
+            class_by_student,
+            locked_assignments,
+            all_seats,
+            seed=parsed.seed,
+            prefer_zero_conflicts=separable,
+            deadline=deadline,
+        )
+        result["strict_mode"] = parsed.strict_mode
+        if result["status"] == "infeasible":
+            return result
+        result["mode_used"] = (
+            "constructive" if result["conflicts_count"] == 0 else "constructive_fallback"
+        )
+        result["message"] = "Row DP ran out of time; used constructive seating assignment"
+        return result
+    result["strict_mode"] = parsed.strict_mode
+    if parsed.strict_mode and not separable and result["conflicts_count"] > 0:
+        result["message"] = _capacity_message(largest_name, largest_count, capacity)
+    return result
+
+
+def _solve_with_cp_sat(
+    parsed: SeatingProblem,
+    prepared: tuple[Any, ...],
+    *,
+    separable: bool,
+    capacity: int,
+    largest_name: str,
+    largest_count: int,
+    should_stop: Callable[[], bool] | None = None,
+    clock: _SolveClock | None = None,
+    deadline: _Deadline | None = None,
+    hint: dict[tuple[int, int], str] | None = None,
+) -> dict[str, Any]:
+    """Strict CP-SAT, then minimising CP-SAT, then constructive placement."""
+    (
+        movable_students,
+        assignable_seats,
+        adjacency,
+        class_by_student,
+        locked_assignments,
+        all_seat_indices,
+        all_seats,
+    ) = prepared
+
+    checkpoint: _Checkpointer | None = None
+    resume: dict[str, Any] | None = None
+    resume_report: dict[str, Any] | None = None
+    if parsed.checkpoint_path is not None or parsed.resume_from is not None:
+        fingerprint = _problem_fingerprint(parsed)
+        selection = _selection_fingerprint(assignable_seats)
+        if parsed.checkpoint_path is not None:
+            checkpoint = _Checkpointer(
+                parsed.checkpoint_path,
+                parsed.checkpoint_interval_seconds,
+                fingerprint,
+                seed=parsed.seed,
+                selection=selection,
+            )
+        if parsed.resume_from is not None:
+            resume, reason = _load_checkpoint(parsed.resume_from, fingerprint, selection)
+            resume_report = {
+                "path": parsed.resume_from,
+                "used": resume is not None,
+                "message": reason,
+            }
+            if resume is not None:
+                resume_report["objective"] = resume["objective"]
+                resume_report["phase"] = resume["phase"]
+
+    result = _run_cp_sat_cascade(
+        parsed,
+        prepared,
+        separable=separable,
+        capacity=capacity,
+        largest_name=largest_name,
+        largest_count=largest_count,
+        should_stop=should_stop,
+        checkpoint=checkpoint,
+        resume=resume,
+        clock=clock,
+        deadline=deadline,
+        hint=hint,
+    )
+    if checkpoint is not None:
+        result["checkpoint"] = {"path": checkpoint.path, "writes": checkpoint.writes}
+    if resume_report is not None:
+        result["resume"] = resume_report
+    return result
+
+
+def _run_cp_sat_cascade(
+    parsed: SeatingProblem,
+    prepared: tuple[Any, ...],
+    *,
+    separable: bool,
+    capacity: int,
+    largest_name: str,
+    largest_count: int,
+    should_stop: Callable[[], bool] | None,
+    checkpoint: _Checkpointer | None,
+    resume: dict[str, Any] | None,
+    clock: _SolveClock | None,
+    deadline: _Deadline | None = None,
+    hint: dict[tuple[int, int], str] | None = None,
+) -> dict[str, Any]:
+    (
+        movable_students,
+        assignable_seats,
+        adjacency,
+        class_by_student,
+        locked_assignments,
+        all_seat_indices,
+        all_seats,
+    ) = prepared
+
+    # The planner routes here whenever the class-level model is expected to
+    # fit the budget. The constructive heuristic below is kept only as a
+    # last-resort fallback when CP-SAT times out or proves infeasible.
+    after = _alternatives_weight(parsed)
+
+    def budget(cap: float, *, later: float = 0.0) -> float:
+        return cap if deadline is None else deadline.share(cap, later=later + after)
 
-    # CP-SAT now handles large halls directly (the class-level model solves
-    # 1000+ seats in seconds), so every exam flows through the exact solver.
-    # The constructive heuristic below is kept only as a last-resort fallback
-    # when CP-SAT times out or proves infeasible.
     if parsed.strict_mode:
-        # Preflight: under 8-directional adjacency a single class can occupy at
-        # most ~a quarter of the hall without neighbours. If the largest class
-        # already exceeds that, strict separation is provably impossible — skip
-        # the expensive infeasibility proof and go straight to minimisation with
-        # an actionable message.
-        capacity = _conflict_free_capacity(assignable_seats)
-        largest_name, largest_count = _largest_movable_class(movable_students)
-        separable = largest_count <= capacity
-
-        if separable:
+        # Preflight: if the largest class already exceeds the conflict-free
+        # capacity, strict separation is provably impossible — skip the
+        # expensive infeasibility proof and go straight to minimisation with
+        # an actionable message. A run resumed from a minimisation checkpoint
+        # already spent its strict phase, so it continues minimising.
+        resumed_in_fallback = resume is not None and resume["phase"] == "fallback"
+        if separable and not resumed_in_fallback:
             strict_result = _solve_assignment(
                 movable_students,
                 assignable_seats,
@@ -1139,7 +4507,19 @@ def solve(raw: dict[str, Any]) -> dict[str, Any]:
                 all_seat_indices,
                 strict=True,
                 seed=parsed.seed,
-                timeout_seconds=parsed.timeout_seconds,
+                # A minimising phase may follow and gets an equal share.
+                timeout_seconds=budget(parsed.timeout_seconds, later=1.0),
+                search_workers=parsed.search_workers,
+                should_stop=should_stop,
+                checkpoint=checkpoint,
+                resume=resume,
+                clock=clock,
+                symmetry=parsed.symmetry_breaking,
+                encoding=parsed.encoding,
+                hint=hint,
+                deadline=deadline,
+                cache_model=True,
+                model_cache=parsed.model_cache,
             )
             if strict_result["status"] in {"optimal", "feasible"} and strict_result[
                 "conflicts_count"
@@ -1166,7 +4546,18 @@ def solve(raw: dict[str, Any]) -> dict[str, Any]:
             all_seat_indices,
             strict=False,
             seed=parsed.seed,
-            timeout_seconds=fallback_timeout,
+            timeout_seconds=budget(fallback_timeout),
+            search_workers=parsed.search_workers,
+            should_stop=should_stop,
+            checkpoint=checkpoint,
+            resume=resume,
+            clock=clock,
+            symmetry=parsed.symmetry_breaking,
+            encoding=parsed.encoding,
+            hint=hint,
+            deadline=deadline,
+            cache_model=True,
+            model_cache=parsed.model_cache,
         )
         if fallback["status"] in {"optimal", "feasible"}:
             fallback["strict_mode"] = True
@@ -1187,6 +4578,7 @@ def solve(raw: dict[str, Any]) -> dict[str, Any]:
             all_seats,
             seed=parsed.seed,
             prefer_zero_conflicts=separable,
+            deadline=deadline,
         )
         constructive["strict_mode"] = True
         if constructive["status"] == "infeasible":
@@ -1216,17 +4608,186 @@ def solve(raw: dict[str, Any]) -> dict[str, Any]:
         all_seat_indices,
         strict=False,
         seed=parsed.seed,
-        timeout_seconds=parsed.timeout_seconds,
+        timeout_seconds=budget(parsed.timeout_seconds),
+        search_workers=parsed.search_workers,
+        should_stop=should_stop,
+        checkpoint=checkpoint,
+        resume=resume,
+        clock=clock,
+        symmetry=parsed.symmetry_breaking,
+        encoding=parsed.encoding,
+        hint=hint,
+        deadline=deadline,
+        cache_model=True,
+        model_cache=parsed.model_cache,
     )
 
 
+def _solve_guarded(raw: Any) -> dict[str, Any]:
+    """Solve one batch problem; a bad problem must not sink the whole batch."""
+    return solve_with_metrics(raw)[0]
+
+
+# Queue a batch worker reports (problem index, monotonic start) on, so the
+# batch starts each problem's deadline when the problem does.
+_batch_starts: Any = None
+
+
+def _init_batch_worker(starts: Any) -> None:
+    global _batch_starts
+    _batch_starts = starts
+
+
+def _solve_batch_task(index: int, raw: Any) -> dict[str, Any]:
+    _batch_starts.put((index, time.monotonic()))
+    return _solve_guarded(raw)
+
+
+def solve_with_metrics(raw: Any) -> tuple[dict[str, Any], dict[str, Any]]:
+    """Solve one payload without raising: the result (an error result for a
+    bad payload or a solver failure) and its metrics sample."""
+    if not isinstance(raw, dict):
+        result = _error("Batch problem must be an object")
+        return result, _metrics_sample(None, result, _SolveClock())
+    clock = _SolveClock()
+    try:
+        return _solve_measured(raw)
+    except Exception as exc:  # noqa: BLE001 - reported per problem
+        result = _error(f"Solver failed: {exc}")
+        return result, _metrics_sample(None, result, clock)
+
+
+def _problem_budget_seconds(raw: Any) -> float:
+    try:
+        deadline = raw.get("deadline_seconds")
+        if deadline is not None:
+            return max(float(deadline), 0.0) + BATCH_GRACE_SECONDS
+        timeout = float(raw.get("timeout_seconds", 0))
+    except (AttributeError, TypeError, ValueError):
+        timeout = 0.0
+    # Strict mode may run CP-SAT twice (strict, then fallback).
+    return max(timeout, 0.0) * 2 + BATCH_GRACE_SECONDS
+
+
+def _batch_pool_context() -> Any:
+    # Fork keeps the already-imported OR-Tools module in every worker, so the
+    # import cost is paid once per batch instead of once per problem.
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+def solve_batch(raw: dict[str, Any]) -> dict[str, Any]:
+    """Solve independent contract-1.0 problems and return results in order.
+
+    Problems run on a process pool sized to the machine (or `max_workers`).
+    Each problem keeps its own `timeout_seconds`, and its deadline runs from
+    when a worker picks it up; CP-SAT threads are shared out so the pool as a
+    whole uses about one thread per CPU.
+    """
+    version = raw.get("contract_version")
+    if version is None:
+        return _batch_error("Missing contract_version")
+    if version not in SUPPORTED_VERSIONS:
+        return _batch_error(f"Unsupported contract_version: {version}")
+
+    problems = raw.get("problems")
+    if not isinstance(problems, list):
+        return _batch_error("problems must be an array")
+    if not problems:
+        return {
+            "contract_version": CONTRACT_VERSION,
+            "status": "ok",
+            "workers": 0,
+            "results": [],
+        }
+
+    cpu_count = os.cpu_count() or 1
+    try:
+        max_workers = int(raw.get("max_workers") or cpu_count)
+    except (TypeError, ValueError):
+        return _batch_error("Invalid max_workers")
+    if max_workers < 1:
+        return _batch_error("max_workers must be a positive integer")
+    workers = min(max_workers, len(problems))
+
+    # Split the CPUs between concurrent problems unless a problem sets its own cap.
+    threads_per_problem = max(1, cpu_count // workers)
+    prepared: list[Any] = []
+    for problem in problems:
+        if isinstance(problem, dict) and problem.get("search_workers") is None:
+            problem = {**problem, "search_workers": threads_per_problem}
+        prepared.append(problem)
+
+    if workers == 1:
+        results = [_solve_guarded(problem) for problem in prepared]
+        return {
+            "contract_version": CONTRACT_VERSION,
+            "status": "ok",
+            "workers": 1,
+            "results": results,
+        }
+
+    budgets = [_problem_budget_seconds(problem) for problem in prepared]
+    # A problem not yet started waits at most for the waves ahead of it, each
+    # bounded by the slowest budget.
+    queued_until = time.monotonic() + math.ceil(len(prepared) / workers) * max(budgets)
+
+    results: list[dict[str, Any]] = []
+    timed_out = False
+    context = _batch_pool_context()
+    starts = context.SimpleQueue()
+    deadlines: dict[int, _Deadline] = {}
+    pool = context.Pool(processes=workers, initializer=_init_batch_worker, initargs=(starts,))
+    try:
+        pending = [
+            pool.apply_async(_solve_batch_task, (index, problem))
+            for index, problem in enumerate(prepared)
+        ]
+        for index, handle in enumerate(pending):
+            while not handle.ready():
+                while not starts.empty():
+                    started, at = starts.get()
+                    deadlines[started] = _Deadline(budgets[started], started=at)
+                expires = deadlines[index].expires if index in deadlines else queued_until
+                if time.monotonic() >= expires:
+                    break
+                handle.wait(BATCH_POLL_SECONDS)
+            if handle.ready():
+                results.append(handle.get())
+            else:
+                timed_out = True
+                results.append(
+                    {
+                        **_error("Batch deadline exceeded before this problem finished"),
+                        "status": "timeout",
+                    }
+                )
+    finally:
+        if timed_out:
+            pool.terminate()
+        else:
+            pool.close()
+        pool.join()
+
+    return {
+        "contract_version": CONTRACT_VERSION,
+        "status": "ok",
+        "workers": workers,
+        "results": results,
+    }
+
+
 def main() -> None:
     try:
         raw = json.load(sys.stdin)
     except json.JSONDecodeError as exc:
         result = _error(f"Invalid JSON input: {exc}")
     else:
-        result = solve(raw)
+        if isinstance(raw, dict) and "problems" in raw:
+            result = solve_batch(raw)
+        else:
+            result = solve(raw)
 
     json.dump(result, sys.stdout, separators=(",", ":"))
     sys.stdout.write("\n")
@@ -0,0 +1,595 @@
+#!/usr/bin/env python3
+"""Differential benchmark for the seating engines.
+
+Replays a corpus of solver payloads through each engine on the same prepared
+problem and checks the invariants every engine must keep:
+
+* each movable student is seated exactly once,
+* no student sits on a disabled or locked seat,
+* locked seats keep their student,
+* the reported conflict count matches a recount over 8-direction adjacency.
+
+Each engine runs in a forked child so its peak RSS is measured on its own
+(the child starts from the parent's resident pages, so compare engines
+against each other rather than reading the figure as absolute cost).
+Rows (one per payload and engine) or a summary per engine and size bucket are
+written as CSV or JSON:
+
+    python seating_benchmark.py corpus/ --summary --format csv
+    python seating_benchmark.py --generate 200,800,2000 --engines constructive,zigzag
+    python seating_benchmark.py corpus/ --engines cp_sat_strict --symmetry none
+    python seating_benchmark.py corpus/ --engines cp_sat --encoding integer --summary
+    python seating_benchmark.py --generate 2000,5000 --classes 12 --build
+
+`--build` times only the CP-SAT model build (strict and minimising phase),
+best of --repeat runs, for comparing model-construction changes between
+revisions.
+
+A corpus is a directory of `*.json` payloads (single problems, batch
+envelopes or seating_corpus recordings) or individual files.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import multiprocessing
+import random
+import resource
+import statistics
+import sys
+import time
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from exam_seating_solver import (
+    CONTRACT_VERSION,
+    ENCODING_AUTO,
+    ENCODING_BOOLEAN,
+    ENCODING_CLIQUE,
+    ROW_DP_MAX_TRANSITIONS,
+    STRATEGY_DEFAULT,
+    SUPPORTED_ENCODINGS,
+    SUPPORTED_SYMMETRY_MODES,
+    SeatingProblem,
+    _SolveClock,
+    _constructive_assign,
+    _default_encoding,
+    _find_conflicts,
+    _parse_input,
+    _prepare_problem,
+    _row_dp_layout,
+    _row_dp_transitions,
+    _seat_key,
+    _solve_assignment,
+    _solve_dsatur,
+    _solve_row_dp,
+    _solve_zigzag,
+)
+from seating_corpus import unwrap
+
+# Upper bounds (movable students) of the size buckets used in summaries.
+SIZE_BUCKETS = ((100, "0-100"), (500, "101-500"), (2000, "501-2000"))
+LARGEST_BUCKET = "2001+"
+ROW_FIELDS = (
+    "payload",
+    "engine",
+    "bucket",
+    "students",
+    "seats",
+    "status",
+    "seconds",
+    "conflicts",
+    "peak_rss_mb",
+    "violations",
+)
+SUMMARY_FIELDS = (
+    "engine",
+    "bucket",
+    "runs",
+    "failed_runs",
+    "mean_seconds",
+    "max_seconds",
+    "mean_conflicts",
+    "max_conflicts",
+    "max_peak_rss_mb",
+)
+BUILD_FIELDS = ("payload", "students", "seats", "phase", "encoding", "build_seconds")
+
+
+def _run_cp_sat(parsed: SeatingProblem, prepared: tuple[Any, ...]) -> dict[str, Any]:
+    movable, assignable, adjacency, class_by_student, locked, all_indices, all_seats = prepared
+    return _solve_assignment(
+        movable,
+        assignable,
+        adjacency,
+        class_by_student,
+        locked,
+        all_seats,
+        all_indices,
+        strict=False,
+        seed=parsed.seed,
+        timeout_seconds=parsed.timeout_seconds,
+        search_workers=parsed.search_workers,
+        symmetry=parsed.symmetry_breaking,
+        encoding=parsed.encoding,
+    )
+
+
+def _run_cp_sat_strict(parsed: SeatingProblem, prepared: tuple[Any, ...]) -> dict[str, Any]:
+    movable, assignable, adjacency, class_by_student, locked, all_indices, all_seats = prepared
+    return _solve_assignment(
+        movable,
+        assignable,
+        adjacency,
+        class_by_student,
+        locked,
+        all_seats,
+        all_indices,
+        strict=True,
+        seed=parsed.seed,
+        timeout_seconds=parsed.timeout_seconds,
+        search_workers=parsed.search_workers,
+        symmetry=parsed.symmetry_breaking,
+        encoding=parsed.encoding,
+    )
+
+
+def _run_constructive(parsed: SeatingProblem, prepared: tuple[Any, ...]) -> dict[str, Any]:
+    movable, assignable, adjacency, class_by_student, locked, _, all_seats = prepared
+    return _constructive_assign(
+        movable,
+        assignable,
+        adjacency,
+        class_by_student,
+        locked,
+        all_seats,
+        seed=parsed.seed,
+        prefer_zero_conflicts=parsed.strict_mode,
+    )
+
+
+def _run_zigzag(parsed: SeatingProblem, prepared: tuple[Any, ...]) -> dict[str, Any]:
+    movable, assignable, adjacency, class_by_student, locked, _, all_seats = prepared
+    # Four colours: the king-move lattice the benchmark adjacency measures.
+    return _solve_zigzag(
+        movable,
+        assignable,
+        adjacency,
+        class_by_student,
+        locked,
+        all_seats,
+        seed=parsed.seed,
+        colors=4,
+    )
+
+
+def _run_dsatur(parsed: SeatingProblem, prepared: tuple[Any, ...]) -> dict[str, Any]:
+    movable, assignable, adjacency, class_by_student, locked, _, all_seats = prepared
+    return _solve_dsatur(movable, assignable, adjacency, class_by_student, locked, all_seats)
+
+
+def _run_row_dp(parsed: SeatingProblem, prepared: tuple[Any, ...]) -> dict[str, Any]:
+    movable, assignable, adjacency, class_by_student, locked, _, all_seats = prepared
+    class_ids, _, free = _row_dp_layout(movable, assignable, class_by_student, locked, all_seats)
+    sizes = [sum(1 for s in movable if s.separation_group_id == c) for c in class_ids]
+    if _row_dp_transitions(free, sizes) > ROW_DP_MAX_TRANSITIONS:
+        return {"status": "error", "message": "row DP state space too large", "assignments": []}
+    return _solve_row_dp(
+        movable,
+        assignable,
+        adjacency,
+        class_by_student,
+        locked,
+        all_seats,
+        strict=False,
+    )
+
+
+ENGINES: dict[str, Callable[[SeatingProblem, tuple[Any, ...]], dict[str, Any]]] = {
+    "cp_sat": _run_cp_sat,
+    "cp_sat_strict": _run_cp_sat_strict,
+    "constructive": _run_constructive,
+    "zigzag": _run_zigzag,
+    "row_dp": _run_row_dp,
+    "dsatur": _run_dsatur,
+}
+# Engines compared when --engines is not given (the three production paths).
+DEFAULT_ENGINES = ("cp_sat", "constructive", "zigzag")
+
+
+def size_bucket(students: int) -> str:
+    for upper, label in SIZE_BUCKETS:
+        if students <= upper:
+            return label
+    return LARGEST_BUCKET
+
+
+def check_invariants(
+    prepared: tuple[Any, ...],
+    result: dict[str, Any],
+) -> list[str]:
+    """Contract violations in `result` for the prepared problem (empty if none)."""
+    movable, assignable, adjacency, class_by_student, locked, _, all_seats = prepared
+    if result.get("status") not in {"optimal", "feasible"}:
+        return []
+
+    violations: list[str] = []
+    seat_by_key = {_seat_key(seat): seat for seat in all_seats}
+    seat_index_by_key = {_seat_key(seat): idx for idx, seat in enumerate(all_seats)}
+    locked_by_key = {(item["row"], item["col"]): item["exam_student_id"] for item in locked}
+    movable_ids = {s.exam_student_id for s in movable}
+
+    seen: dict[str, int] = {}
+    occupied: set[tuple[int, int]] = set()
+    assignment_by_seat: dict[int, str] = {}
+    for item in result.get("assignments", []):
+        sid = item["exam_student_id"]
+        key = (item["row"], item["col"])
+        seen[sid] = seen.get(sid, 0) + 1
+        seat = seat_by_key.get(key)
+        if seat is None:
+            violations.append(f"{sid} placed outside the hall at {key}")
+            continue
+        if key in occupied:
+            violations.append(f"seat {key} used twice")
+        occupied.add(key)
+        if seat.is_disabled:
+            violations.append(f"{sid} placed on disabled seat {key}")
+        if key in locked_by_key:
+            if locked_by_key[key] != sid:
+                violations.append(f"locked seat {key} holds {sid}")
+        elif seat.locked:
+            violations.append(f"{sid} placed on locked seat {key}")
+        elif sid in movable_ids:
+            assignment_by_seat[seat_index_by_key[key]] = sid
+
+    for sid in movable_ids:
+        if seen.get(sid, 0) != 1:
+            violations.append(f"{sid} seated {seen.get(sid, 0)} times")
+    for key, sid in locked_by_key.items():
+        if seen.get(sid, 0) != 1:
+            violations.append(f"locked {sid} missing from {key}")
+
+    locked_by_seat = {seat_index_by_key[key]: sid for key, sid in locked_by_key.items()}
+    recount, _ = _find_conflicts(
+        assignment_by_seat, adjacency, all_seats, class_by_student, locked_by_seat
+    )
+    if recount != result.get("conflicts_count"):
+        violations.append(
+            f"reported {result.get('conflicts_count')} conflicts, recount {recount}"
+        )
+    return violations
+
+
+def _engine_child(
+    engine: str,
+    parsed: SeatingProblem,
+    prepared: tuple[Any, ...],
+    conn: Any,
+) -> None:
+    started = time.perf_counter()
+    try:
+        result = ENGINES[engine](parsed, prepared)
+    except Exception as exc:  # noqa: BLE001 - reported as a failed run
+        result = {"status": "error", "message": str(exc), "assignments": []}
+    seconds = time.perf_counter() - started
+    # Linux reports ru_maxrss in KiB.
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    conn.send((result, seconds, peak_mb))
+    conn.close()
+
+
+def run_engine(
+    engine: str,
+    parsed: SeatingProblem,
+    prepared: tuple[Any, ...],
+) -> tuple[dict[str, Any], float, float]:
+    """Run one engine in a forked child: (result, seconds, peak RSS in MB)."""
+    ctx = multiprocessing.get_context("fork")
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_engine_child, args=(engine, parsed, prepared, child_conn))
+    process.start()
+    child_conn.close()
+    try:
+        return parent_conn.recv()
+    except EOFError:
+        return {"status": "error", "message": "engine process died", "assignments": []}, 0.0, 0.0
+    finally:
+        process.join()
+
+
+def benchmark_payload(
+    name: str,
+    raw: dict[str, Any],
+    engines: Iterable[str],
+) -> list[dict[str, Any]]:
+    parsed = _parse_input(raw)
+    if isinstance(parsed, dict):
+        return [
+            _row(name, engine, parsed, 0, 0, 0.0, 0.0, [parsed["message"]]) for engine in engines
+        ]
+    # Every engine sees the same default preparation: evenly spaced seats and
+    # 8-direction adjacency.
+    prepared = _prepare_problem(replace(parsed, strategy=STRATEGY_DEFAULT))
+    if isinstance(prepared, dict):
+        return [
+            _row(name, engine, prepared, len(parsed.students), len(parsed.seats), 0.0, 0.0, [])
+            for engine in engines
+        ]
+
+    rows = []
+    for engine in engines:
+        result, seconds, peak_mb = run_engine(engine, parsed, prepared)
+        violations = check_invariants(prepared, result)
+        if result.get("status") == "error":
+            violations.append(result.get("message") or "engine error")
+        rows.append(
+            _row(
+                name,
+                engine,
+                result,
+                len(prepared[0]),
+                len(prepared[1]),
+                seconds,
+                peak_mb,
+                violations,
+            )
+        )
+    return rows
+
+
+def benchmark_build(
+    name: str,
+    raw: dict[str, Any],
+    *,
+    encoding: str = ENCODING_AUTO,
+    repeat: int = 1,
+) -> list[dict[str, Any]]:
+    """Seconds to build the class-level CP-SAT model for the strict and the
+    minimising phase; the search itself gets no time."""
+    parsed = _parse_input(raw)
+    if isinstance(parsed, dict):
+        return []
+    prepared = _prepare_problem(replace(parsed, strategy=STRATEGY_DEFAULT))
+    if isinstance(prepared, dict):
+        return []
+    movable, assignable, adjacency, class_by_student, locked, all_indices, all_seats = prepared
+    classes = len({student.separation_group_id for student in movable})
+    rows = []
+    for strict in (True, False):
+        used = encoding
+        if used == ENCODING_AUTO:
+            used = _default_encoding(len(assignable), classes, strict=strict)
+        if used == ENCODING_CLIQUE and not strict:
+            used = ENCODING_BOOLEAN
+        times = []
+        for _ in range(repeat):
+            clock = _SolveClock()
+            _solve_assignment(
+                movable,
+                assignable,
+                adjacency,
+                class_by_student,
+                locked,
+                all_seats,
+                all_indices,
+                strict=strict,
+                seed=parsed.seed,
+                timeout_seconds=0.0,
+                search_workers=1,
+                clock=clock,
+                symmetry=parsed.symmetry_breaking,
+                encoding=used,
+            )
+            times.append(clock.phases.get("build", 0.0))
+        rows.append(
+            {
+                "payload": name,
+                "students": len(movable),
+                "seats": len(assignable),
+                "phase": "strict" if strict else "minimise",
+                "encoding": used,
+                "build_seconds": round(min(times), 4),
+            }
+        )
+    return rows
+
+
+def _row(
+    name: str,
+    engine: str,
+    result: dict[str, Any],
+    students: int,
+    seats: int,
+    seconds: float,
+    peak_mb: float,
+    violations: list[str],
+) -> dict[str, Any]:
+    return {
+        "payload": name,
+        "engine": engine,
+        "bucket": size_bucket(students),
+        "students": students,
+        "seats": seats,
+        "status": result.get("status"),
+        "seconds": round(seconds, 4),
+        "conflicts": result.get("conflicts_count", 0),
+        "peak_rss_mb": round(peak_mb, 1),
+        "violations": "; ".join(violations),
+    }
+
+
+def summarize(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    groups: dict[tuple[str, str], list[dict[str, Any]]] = {}
+    for row in rows:
+        groups.setdefault((row["engine"], row["bucket"]), []).append(row)
+    summary = []
+    for (engine, bucket), items in sorted(groups.items()):
+        seconds = [item["seconds"] for item in items]
+        conflicts = [item["conflicts"] for item in items]
+        summary.append(
+            {
+                "engine": engine,
+                "bucket": bucket,
+                "runs": len(items),
+                "failed_runs": sum(1 for item in items if item["violations"]),
+                "mean_seconds": round(statistics.fmean(seconds), 4),
+                "max_seconds": max(seconds),
+                "mean_conflicts": round(statistics.fmean(conflicts), 2),
+                "max_conflicts": max(conflicts),
+                "max_peak_rss_mb": max(item["peak_rss_mb"] for item in items),
+            }
+        )
+    return summary
+
+
+def load_corpus(paths: Iterable[str]) -> list[tuple[str, dict[str, Any]]]:
+    """(name, payload) pairs; batch envelopes expand to one entry per problem."""
+    entries: list[tuple[str, dict[str, Any]]] = []
+    for path_str in paths:
+        path = Path(path_str)
+        files = sorted(path.glob("*.json")) if path.is_dir() else [path]
+        for file in files:
+            raw, _ = unwrap(json.loads(file.read_text(encoding="utf-8")))
+            if isinstance(raw, dict) and isinstance(raw.get("problems"), list):
+                entries.extend(
+                    (f"{file.name}#{i}", problem) for i, problem in enumerate(raw["problems"])
+                )
+            else:
+                entries.append((file.name, raw))
+    return entries
+
+
+def generate_payload(
+    students: int,
+    *,
+    classes: int = 4,
+    locked_fraction: float = 0.02,
+    disabled_fraction: float = 0.05,
+    seed: int = 0,
+    timeout_seconds: float = 10.0,
+) -> dict[str, Any]:
+    """Synthetic hall with ~20% spare seats, a few disabled and locked seats."""
+    rng = random.Random(seed)
+    seats_needed = int(students * 1.2 / (1 - disabled_fraction)) + 1
+    cols = max(4, int(seats_needed**0.5))
+    rows = -(-seats_needed // cols)
+    problem = SeatingProblem.grid(
+        rows, cols, strict_mode=True, seed=seed, timeout_seconds=timeout_seconds
+    )
+    for i in range(students):
+        problem.add_student(f"s{i}", f"class-{rng.randrange(classes)}")
+
+    cells = [(r, c) for r in range(rows) for c in range(cols)]
+    rng.shuffle(cells)
+    disabled = int(len(cells) * disabled_fraction)
+    for r, c in cells[:disabled]:
+        problem.disable_seat(r, c)
+    locked = int(students * locked_fraction)
+    for i, (r, c) in enumerate(cells[disabled : disabled + locked]):
+        problem.lock_seat(r, c, f"s{i}")
+    return problem.to_payload()
+
+
+def write_rows(rows: list[dict[str, Any]], fields: tuple[str, ...], fmt: str, out: Any) -> None:
+    if fmt == "json":
+        json.dump(rows, out, indent=2)
+        out.write("\n")
+        return
+    writer = csv.DictWriter(out, fieldnames=fields)
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare seating engines on a payload corpus.")
+    parser.add_argument("corpus", nargs="*", help="payload files or directories of *.json")
+    parser.add_argument(
+        "--generate",
+        help="comma-separated student counts for synthetic payloads (added to the corpus)",
+    )
+    parser.add_argument("--classes", type=int, default=4, help="classes per synthetic payload")
+    parser.add_argument(
+        "--engines", default=",".join(DEFAULT_ENGINES), help="comma-separated engines"
+    )
+    parser.add_argument("--timeout", type=float, help="override timeout_seconds for every payload")
+    parser.add_argument(
+        "--symmetry",
+        choices=sorted(SUPPORTED_SYMMETRY_MODES),
+        help="override symmetry_breaking for the CP-SAT engines",
+    )
+    parser.add_argument(
+        "--encoding",
+        choices=sorted(SUPPORTED_ENCODINGS),
+        help="override the CP-SAT model encoding",
+    )
+    parser.add_argument(
+        "--summary", action="store_true", help="aggregate per engine and size bucket"
+    )
+    parser.add_argument(
+        "--build", action="store_true", help="time the CP-SAT model build instead of engines"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="runs per payload with --build (best is kept)"
+    )
+    parser.add_argument("--format", choices=("csv", "json"), default="csv")
+    parser.add_argument("--output", help="write here instead of stdout")
+    args = parser.parse_args(argv)
+
+    engines = [name.strip() for name in args.engines.split(",") if name.strip()]
+    unknown = [name for name in engines if name not in ENGINES]
+    if unknown:
+        parser.error(f"unknown engines: {', '.join(unknown)}")
+
+    corpus = load_corpus(args.corpus)
+    if args.generate:
+        for count in (int(part) for part in args.generate.split(",")):
+            corpus.append(
+                (f"generated-{count}", generate_payload(count, classes=args.classes, seed=count))
+            )
+    if not corpus:
+        parser.error("no payloads: pass corpus paths or --generate")
+
+    if args.build:
+        build_rows = [
+            row
+            for name, raw in corpus
+            for row in benchmark_build(
+                name,
+                {**raw, "contract_version": raw.get("contract_version", CONTRACT_VERSION)},
+                encoding=args.encoding or ENCODING_AUTO,
+                repeat=max(1, args.repeat),
+            )
+        ]
+        if args.output:
+            with open(args.output, "w", encoding="utf-8", newline="") as out:
+                write_rows(build_rows, BUILD_FIELDS, args.format, out)
+        else:
+            write_rows(build_rows, BUILD_FIELDS, args.format, sys.stdout)
+        return 0
+
+    rows: list[dict[str, Any]] = []
+    for name, raw in corpus:
+        if args.timeout is not None:
+            raw = {**raw, "timeout_seconds": args.timeout}
+        if args.symmetry is not None:
+            raw = {**raw, "symmetry_breaking": args.symmetry}
+        if args.encoding is not None:
+            raw = {**raw, "encoding": args.encoding}
+        raw.setdefault("contract_version", CONTRACT_VERSION)
+        rows.extend(benchmark_payload(name, raw, engines))
+
+    table, fields = (summarize(rows), SUMMARY_FIELDS) if args.summary else (rows, ROW_FIELDS)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as out:
+            write_rows(table, fields, args.format, out)
+    else:
+        write_rows(table, fields, args.format, sys.stdout)
+    return 1 if any(row["violations"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
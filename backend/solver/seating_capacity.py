@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""Capacity planning: the rooms an exam needs for a zero-conflict seating.
+
+Takes class sizes and candidate halls (rows x cols grids, optionally with
+disabled seats) and returns the smallest set of rooms, fewest seats among
+equals, with a class-to-room split the solver can seat without same-class
+neighbours. No CP-SAT solve runs; planning takes milliseconds.
+
+The split comes with a certificate. A hall's seats fall into four
+(row % 2, col % 2) parity groups, and no two seats of one group are king-move
+neighbours, so any split that keeps each class's students in a room inside a
+single parity group of that room is conflict-free, and a strict solve of each
+room can find a zero-conflict layout. Classes are packed largest first: a
+class goes whole into the tightest group that holds it, otherwise it is spread
+over the largest free groups, one group per room (two groups of one room
+always share neighbours). When even every hall together fails, the response
+names the binding bound: seats, or the largest class against the halls'
+single-class capacity.
+
+    python seating_capacity.py < plan.json
+
+    {"contract_version": "1.0",
+     "classes": [{"exam_class_id": "A", "students": 40}, ...],
+     "halls": [{"id": "hall-1", "rows": 10, "cols": 12,
+                "disabled_seats": [{"row": 0, "col": 0}]}, ...]}
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import math
+import sys
+from dataclasses import dataclass
+from typing import Any
+
+from exam_seating_solver import (
+    CONTRACT_VERSION,
+    SUPPORTED_VERSIONS,
+    SeatCell,
+    conflict_free_capacity,
+    parity_groups,
+    parity_split,
+)
+
+# Room sets of one size are enumerated exhaustively (smallest total seats
+# first) up to this many combinations; beyond it only the largest halls are
+# tried for that room count.
+PLAN_MAX_COMBINATIONS = 20_000
+
+
+@dataclass(frozen=True)
+class PlannedHall:
+    hall_id: str
+    seats: int
+    # Usable seats in each (row % 2, col % 2) parity group.
+    groups: tuple[int, int, int, int]
+    single_class_capacity: int
+
+
+def _plan_error(message: str) -> dict[str, Any]:
+    return {
+        "contract_version": CONTRACT_VERSION,
+        "status": "error",
+        "message": message,
+        "rooms": [],
+    }
+
+
+def _parse_hall(item: Any) -> PlannedHall:
+    rows, cols = int(item["rows"]), int(item["cols"])
+    if rows < 1 or cols < 1:
+        raise ValueError("rows and cols must be positive")
+    disabled = {
+        (int(seat["row"]), int(seat["col"])) for seat in item.get("disabled_seats") or []
+    }
+    seats = [
+        SeatCell(
+            row=r,
+            col=c,
+            seat_number=r * cols + c + 1,
+            is_disabled=False,
+            locked=False,
+            exam_student_id=None,
+        )
+        for r in range(rows)
+        for c in range(cols)
+        if (r, c) not in disabled
+    ]
+    return PlannedHall(
+        hall_id=str(item["id"]),
+        seats=len(seats),
+        groups=parity_groups(seats),
+        single_class_capacity=conflict_free_capacity(seats),
+    )
+
+
+def _room_sets(halls: list[PlannedHall], count: int) -> list[tuple[int, ...]]:
+    if math.comb(len(halls), count) > PLAN_MAX_COMBINATIONS:
+        largest = sorted(range(len(halls)), key=lambda h: (-halls[h].seats, h))
+        return [tuple(sorted(largest[:count]))]
+    return sorted(
+        itertools.combinations(range(len(halls)), count),
+        key=lambda combo: (sum(halls[h].seats for h in combo), combo),
+    )
+
+
+def _shortfall(classes: list[tuple[str, int]], halls: list[PlannedHall]) -> str:
+    students = sum(size for _, size in classes)
+    seats = sum(hall.seats for hall in halls)
+    if students > seats:
+        return f"{students} students but the halls have only {seats} usable seats"
+    class_id, size = max(classes, key=lambda item: (item[1], item[0]))
+    capacity = sum(hall.single_class_capacity for hall in halls)
+    if size > capacity:
+        return (
+            f"Class '{class_id}' has {size} students, but all halls together hold at "
+            f"most {capacity} of a single class without same-class neighbours"
+        )
+    return "No zero-conflict class split found across all halls; add a hall"
+
+
+def plan_capacity(raw: Any) -> dict[str, Any]:
+    """Smallest set of candidate halls, and the class split, that seats every
+    class with zero same-class neighbours."""
+    if not isinstance(raw, dict):
+        return _plan_error("Payload must be an object")
+    version = raw.get("contract_version")
+    if version is None:
+        return _plan_error("Missing contract_version")
+    if version not in SUPPORTED_VERSIONS:
+        return _plan_error(f"Unsupported contract_version: {version}")
+    try:
+        classes = [
+            (str(item["exam_class_id"]), int(item["students"])) for item in raw["classes"]
+        ]
+    except (KeyError, TypeError, ValueError):
+        return _plan_error("Invalid classes payload")
+    if any(size < 0 for _, size in classes):
+        return _plan_error("Class sizes must not be negative")
+    if len({class_id for class_id, _ in classes}) != len(classes):
+        return _plan_error("Duplicate exam_class_id in classes list")
+    try:
+        halls = [_parse_hall(item) for item in raw["halls"]]
+    except (KeyError, TypeError, ValueError):
+        return _plan_error("Invalid halls payload")
+    if not halls:
+        return _plan_error("halls must not be empty")
+    classes = [(class_id, size) for class_id, size in classes if size > 0]
+
+    for count in range(1, len(halls) + 1):
+        for combo in _room_sets(halls, count):
+            chosen = [halls[h] for h in combo]
+            split = parity_split(classes, [hall.groups for hall in chosen])
+            if split is None:
+                continue
+            return {
+                "contract_version": CONTRACT_VERSION,
+                "status": "ok",
+                "rooms_needed": count,
+                "total_seats": sum(hall.seats for hall in chosen),
+                "students": sum(size for _, size in classes),
+                "rooms": [
+                    {
+                        "id": hall.hall_id,
+                        "seats": hall.seats,
+                        "single_class_capacity": hall.single_class_capacity,
+                        "students": sum(room.values()),
+                        "classes": [
+                            {"exam_class_id": class_id, "students": size}
+                            for class_id, size in room.items()
+                        ],
+                    }
+                    for hall, room in zip(chosen, split)
+                ],
+            }
+    return {
+        "contract_version": CONTRACT_VERSION,
+        "status": "insufficient",
+        "message": _shortfall(classes, halls),
+        "rooms": [],
+    }
+
+
+def main() -> None:
+    try:
+        raw = json.load(sys.stdin)
+    except json.JSONDecodeError as exc:
+        result = _plan_error(f"Invalid JSON input: {exc}")
+    else:
+        result = plan_capacity(raw)
+    json.dump(result, sys.stdout, separators=(",", ":"))
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
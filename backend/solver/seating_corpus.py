@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Recorded solver payloads: the corpus the replay benchmark runs.
+
+With the payload option `record_corpus` set to a directory, each solve writes
+one recording there: the input payload with student, class and separation
+group IDs replaced by stable hashes, and the outcome it got (status, conflicts,
+wall time, phases and engine chain). The same ID always hashes to the same
+value, so classes and locked seats keep their structure across a recording
+while the real identifiers never reach the corpus. File paths and other
+per-deployment options (checkpoints, logs, metrics) are dropped.
+
+Recordings are named after a hash of the anonymised payload, so re-solving an
+identical input overwrites its recording instead of duplicating it.
+`seating_replay.py` re-runs a corpus against the current code or another
+checkout and reports the latency and conflict deltas per payload.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from typing import Any
+
+RECORDING_KIND = "exam_seating_recording"
+
+# Payload keys that only describe the deployment a solve ran in.
+OPERATIONAL_KEYS = frozenset(
+    {
+        "record_corpus",
+        "model_cache",
+        "metrics_textfile",
+        "solve_log",
+        "timing_model",
+        "adaptive_timeout",
+        "checkpoint",
+        "resume_from",
+    }
+)
+# Identifier fields replaced by hashes, wherever they appear in seats/students.
+ID_FIELDS = ("exam_student_id", "exam_class_id", "separation_group_id")
+
+
+def anonymise_id(value: Any) -> Any:
+    """Stable, prefix-tagged hash of an identifier. Missing values stay as they
+    are: an empty separation group means "the student's class"."""
+    if value is None or value == "":
+        return value
+    digest = hashlib.sha256(str(value).encode("utf-8")).hexdigest()
+    return f"anon-{digest[:16]}"
+
+
+def _anonymise_entry(entry: Any) -> Any:
+    if not isinstance(entry, dict):
+        return entry
+    return {
+        key: anonymise_id(value) if key in ID_FIELDS else value for key, value in entry.items()
+    }
+
+
+def anonymise_payload(raw: dict[str, Any]) -> dict[str, Any]:
+    """The payload without operational options and with hashed identifiers."""
+    payload = {key: value for key, value in raw.items() if key not in OPERATIONAL_KEYS}
+    for key in ("seats", "students"):
+        if isinstance(payload.get(key), list):
+            payload[key] = [_anonymise_entry(entry) for entry in payload[key]]
+    return payload
+
+
+def recording_name(payload: dict[str, Any]) -> str:
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:20] + ".json"
+
+
+def write_recording(
+    directory: str,
+    raw: dict[str, Any],
+    result: dict[str, Any],
+    sample: dict[str, Any],
+) -> str:
+    """Record one solve into the corpus directory; returns the file written."""
+    payload = anonymise_payload(raw)
+    recording = {
+        "kind": RECORDING_KIND,
+        "recorded_at": time.time(),
+        "payload": payload,
+        "outcome": {
+            "status": result.get("status"),
+            "mode_used": result.get("mode_used"),
+            "conflicts_count": result.get("conflicts_count"),
+            "seconds": sample.get("seconds"),
+            "phases": sample.get("phases") or {},
+            "chain": (result.get("plan") or {}).get("chain") or [],
+        },
+    }
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, recording_name(payload))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(recording, handle, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return path
+
+
+def unwrap(raw: Any) -> tuple[Any, dict[str, Any] | None]:
+    """(payload, recorded outcome) of a corpus file; plain payloads have no
+    outcome."""
+    if isinstance(raw, dict) and raw.get("kind") == RECORDING_KIND:
+        return raw.get("payload"), raw.get("outcome")
+    return raw, None
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""Prometheus metrics for seating solves, in the plain text exposition format.
+
+Each solve is summarised as a small sample dict (see
+`exam_seating_solver._metrics_sample`) and recorded into a `MetricsRegistry`:
+solves by status, mode_used, strategy and first engine; solve and phase
+latencies; model sizes; conflicts; cache lookups; and exhausted budgets.
+
+The solver service keeps one registry for its lifetime and serves it on
+`GET /metrics`. One-shot CLI runs (payload option `metrics_textfile`) merge
+their sample into a `.prom` file for node_exporter's textfile collector, so
+counters keep accumulating across processes. Latency percentiles come from
+the histograms, e.g.
+
+    histogram_quantile(0.95, sum by (le) (rate(exam_seating_solve_seconds_bucket[1d])))
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import re
+import time
+from typing import Any
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows development machines
+    fcntl = None
+
+# Solve budgets run from seconds up to the 900 s cap in config/exam_seating.php.
+LATENCY_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 900, 1800)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8)
+CONFLICT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+# name -> (type, help, histogram buckets)
+METRICS: dict[str, tuple[str, str, tuple[float, ...]]] = {
+    "exam_seating_solves_total": (
+        "counter", "Seating solves by status, mode_used, strategy and first engine.", ()
+    ),
+    "exam_seating_timeouts_total": (
+        "counter", "Seating solves that used their whole time budget.", ()
+    ),
+    "exam_seating_cache_lookups_total": (
+        "counter", "Solver cache lookups by cache and outcome (hit or miss).", ()
+    ),
+    "exam_seating_solve_seconds": (
+        "histogram", "Wall time of a seating solve.", LATENCY_BUCKETS
+    ),
+    "exam_seating_phase_seconds": (
+        "histogram", "Wall time of each solve phase.", LATENCY_BUCKETS
+    ),
+    "exam_seating_model_variables": (
+        "histogram", "Estimated CP-SAT model variables per solve.", SIZE_BUCKETS
+    ),
+    "exam_seating_model_constraints": (
+        "histogram", "Estimated CP-SAT model constraints per solve.", SIZE_BUCKETS
+    ),
+    "exam_seating_conflicts": (
+        "histogram", "Adjacent same-class pairs left in the returned layout.", CONFLICT_BUCKETS
+    ),
+    "exam_seating_last_solve_timestamp_seconds": (
+        "gauge", "Unix time the last solve finished.", ()
+    ),
+    "exam_seating_jobs_total": (
+        "counter", "Solver service jobs by final state.", ()
+    ),
+    "exam_seating_queue_wait_seconds": (
+        "histogram", "Time a service job waited in the queue before a worker took it.",
+        LATENCY_BUCKETS,
+    ),
+    "exam_seating_queued_jobs": ("gauge", "Service jobs waiting in the queue.", ()),
+    "exam_seating_running_jobs": ("gauge", "Service jobs running on a worker.", ()),
+    "exam_seating_threads_in_use": ("gauge", "CP-SAT search threads in flight.", ()),
+}
+
+Labels = tuple[tuple[str, str], ...]
+
+_SERIES_LINE = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)$")
+_LABEL_PAIR = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def metric_labels(**labels: Any) -> Labels:
+    """The label set of one series, in the registry's canonical order."""
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _unescape(value: str) -> str:
+    return re.sub(r"\\(.)", lambda m: "\n" if m.group(1) == "n" else m.group(1), value)
+
+
+def _family(series_name: str) -> str | None:
+    if series_name in METRICS:
+        return series_name
+    for suffix in ("_bucket", "_sum", "_count"):
+        base = series_name[: -len(suffix)]
+        if series_name.endswith(suffix) and METRICS.get(base, ("",))[0] == "histogram":
+            return base
+    return None
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms keyed by (series name, labels)."""
+
+    def __init__(self) -> None:
+        self._series: dict[tuple[str, Labels], float] = {}
+
+    def inc(self, name: str, labels: Labels = (), amount: float = 1.0) -> None:
+        key = (name, labels)
+        self._series[key] = self._series.get(key, 0.0) + amount
+
+    def set(self, name: str, labels: Labels = (), value: float = 0.0) -> None:
+        self._series[(name, labels)] = float(value)
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        for bound in (*METRICS[name][2], math.inf):
+            key = (f"{name}_bucket", (*labels, ("le", _format_value(bound))))
+            self._series[key] = self._series.get(key, 0.0) + (1.0 if value <= bound else 0.0)
+        self.inc(f"{name}_sum", labels, value)
+        self.inc(f"{name}_count", labels)
+
+    def value(self, name: str, labels: Labels = ()) -> float:
+        return self._series.get((name, labels), 0.0)
+
+    def record_solve(self, sample: dict[str, Any]) -> None:
+        """Count one solve from its metrics sample."""
+        strategy = sample.get("strategy") or "unknown"
+        engine = sample.get("engine") or "none"
+        self.inc(
+            "exam_seating_solves_total",
+            metric_labels(
+                status=sample.get("status") or "unknown",
+                mode_used=sample.get("mode_used") or "none",
+                strategy=strategy,
+                engine=engine,
+            ),
+        )
+        if sample.get("timed_out"):
+            self.inc("exam_seating_timeouts_total", metric_labels(strategy=strategy))
+        for cache, outcome in sorted((sample.get("cache") or {}).items()):
+            self.inc(
+                "exam_seating_cache_lookups_total", metric_labels(cache=cache, outcome=outcome)
+            )
+        if sample.get("seconds") is not None:
+            self.observe(
+                "exam_seating_solve_seconds",
+                metric_labels(strategy=strategy, engine=engine),
+                sample["seconds"],
+            )
+        for phase, seconds in sorted((sample.get("phases") or {}).items()):
+            self.observe("exam_seating_phase_seconds", metric_labels(phase=phase), seconds)
+        for key in ("variables", "constraints"):
+            if sample.get(key) is not None:
+                self.observe(f"exam_seating_model_{key}", (), sample[key])
+        if sample.get("conflicts") is not None:
+            self.observe(
+                "exam_seating_conflicts",
+                metric_labels(mode_used=sample.get("mode_used") or "none"),
+                sample["conflicts"],
+            )
+        self.set("exam_seating_last_solve_timestamp_seconds", (), time.time())
+
+    def render(self) -> str:
+        """The registry in the Prometheus text exposition format."""
+        by_family: dict[str, list[str]] = {}
+        for (name, labels), value in self._series.items():
+            family = _family(name)
+            if family is None:
+                continue
+            rendered = ",".join(f'{key}="{_escape(val)}"' for key, val in labels)
+            series = f"{name}{{{rendered}}}" if rendered else name
+            by_family.setdefault(family, []).append(f"{series} {_format_value(value)}")
+        lines = []
+        for family, (kind, help_text, _) in METRICS.items():
+            if family in by_family:
+                lines.append(f"# HELP {family} {help_text}")
+                lines.append(f"# TYPE {family} {kind}")
+                lines.extend(by_family[family])
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def load(self, text: str) -> None:
+        """Read back series rendered by `render`; unknown lines are skipped."""
+        for line in text.splitlines():
+            match = _SERIES_LINE.match(line.strip())
+            if match is None or _family(match.group(1)) is None:
+                continue
+            labels = tuple(
+                (key, _unescape(val)) for key, val in _LABEL_PAIR.findall(match.group(2) or "")
+            )
+            try:
+                self._series[(match.group(1), labels)] = float(match.group(3))
+            except ValueError:
+                continue
+
+
+def write_textfile(path: str, sample: dict[str, Any]) -> None:
+    """Merge one solve into a textfile-collector file.
+
+    Concurrent one-shot solves serialise on a lock file next to it; the
+    collector only reads `*.prom`, so the lock and temp files are ignored.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(f"{path}.lock", "a", encoding="utf-8") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        registry = MetricsRegistry()
+        try:
+            with open(path, encoding="utf-8") as handle:
+                registry.load(handle.read())
+        except FileNotFoundError:
+            pass
+        registry.record_solve(sample)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            handle.write(registry.render())
+        os.replace(tmp_path, path)
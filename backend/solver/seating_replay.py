@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""Replay a recorded payload corpus and report latency and conflict deltas.
+
+Runs every payload of a corpus (see seating_corpus: recordings written with the
+`record_corpus` option, or plain payload files) through a solver and compares
+each outcome against a baseline, one row per payload:
+
+    python seating_replay.py corpus/
+    python seating_replay.py corpus/ --solver ../candidate/backend/solver/exam_seating_solver.py \\
+        --baseline current --repeat 3 --format json
+
+`--solver` and `--baseline` take `current` (this checkout, in-process) or the
+path of another checkout's `exam_seating_solver.py`, which runs as a CLI
+subprocess per payload; its wall time then includes process start-up, so
+compare two paths, or a path with --baseline recorded, rather than a path with
+an in-process run. The default baseline is the recorded outcome, timed on the
+hardware that recorded it.
+
+Exits 1 when a payload regressed: more conflicts, a solved payload no longer
+solved, or (with --max-slowdown) a run slower than the baseline by that factor.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from exam_seating_solver import CONTRACT_VERSION, solve
+from seating_benchmark import write_rows
+from seating_corpus import unwrap
+
+BASELINE_RECORDED = "recorded"
+SOLVER_CURRENT = "current"
+SOLVED_STATUSES = frozenset({"optimal", "feasible"})
+ROW_FIELDS = (
+    "payload",
+    "students",
+    "seats",
+    "baseline_status",
+    "status",
+    "baseline_seconds",
+    "seconds",
+    "seconds_delta",
+    "seconds_ratio",
+    "baseline_conflicts",
+    "conflicts",
+    "conflicts_delta",
+    "regression",
+)
+
+# payload -> (response, wall seconds)
+Runner = Callable[[dict[str, Any]], tuple[dict[str, Any], float]]
+
+
+def load_recordings(
+    paths: Iterable[str],
+) -> list[tuple[str, dict[str, Any], dict[str, Any] | None]]:
+    """(name, payload, recorded outcome or None) per corpus entry; batch
+    envelopes expand to one entry per problem."""
+    entries: list[tuple[str, dict[str, Any], dict[str, Any] | None]] = []
+    for path_str in paths:
+        path = Path(path_str)
+        files = sorted(path.glob("*.json")) if path.is_dir() else [path]
+        for file in files:
+            payload, outcome = unwrap(json.loads(file.read_text(encoding="utf-8")))
+            if isinstance(payload, dict) and isinstance(payload.get("problems"), list):
+                entries.extend(
+                    (f"{file.name}#{i}", problem, None)
+                    for i, problem in enumerate(payload["problems"])
+                )
+            else:
+                entries.append((file.name, payload, outcome))
+    return entries
+
+
+def _run_current(payload: dict[str, Any]) -> tuple[dict[str, Any], float]:
+    started = time.perf_counter()
+    result = solve(json.loads(json.dumps(payload)))
+    return result, time.perf_counter() - started
+
+
+def _cli_runner(solver_path: str) -> Runner:
+    def run(payload: dict[str, Any]) -> tuple[dict[str, Any], float]:
+        started = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, solver_path],
+            input=json.dumps(payload),
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        seconds = time.perf_counter() - started
+        try:
+            return json.loads(proc.stdout), seconds
+        except ValueError:
+            message = proc.stderr.strip().splitlines()[-1:] or [f"exit {proc.returncode}"]
+            return {"status": "error", "message": message[0]}, seconds
+
+    return run
+
+
+def make_runner(spec: str) -> Runner:
+    return _run_current if spec == SOLVER_CURRENT else _cli_runner(spec)
+
+
+def _timed(runner: Runner, payload: dict[str, Any], repeat: int) -> dict[str, Any]:
+    """Outcome of the first run, with the median wall time over `repeat` runs."""
+    result, seconds = runner(payload)
+    times = [seconds] + [runner(payload)[1] for _ in range(repeat - 1)]
+    return {
+        "status": result.get("status"),
+        "conflicts_count": result.get("conflicts_count"),
+        "seconds": statistics.median(times),
+    }
+
+
+def _regression(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    max_slowdown: float | None,
+) -> str:
+    if baseline.get("status") in SOLVED_STATUSES and current["status"] not in SOLVED_STATUSES:
+        return "status"
+    if (
+        current["conflicts_count"] is not None
+        and baseline.get("conflicts_count") is not None
+        and current["conflicts_count"] > baseline["conflicts_count"]
+    ):
+        return "conflicts"
+    if (
+        max_slowdown is not None
+        and baseline.get("seconds")
+        and current["seconds"] > baseline["seconds"] * max_slowdown
+    ):
+        return "latency"
+    return ""
+
+
+def _delta(current: float | None, baseline: float | None, digits: int) -> float | None:
+    if current is None or baseline is None:
+        return None
+    return round(current - baseline, digits)
+
+
+def replay_payload(
+    name: str,
+    payload: dict[str, Any],
+    recorded: dict[str, Any] | None,
+    runner: Runner,
+    baseline_runner: Runner | None = None,
+    *,
+    repeat: int = 1,
+    max_slowdown: float | None = None,
+) -> dict[str, Any]:
+    """One report row: `runner` against the recorded outcome, or against
+    `baseline_runner` when given."""
+    if baseline_runner is not None:
+        baseline = _timed(baseline_runner, payload, repeat)
+    else:
+        baseline = recorded or {}
+    current = _timed(runner, payload, repeat)
+    baseline_seconds = baseline.get("seconds")
+    return {
+        "payload": name,
+        "students": len(payload.get("students") or []),
+        "seats": sum(1 for seat in payload.get("seats") or [] if not seat.get("is_disabled")),
+        "baseline_status": baseline.get("status"),
+        "status": current["status"],
+        "baseline_seconds": None if baseline_seconds is None else round(baseline_seconds, 4),
+        "seconds": round(current["seconds"], 4),
+        "seconds_delta": _delta(current["seconds"], baseline_seconds, 4),
+        "seconds_ratio": (
+            round(current["seconds"] / baseline_seconds, 3) if baseline_seconds else None
+        ),
+        "baseline_conflicts": baseline.get("conflicts_count"),
+        "conflicts": current["conflicts_count"],
+        "conflicts_delta": _delta(current["conflicts_count"], baseline.get("conflicts_count"), 0),
+        "regression": _regression(baseline, current, max_slowdown),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Replay a recorded seating corpus and compare against a baseline."
+    )
+    parser.add_argument("corpus", nargs="+", help="recording files or directories of *.json")
+    parser.add_argument(
+        "--solver",
+        default=SOLVER_CURRENT,
+        help="'current' (in-process) or the path of a candidate exam_seating_solver.py",
+    )
+    parser.add_argument(
+        "--baseline",
+        default=BASELINE_RECORDED,
+        help="'recorded', 'current' or the path of a baseline exam_seating_solver.py",
+    )
+    parser.add_argument("--timeout", type=float, help="override timeout_seconds for every payload")
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="runs per payload; the median time is reported"
+    )
+    parser.add_argument(
+        "--max-slowdown",
+        type=float,
+        help="flag payloads slower than the baseline by more than this factor",
+    )
+    parser.add_argument("--format", choices=("csv", "json"), default="csv")
+    parser.add_argument("--output", help="write here instead of stdout")
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    corpus = load_recordings(args.corpus)
+    if not corpus:
+        parser.error("no payloads found in the corpus")
+    runner = make_runner(args.solver)
+    baseline_runner = None if args.baseline == BASELINE_RECORDED else make_runner(args.baseline)
+
+    rows: list[dict[str, Any]] = []
+    for name, payload, recorded in corpus:
+        if args.timeout is not None:
+            payload = {**payload, "timeout_seconds": args.timeout}
+        payload.setdefault("contract_version", CONTRACT_VERSION)
+        rows.append(
+            replay_payload(
+                name,
+                payload,
+                recorded,
+                runner,
+                baseline_runner,
+                repeat=args.repeat,
+                max_slowdown=args.max_slowdown,
+            )
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as out:
+            write_rows(rows, ROW_FIELDS, args.format, out)
+    else:
+        write_rows(rows, ROW_FIELDS, args.format, sys.stdout)
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+"""Local exam seating solver service.
+
+Keeps a pool of worker processes (OR-Tools already imported) and
+serves the JSON contract over HTTP on localhost or a Unix socket:
+
+    POST   /jobs        contract-1.0 payload (optional "organization_id") -> job id
+    GET    /jobs/<id>   job status, plus the solver result once finished
+    DELETE /jobs/<id>   cancel a queued or running job
+    GET    /health      queue and thread usage
+    GET    /metrics     Prometheus metrics (seating_metrics)
+    POST   /plan        capacity plan (seating_capacity), answered directly
+
+Admission control keeps seating solves from starving the web app on a shared
+box: queued jobs are served round-robin across organizations, the total number
+of CP-SAT search threads in flight is capped, and submissions beyond the queue
+limit are rejected with 503.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import socketserver
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from exam_seating_solver import (
+    CONTRACT_VERSION,
+    error_result,
+    search_worker_count,
+    solve_with_metrics,
+)
+from seating_capacity import plan_capacity
+from seating_metrics import MetricsRegistry, metric_labels
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATES = {JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED}
+
+DEFAULT_MAX_QUEUED = 100
+# Finished jobs kept for polling before the oldest are dropped.
+DEFAULT_RETAINED_JOBS = 500
+ANONYMOUS_ORGANIZATION = ""
+
+
+@dataclass
+class SolverJob:
+    job_id: str
+    organization_id: str
+    payload: dict[str, Any]
+    threads: int
+    status: str = JOB_QUEUED
+    result: dict[str, Any] | None = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    def describe(self) -> dict[str, Any]:
+        data: dict[str, Any] = {
+            "job_id": self.job_id,
+            "organization_id": self.organization_id,
+            "status": self.status,
+            "threads": self.threads,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.result is not None:
+            data["result"] = self.result
+        return data
+
+
+class FairQueue:
+    """Per-organization FIFO queues served round-robin.
+
+    One organization submitting a whole exam week cannot push another
+    school's single map to the back of a shared line.
+    """
+
+    def __init__(self) -> None:
+        self._queues: OrderedDict[str, deque[SolverJob]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def push(self, job: SolverJob) -> None:
+        self._queues.setdefault(job.organization_id, deque()).append(job)
+
+    def peek(self) -> SolverJob | None:
+        for queue in self._queues.values():
+            return queue[0]
+        return None
+
+    def pop(self) -> SolverJob | None:
+        """Take the head job of the next organization in turn."""
+        if not self._queues:
+            return None
+        organization_id, queue = next(iter(self._queues.items()))
+        job = queue.popleft()
+        # Rotate the organization to the back so the others go first next time.
+        del self._queues[organization_id]
+        if queue:
+            self._queues[organization_id] = queue
+        return job
+
+    def remove(self, job: SolverJob) -> bool:
+        queue = self._queues.get(job.organization_id)
+        if queue is None or job not in queue:
+            return False
+        queue.remove(job)
+        if not queue:
+            del self._queues[job.organization_id]
+        return True
+
+
+def _worker_loop(conn: Any) -> None:
+    """Worker process: solve payloads from the pipe until told to stop."""
+    while True:
+        try:
+            payload = conn.recv()
+        except EOFError:
+            return
+        if payload is None:
+            return
+        conn.send(solve_with_metrics(payload))
+
+
+class _Worker:
+    def __init__(self, context: Any) -> None:
+        self._context = context
+        self.job: SolverJob | None = None
+        self._spawn()
+
+    def _spawn(self) -> None:
+        self.conn, child_conn = self._context.Pipe()
+        self.process = self._context.Process(
+            target=_worker_loop, args=(child_conn,), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def run(self, payload: dict[str, Any]) -> tuple[dict[str, Any], dict[str, Any]] | None:
+        """Send a payload and wait for (result, metrics sample); None when the
+        worker was killed mid-solve."""
+        try:
+            self.conn.send(payload)
+            return self.conn.recv()
+        except (EOFError, OSError):
+            return None
+
+    def restart(self) -> None:
+        """Kill a worker stuck in a cancelled solve and start a fresh one."""
+        self.process.terminate()
+        self.process.join()
+        self.conn.close()
+        self._spawn()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+
+
+class SolverService:
+    """Scheduler shared by the HTTP front end and in-process callers."""
+
+    def __init__(
+        self,
+        *,
+        workers: int | None = None,
+        max_threads: int | None = None,
+        max_queued: int = DEFAULT_MAX_QUEUED,
+        retained_jobs: int = DEFAULT_RETAINED_JOBS,
+    ) -> None:
+        cpu_count = os.cpu_count() or 1
+        self.max_threads = max(1, max_threads or cpu_count)
+        self.max_queued = max_queued
+        self.retained_jobs = retained_jobs
+        self.threads_in_use = 0
+        self._jobs: OrderedDict[str, SolverJob] = OrderedDict()
+        self._queue = FairQueue()
+        self.metrics = MetricsRegistry()
+        self._lock = threading.Condition()
+        self._closed = False
+        # Workers are restarted while the HTTP threads run, and forking a
+        # threaded process can copy a lock held by another thread. A fork
+        # server is started once from this thread and imports OR-Tools up
+        # front, so workers forked from it still start warm.
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload(["exam_seating_solver"])
+        else:
+            context = multiprocessing.get_context("spawn")
+        self._idle: list[_Worker] = [
+            _Worker(context) for _ in range(max(1, workers or cpu_count))
+        ]
+        self._workers = list(self._idle)
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, payload: dict[str, Any]) -> SolverJob:
+        """Queue a payload; raises OverflowError when the queue is full."""
+        organization_id = str(payload.get("organization_id") or ANONYMOUS_ORGANIZATION)
+        students = payload.get("students")
+        student_count = len(students) if isinstance(students, list) else 0
+        requested = payload.get("search_workers")
+        try:
+            cap = int(requested) if requested is not None else None
+        except (TypeError, ValueError):
+            cap = None
+        threads = min(self.max_threads, search_worker_count(student_count, cap))
+        payload = {**payload, "search_workers": max(1, threads)}
+        # The service exports its own metrics; a textfile as well would count twice.
+        payload.pop("metrics_textfile", None)
+        job = SolverJob(
+            job_id=uuid.uuid4().hex,
+            organization_id=organization_id,
+            payload=payload,
+            threads=max(1, threads),
+        )
+        with self._lock:
+            if len(self._queue) >= self.max_queued:
+                raise OverflowError("Solver queue is full")
+            self._jobs[job.job_id] = job
+            self._queue.push(job)
+            self._forget_old_jobs()
+            self._lock.notify_all()
+        return job
+
+    def get(self, job_id: str) -> SolverJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id: str, timeout: float | None = None) -> SolverJob | None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while True:
+                job = self._jobs.get(job_id)
+                if job is None or job.status in FINISHED_STATES:
+                    return job
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return job
+                self._lock.wait(remaining)
+
+    def cancel(self, job_id: str) -> SolverJob | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED_STATES:
+                return job
+            if self._queue.remove(job):
+                self._finish(job, JOB_CANCELLED, None)
+                return job
+            job.status = JOB_CANCELLED
+            worker = next((w for w in self._workers if w.job is job), None)
+            if worker is not None:
+                # Under the lock the worker cannot have moved on to another
+                # job; its runner thread restarts it and releases it.
+                worker.process.terminate()
+        return job
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            running = sum(1 for w in self._workers if w.job is not None)
+            return {
+                "contract_version": CONTRACT_VERSION,
+                "status": "ok",
+                "workers": len(self._workers),
+                "running": running,
+                "queued": len(self._queue),
+                "threads_in_use": self.threads_in_use,
+                "max_threads": self.max_threads,
+            }
+
+    def render_metrics(self) -> str:
+        """Solve metrics from the workers plus the current queue gauges."""
+        with self._lock:
+            self.metrics.set(
+                "exam_seating_running_jobs",
+                value=sum(1 for w in self._workers if w.job is not None),
+            )
+            self.metrics.set("exam_seating_queued_jobs", value=len(self._queue))
+            self.metrics.set("exam_seating_threads_in_use", value=self.threads_in_use)
+            return self.metrics.render()
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            self._lock.notify_all()
+        self._dispatcher.join(timeout=5)
+        for worker in self._workers:
+            if worker.job is not None:
+                worker.process.terminate()
+            worker.stop()
+
+    def _dispatch_loop(self) -> None:
+        with self._lock:
+            while not self._closed:
+                job = self._queue.peek()
+                # Head-of-line admission: a job waits until enough threads free
+                # up rather than being overtaken, so big maps are not starved.
+                if (
+                    job is None
+                    or not self._idle
+                    or self.threads_in_use + job.threads > self.max_threads
+                ):
+                    self._lock.wait()
+                    continue
+                job = self._queue.pop()
+                worker = self._idle.pop()
+                worker.job = job
+                job.status = JOB_RUNNING
+                job.started_at = time.time()
+                self.threads_in_use += job.threads
+                threading.Thread(
+                    target=self._run_job, args=(worker, job), daemon=True
+                ).start()
+
+    def _run_job(self, worker: _Worker, job: SolverJob) -> None:
+        outcome = worker.run(job.payload)
+        with self._lock:
+            # A cancel that lands after the result arrived still killed the
+            # process, so the worker needs a restart either way.
+            restart = outcome is None or job.status == JOB_CANCELLED
+        if restart:
+            worker.restart()
+        with self._lock:
+            self.threads_in_use -= job.threads
+            worker.job = None
+            self._idle.append(worker)
+            self.metrics.observe(
+                "exam_seating_queue_wait_seconds", (), job.started_at - job.submitted_at
+            )
+            if job.status == JOB_CANCELLED:
+                self._finish(job, JOB_CANCELLED, None)
+            elif outcome is None:
+                self._finish(job, JOB_FAILED, error_result("Solver worker exited unexpectedly"))
+            else:
+                result, sample = outcome
+                self.metrics.record_solve(sample)
+                self._finish(job, JOB_SUCCEEDED, result)
+
+    def _finish(self, job: SolverJob, status: str, result: dict[str, Any] | None) -> None:
+        job.status = status
+        job.result = result
+        job.finished_at = time.time()
+        self.metrics.inc("exam_seating_jobs_total", metric_labels(status=status))
+        self._lock.notify_all()
+
+    def _forget_old_jobs(self) -> None:
+        finished = [j for j in self._jobs.values() if j.status in FINISHED_STATES]
+        for job in finished[: max(0, len(finished) - self.retained_jobs)]:
+            del self._jobs[job.job_id]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # self.server is a _TcpServer or _UnixServer carrying the SolverService.
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        if self.path == "/health":
+            self._send(200, self.server.service.stats())
+            return
+        if self.path == "/metrics":
+            data = self.server.service.render_metrics().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        job = self._job_from_path()
+        if job is not None:
+            self._send(200, job.describe())
+
+    def do_POST(self) -> None:  # noqa: N802
+        if self.path not in {"/jobs", "/plan"}:
+            self._send(404, error_result("Not found"))
+            return
+        try:
+            length = int(self.headers.get("Content-Length", "0"))
+            payload = json.loads(self.rfile.read(length) or b"null")
+        except (ValueError, json.JSONDecodeError) as exc:
+            self._send(400, error_result(f"Invalid JSON input: {exc}"))
+            return
+        if not isinstance(payload, dict):
+            self._send(400, error_result("Payload must be an object"))
+            return
+        if self.path == "/plan":
+            # Planning takes milliseconds and runs no search: no queueing.
+            plan = plan_capacity(payload)
+            self._send(400 if plan["status"] == "error" else 200, plan)
+            return
+        try:
+            job = self.server.service.submit(payload)
+        except OverflowError as exc:
+            self._send(503, error_result(str(exc)))
+            return
+        self._send(202, job.describe())
+
+    def do_DELETE(self) -> None:  # noqa: N802
+        job = self._job_from_path()
+        if job is not None:
+            self._send(200, self.server.service.cancel(job.job_id).describe())
+
+    def _job_from_path(self) -> SolverJob | None:
+        prefix = "/jobs/"
+        job = None
+        if self.path.startswith(prefix):
+            job = self.server.service.get(self.path[len(prefix):])
+        if job is None:
+            self._send(404, error_result("Unknown job"))
+        return job
+
+    def _send(self, code: int, body: dict[str, Any]) -> None:
+        data = json.dumps(body, separators=(",", ":")).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass
+
+
+class _TcpServer(ThreadingHTTPServer):
+    def __init__(self, address: tuple[str, int], service: SolverService) -> None:
+        self.service = service
+        super().__init__(address, _Handler)
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, service: SolverService) -> None:
+        self.service = service
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, _Handler)
+
+    def get_request(self) -> tuple[Any, Any]:
+        # BaseHTTPRequestHandler expects a (host, port)-style client address.
+        request, _ = super().get_request()
+        return request, ("unix", 0)
+
+
+def create_server(
+    service: SolverService,
+    *,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    socket_path: str | None = None,
+) -> socketserver.BaseServer:
+    if socket_path:
+        return _UnixServer(socket_path, service)
+    return _TcpServer((host, port), service)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--socket", dest="socket_path", help="serve on a Unix socket instead")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument(
+        "--max-threads", type=int, help="CP-SAT threads across all jobs (default: CPU count)"
+    )
+    parser.add_argument("--max-queued", type=int, default=DEFAULT_MAX_QUEUED)
+    args = parser.parse_args()
+
+    service = SolverService(
+        workers=args.workers, max_threads=args.max_threads, max_queued=args.max_queued
+    )
+    server = create_server(
+        service, host=args.host, port=args.port, socket_path=args.socket_path
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
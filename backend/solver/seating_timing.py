@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""Solve log and learned solve-time predictor for adaptive timeout budgets.
+
+The solver appends one JSON line per solve to a log (payload option
+`solve_log`): the problem features the planner computed, the model-size
+estimates, and how long the search took to its first solution and to a
+proven optimum. `fit` turns such a log into a small linear quantile
+regression over log-seconds, solved as an LP with GLOP:
+
+    python seating_timing.py fit solve_log.jsonl --output timing_model.json
+
+Given that model (payload option `timing_model`), the solver predicts the
+time a problem needs, reports a recommended `timeout_seconds`, and with
+`adaptive_timeout` uses it as the budget (never above the requested one).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+FEATURE_NAMES = (
+    "intercept",
+    "log_constraints",
+    "log_students",
+    "log_classes",
+    "locked_density",
+    "largest_class_ratio",
+    "log_components",
+    "strict",
+)
+# Quantile the recommendation targets: 9 in 10 similar solves finish in time.
+DEFAULT_QUANTILE = 0.9
+# Safety factor on the predicted quantile, and the smallest budget recommended.
+RECOMMENDATION_MARGIN = 1.5
+MIN_RECOMMENDED_SECONDS = 10.0
+
+
+def feature_vector(record: dict[str, Any]) -> list[float]:
+    """Regression inputs for one solve, from its planner features/estimates."""
+    features = record["features"]
+    estimates = record.get("estimates") or {}
+    return [
+        1.0,
+        math.log1p(estimates.get("constraints", 0)),
+        math.log1p(features.get("students", 0)),
+        math.log1p(features.get("classes", 0)),
+        float(features.get("locked_density", 0.0)),
+        float(features.get("largest_class_ratio", 0.0)),
+        math.log1p(features.get("components", 0)),
+        1.0 if record.get("strict") else 0.0,
+    ]
+
+
+def is_censored(record: dict[str, Any]) -> bool:
+    """True when the solve stopped before proving an optimum, so its time is
+    only a lower bound on what the search needed."""
+    return (record.get("timing") or {}).get("optimal_seconds") is None
+
+
+def target_seconds(record: dict[str, Any]) -> float | None:
+    """Time the search needed to a proven optimum or, for a censored solve,
+    the lower bound it gives: the whole solve, and at least its budget."""
+    timing = record.get("timing") or {}
+    seconds = timing.get("optimal_seconds")
+    if seconds is None:
+        seconds = timing.get("solve_seconds")
+        if seconds is not None:
+            seconds = max(float(seconds), float(record.get("timeout_seconds") or 0.0))
+    return None if seconds is None else max(float(seconds), 1e-3)
+
+
+@dataclass
+class TimingModel:
+    """Linear model of a quantile of log(solve seconds)."""
+
+    coefficients: list[float]
+    quantile: float = DEFAULT_QUANTILE
+    samples: int = 0
+    # Samples that stopped at their budget (fitted as lower bounds).
+    censored: int = 0
+
+    def predict_seconds(self, record: dict[str, Any]) -> float:
+        x = feature_vector(record)
+        return math.exp(sum(w * v for w, v in zip(self.coefficients, x)))
+
+    def recommend_timeout(self, record: dict[str, Any]) -> float:
+        return max(MIN_RECOMMENDED_SECONDS, self.predict_seconds(record) * RECOMMENDATION_MARGIN)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "features": list(FEATURE_NAMES),
+            "coefficients": self.coefficients,
+            "quantile": self.quantile,
+            "samples": self.samples,
+            "censored": self.censored,
+        }
+
+    @classmethod
+    def load(cls, path: str) -> TimingModel:
+        with open(path, encoding="utf-8") as handle:
+            data = json.load(handle)
+        if data.get("features") != list(FEATURE_NAMES):
+            raise ValueError("timing model was fitted on different features")
+        return cls(
+            coefficients=[float(w) for w in data["coefficients"]],
+            quantile=float(data.get("quantile", DEFAULT_QUANTILE)),
+            samples=int(data.get("samples", 0)),
+            censored=int(data.get("censored", 0)),
+        )
+
+    def save(self, path: str) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(self.to_dict(), handle, indent=2)
+        os.replace(tmp_path, path)
+
+
+def fit(records: Iterable[dict[str, Any]], quantile: float = DEFAULT_QUANTILE) -> TimingModel:
+    """Quantile regression: minimise the pinball loss as a linear program.
+
+    For each solve i with inputs x_i and y_i = log(seconds):
+        y_i - w.x_i = over_i - under_i,  over_i, under_i >= 0
+        minimise  sum quantile * over_i + (1 - quantile) * under_i
+
+    A censored solve (stopped at its budget) only says the true time is at
+    least y_i, so it is only penalised when predicted below that:
+        y_i - w.x_i <= over_i,  over_i >= 0,  cost quantile * over_i
+    Fitting its budget as if it were the solve time would pull predictions
+    down, and with adaptive_timeout the shrunken budgets would feed back into
+    the log and keep lowering them.
+    """
+    from ortools.linear_solver import pywraplp
+
+    rows = [
+        (feature_vector(record), math.log(seconds), is_censored(record))
+        for record in records
+        if record.get("features") and (seconds := target_seconds(record)) is not None
+    ]
+    if len(rows) < len(FEATURE_NAMES):
+        raise ValueError(
+            f"need at least {len(FEATURE_NAMES)} logged solves to fit, got {len(rows)}"
+        )
+
+    lp = pywraplp.Solver.CreateSolver("GLOP")
+    weights = [lp.NumVar(-lp.infinity(), lp.infinity(), name) for name in FEATURE_NAMES]
+    objective = lp.Objective()
+    for i, (x, y, censored) in enumerate(rows):
+        over = lp.NumVar(0, lp.infinity(), f"over_{i}")
+        row = lp.Constraint(y, y if not censored else lp.infinity())
+        for weight, value in zip(weights, x):
+            row.SetCoefficient(weight, value)
+        row.SetCoefficient(over, 1)
+        objective.SetCoefficient(over, quantile)
+        if not censored:
+            under = lp.NumVar(0, lp.infinity(), f"under_{i}")
+            row.SetCoefficient(under, -1)
+            objective.SetCoefficient(under, 1 - quantile)
+    objective.SetMinimization()
+    if lp.Solve() != pywraplp.Solver.OPTIMAL:
+        raise ValueError("quantile regression LP did not solve")
+    return TimingModel(
+        coefficients=[weight.solution_value() for weight in weights],
+        quantile=quantile,
+        samples=len(rows),
+        censored=sum(1 for _, _, censored in rows if censored),
+    )
+
+
+def append_solve_log(path: str, record: dict[str, Any]) -> None:
+    """Append one record; a single write keeps concurrent appenders line-atomic."""
+    line = json.dumps({"logged_at": time.time(), **record}, separators=(",", ":")) + "\n"
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line.encode("utf-8"))
+    finally:
+        os.close(fd)
+
+
+def load_solve_log(path: str) -> list[dict[str, Any]]:
+    records = []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue  # a torn last line from a killed process
+    return records
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Fit the solve-time predictor.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    fit_parser = sub.add_parser("fit", help="fit a timing model from solve logs")
+    fit_parser.add_argument("logs", nargs="+", help="solve log JSONL files")
+    fit_parser.add_argument("--output", required=True, help="timing model JSON to write")
+    fit_parser.add_argument("--quantile", type=float, default=DEFAULT_QUANTILE)
+    args = parser.parse_args(argv)
+
+    records = [record for path in args.logs for record in load_solve_log(path)]
+    try:
+        model = fit(records, args.quantile)
+    except ValueError as exc:
+        print(f"fit failed: {exc}", file=sys.stderr)
+        return 1
+    model.save(args.output)
+    print(json.dumps(model.to_dict()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,10 +12,26 @@ SOLVER_PATH = Path(__file__).resolve().parents[1] / "exam_seating_solver.py"
 
 
 def run_solver(payload: dict[str, Any]) -> dict[str, Any]:
+    """Solve in-process through the JSON contract entry point.
+
+    The payload and result round-trip through JSON so tests see exactly what
+    the CLI would emit, without paying a process start per case.
+    """
+    from exam_seating_solver import solve, solve_batch
+
+    raw = json.loads(json.dumps(payload))
+    if isinstance(raw, dict) and "problems" in raw:
+        result = solve_batch(raw)
+    else:
+        result = solve(raw)
+    return json.loads(json.dumps(result))
+
+
+def run_solver_cli(payload: dict[str, Any] | str) -> dict[str, Any]:
     """Invoke the solver subprocess with JSON on stdin; parse JSON stdout."""
     proc = subprocess.run(
         [sys.executable, str(SOLVER_PATH)],
-        input=json.dumps(payload),
+        input=payload if isinstance(payload, str) else json.dumps(payload),
         capture_output=True,
         text=True,
         check=False,
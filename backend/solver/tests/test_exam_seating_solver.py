@@ -2,9 +2,12 @@
 
 from __future__ import annotations
 
+import json
+from typing import Any
+
 import pytest
 
-from .conftest import base_payload, run_solver, seat, student
+from .conftest import base_payload, run_solver, run_solver_cli, seat, student
 
 
 def _assignment_map(result: dict) -> dict[str, dict]:
@@ -301,6 +304,23 @@ class TestEvenEmptySpacing:
         class_by_student = {s["exam_student_id"]: s["exam_class_id"] for s in students}
         assert _count_adjacent_same_class(result, class_by_student) == 0
 
+    @pytest.mark.parametrize("seed", [0, 1, 2, 3])
+    def test_spacing_keeps_a_zero_conflict_layout_reachable(self, seed: int) -> None:
+        # Nine of class A fill a parity group of the hall, but never one of the
+        # 16 evenly spaced seats: the solver keeps every seat instead.
+        seats = [
+            seat(r, c, r * 6 + c + 1, is_disabled=(r, c) == (0, 0))
+            for r in range(5)
+            for c in range(6)
+        ]
+        students = [student(f"a{i}", "A") for i in range(9)]
+        students += [student(f"c{i}", "C") for i in range(7)]
+        result = run_solver(base_payload(5, 6, seats, students, seed=seed))
+
+        assert result["mode_used"] == "strict"
+        assert result["conflicts_count"] == 0
+        assert len(result["assignments"]) == 16
+
 
 class TestMalformedInput:
     def test_missing_contract_version_returns_error(self) -> None:
@@ -492,4 +512,1296 @@ class TestZigzagStrategy:
         )
         result = run_solver(payload)
         assert result["status"] in {"optimal", "feasible"}
-        assert result["zigzag_group_id"] == "class-big"
\ No newline at end of file
+        assert result["zigzag_group_id"] == "class-big"
+
+
+class TestBatchContract:
+    def _room(self, class_prefix: str, seed: int = 42) -> dict:
+        return base_payload(
+            rows=1,
+            cols=3,
+            seats=[seat(0, 0, 1), seat(0, 1, 2), seat(0, 2, 3)],
+            students=[
+                student(f"{class_prefix}1", f"{class_prefix}-a"),
+                student(f"{class_prefix}2", f"{class_prefix}-a"),
+            ],
+            seed=seed,
+        )
+
+    def test_results_follow_problem_order(self) -> None:
+        rooms = [self._room(f"room{i}") for i in range(3)]
+        result = run_solver(
+            {"contract_version": "1.0", "problems": rooms, "max_workers": 2}
+        )
+
+        assert result["status"] == "ok"
+        assert result["workers"] == 2
+        assert len(result["results"]) == 3
+        for index, room_result in enumerate(result["results"]):
+            assert room_result["status"] == "optimal"
+            assert room_result["conflicts_count"] == 0
+            ids = sorted(a["exam_student_id"] for a in room_result["assignments"])
+            assert ids == [f"room{index}1", f"room{index}2"]
+
+    def test_matches_single_problem_solve(self) -> None:
+        room = self._room("solo", seed=9)
+        single = run_solver(room)
+        batch = run_solver({"contract_version": "1.0", "problems": [room]})
+
+        assert batch["results"][0]["assignments"] == single["assignments"]
+
+    def test_bad_problem_does_not_fail_batch(self) -> None:
+        bad = self._room("bad")
+        bad["contract_version"] = "99.0"
+        result = run_solver(
+            {
+                "contract_version": "1.0",
+                "problems": [self._room("good"), bad, "not-an-object"],
+                "max_workers": 1,
+            }
+        )
+
+        statuses = [item["status"] for item in result["results"]]
+        assert statuses == ["optimal", "error", "error"]
+
+    def test_each_problem_gets_its_own_deadline(self, monkeypatch) -> None:
+        import exam_seating_solver
+
+        # A crowded non-strict hall searches until its deadline_seconds.
+        rows, cols = 30, 30
+        slow = base_payload(
+            rows,
+            cols,
+            [seat(r, c, r * cols + c + 1) for r in range(rows) for c in range(cols)],
+            [student(f"s{i}", f"class-{i % 2}") for i in range(rows * cols)],
+            strict_mode=False,
+            timeout_seconds=60,
+        )
+        slow["deadline_seconds"] = 5
+        monkeypatch.setattr(exam_seating_solver, "BATCH_GRACE_SECONDS", 0.0)
+        monkeypatch.setattr(
+            exam_seating_solver,
+            "_problem_budget_seconds",
+            lambda raw: 0.5 if raw["students"] == slow["students"] else 30.0,
+        )
+        result = run_solver(
+            {
+                "contract_version": "1.0",
+                "problems": [slow, self._room("quick"), self._room("late")],
+                "max_workers": 2,
+            }
+        )
+
+        statuses = [item["status"] for item in result["results"]]
+        assert statuses == ["timeout", "optimal", "optimal"]
+
+    def test_envelope_requires_problem_array(self) -> None:
+        result = run_solver({"contract_version": "1.0", "problems": {}})
+
+        assert result["status"] == "error"
+        assert result["results"] == []
+
+
+class TestStratifiedEmptySeats:
+    def _hall(self, rows: int, cols: int) -> list:
+        from exam_seating_solver import SeatCell
+
+        return [
+            SeatCell(r, c, r * cols + c + 1, False, False, None)
+            for r in range(rows)
+            for c in range(cols)
+        ]
+
+    def test_half_full_hall_has_no_empty_columns(self) -> None:
+        from exam_seating_solver import _select_evenly_spaced_seats
+
+        rows, cols = 12, 16
+        selected = _select_evenly_spaced_seats(self._hall(rows, cols), 96, seed=42)
+
+        assert len(selected) == 96
+        assert len({(s.row, s.col) for s in selected}) == 96
+        per_row = [sum(1 for s in selected if s.row == r) for r in range(rows)]
+        per_col = [sum(1 for s in selected if s.col == c) for c in range(cols)]
+        assert max(per_row) - min(per_row) <= 1
+        assert min(per_col) >= 4
+        assert max(per_col) - min(per_col) <= 3
+
+    def test_selection_is_deterministic_per_seed(self) -> None:
+        from exam_seating_solver import _select_evenly_spaced_seats
+
+        hall = self._hall(9, 11)
+        first = _select_evenly_spaced_seats(hall, 60, seed=7)
+        again = _select_evenly_spaced_seats(list(reversed(hall)), 60, seed=7)
+        other = _select_evenly_spaced_seats(hall, 60, seed=8)
+
+        assert first == again
+        assert first != other
+
+    def test_rows_with_disabled_seats_get_proportional_empties(self) -> None:
+        from exam_seating_solver import _select_evenly_spaced_seats
+
+        hall = [s for s in self._hall(4, 10) if not (s.row == 0 and s.col >= 5)]
+        selected = _select_evenly_spaced_seats(hall, 28, seed=3)
+
+        empties_by_row = [
+            sum(1 for s in hall if s.row == r) - sum(1 for s in selected if s.row == r)
+            for r in range(4)
+        ]
+        assert sum(empties_by_row) == 7
+        assert empties_by_row[0] == 1
+        assert all(count == 2 for count in empties_by_row[1:])
+
+
+class TestMultiColourZigzag:
+    def test_four_colour_lattice_separates_king_neighbours(self) -> None:
+        rows, cols = 6, 6
+        seats = [seat(r, c, r * cols + c + 1) for r in range(rows) for c in range(cols)]
+        students = [
+            student(f"{name}{i}", f"class-{name}")
+            for name in ("a", "b", "c", "d")
+            for i in range(9)
+        ]
+        payload = base_payload(rows, cols, seats, students, strategy="zigzag")
+        payload["zigzag_colors"] = 4
+        result = run_solver(payload)
+
+        assert result["status"] == "optimal"
+        assert result["zigzag_colors"] == 4
+        assert result["conflicts_count"] == 0
+        assert len(result["zigzag_groups"]) == 4
+        class_by_student = {s["exam_student_id"]: s["exam_class_id"] for s in students}
+        assert _count_adjacent_same_class(result, class_by_student) == 0
+
+    def test_three_big_classes_keep_orthogonal_separation(self) -> None:
+        rows, cols = 6, 8
+        seats = [seat(r, c, r * cols + c + 1) for r in range(rows) for c in range(cols)]
+        students = [student(f"a{i}", "class-a") for i in range(20)]
+        students += [student(f"b{i}", "class-b") for i in range(14)]
+        students += [student(f"c{i}", "class-c") for i in range(10)]
+        students += [student(f"d{i}", "class-d") for i in range(4)]
+        result = run_solver(base_payload(rows, cols, seats, students, strategy="zigzag"))
+
+        assert result["conflicts_count"] == 0
+        class_by_student = {s["exam_student_id"]: s["exam_class_id"] for s in students}
+        assert _count_orthogonal_same_class(result, class_by_student) == 0
+        assert [g["group_id"] for g in result["zigzag_groups"]] == ["class-a", "class-b"]
+
+    def test_full_hall_of_three_thousand_is_fast(self) -> None:
+        import time
+
+        from exam_seating_solver import solve
+
+        rows, cols = 60, 50
+        seats = [seat(r, c, r * cols + c + 1) for r in range(rows) for c in range(cols)]
+        sizes = [700, 700, 700, 700, 50, 50, 50, 50]
+        students = [
+            student(f"s{index}-{i}", f"class-{index}")
+            for index, size in enumerate(sizes)
+            for i in range(size)
+        ]
+        started = time.perf_counter()
+        result = solve(base_payload(rows, cols, seats, students, strategy="zigzag"))
+        elapsed = time.perf_counter() - started
+
+        assert len(result["assignments"]) == 3000
+        assert result["conflicts_count"] == 0
+        assert elapsed < 5.0
+
+    def test_unsupported_colour_count_returns_error(self) -> None:
+        payload = base_payload(
+            1, 2, [seat(0, 0, 1), seat(0, 1, 2)], [student("s1", "class-a")],
+            strategy="zigzag",
+        )
+        payload["zigzag_colors"] = 3
+        result = run_solver(payload)
+
+        assert result["status"] == "error"
+
+
+class TestCommandLine:
+    def test_cli_solves_single_payload(self) -> None:
+        payload = base_payload(
+            rows=1,
+            cols=3,
+            seats=[seat(0, 0, 1), seat(0, 1, 2), seat(0, 2, 3)],
+            students=[student("s1", "class-a"), student("s2", "class-a")],
+        )
+        result = run_solver_cli(payload)
+
+        assert result == run_solver(payload)
+
+    def test_cli_reports_invalid_json(self) -> None:
+        result = run_solver_cli("{not json")
+
+        assert result["status"] == "error"
+        assert "Invalid JSON input" in result["message"]
+
+    def test_cli_accepts_batch_envelope(self) -> None:
+        payload = base_payload(
+            rows=1, cols=2, seats=[seat(0, 0, 1), seat(0, 1, 2)],
+            students=[student("s1", "class-a")],
+        )
+        result = run_solver_cli(
+            {"contract_version": "1.0", "problems": [payload, payload], "max_workers": 2}
+        )
+
+        assert result["status"] == "ok"
+        assert [r["status"] for r in result["results"]] == ["optimal", "optimal"]
+
+
+class TestInProcessApi:
+    def test_builder_problem_solves_without_json(self) -> None:
+        from exam_seating_solver import SeatingProblem, SeatingResult, solve_problem
+
+        problem = SeatingProblem.grid(1, 3, seed=42)
+        problem.add_student("s1", "section-a", "main-oli").add_student(
+            "s2", "section-b", "main-oli"
+        )
+        result = solve_problem(problem)
+
+        assert isinstance(result, SeatingResult)
+        assert result.ok
+        assert result.mode_used == "strict"
+        assert result.conflicts_count == 0
+        assert {(a.row, a.col) for a in result.assignments} == {(0, 0), (0, 2)}
+
+    def test_builder_matches_json_contract(self) -> None:
+        from exam_seating_solver import SeatingProblem, solve, solve_problem
+
+        problem = SeatingProblem.grid(3, 3, seed=12345, strict_mode=False)
+        problem.lock_seat(0, 0, "s1").disable_seat(2, 2)
+        for sid, cls in (("s1", "class-a"), ("s2", "class-b"), ("s3", "class-a")):
+            problem.add_student(sid, cls)
+
+        assert solve_problem(problem).to_dict() == solve(problem.to_payload())
+        assert solve_problem(problem).seat_of("s1").seat_number == 1
+
+    def test_from_payload_raises_contract_message(self) -> None:
+        from exam_seating_solver import SeatingProblem
+
+        payload = base_payload(1, 1, [seat(0, 0, 1)], [student("s1", "class-a")])
+        payload["contract_version"] = "99.0"
+
+        with pytest.raises(ValueError, match="Unsupported contract_version"):
+            SeatingProblem.from_payload(payload)
+
+    def test_invalid_options_return_error_result(self) -> None:
+        from exam_seating_solver import SeatingProblem, solve_problem
+
+        problem = SeatingProblem.grid(1, 2, strategy="spiral")
+        problem.add_student("s1", "class-a")
+        result = solve_problem(problem)
+
+        assert result.status == "error"
+        assert "Unsupported strategy" in (result.message or "")
+
+    def test_should_stop_keeps_incumbent(self) -> None:
+        from exam_seating_solver import SeatingProblem, solve_problem
+
+        problem = SeatingProblem.grid(12, 12, strict_mode=False, timeout_seconds=30)
+        for i in range(140):
+            problem.add_student(f"s{i}", f"class-{i % 2}")
+        result = solve_problem(problem, should_stop=lambda: True)
+
+        assert result.ok
+        assert len(result.assignments) == 140
+
+
+class TestEnginePlanner:
+    def test_small_hall_plans_cp_sat_cascade(self) -> None:
+        seats = [seat(r, c, r * 3 + c + 1) for r in range(3) for c in range(3)]
+        students = [student(f"s{i}", f"class-{i % 2}") for i in range(4)]
+        payload = base_payload(3, 3, seats, students)
+        payload["exact_dp"] = False
+        result = run_solver(payload)
+
+        assert result["mode_used"] == "strict"
+        plan = result["plan"]
+        assert plan["chain"] == ["cp_sat_strict", "cp_sat", "constructive"]
+        assert plan["features"]["seats"] == 4
+        assert plan["features"]["classes"] == 2
+        assert plan["features"]["components"] == 1
+        assert plan["estimates"]["expected_seconds"] >= 0
+
+    def test_model_over_budget_uses_analytic_packing(self) -> None:
+        rows, cols = 30, 30
+        seats = [seat(r, c, r * cols + c + 1) for r in range(rows) for c in range(cols)]
+        students = [student(f"s{i}", f"class-{i % 6}") for i in range(800)]
+        payload = base_payload(rows, cols, seats, students, timeout_seconds=0.5)
+        result = run_solver(payload)
+
+        assert result["status"] in {"optimal", "feasible"}
+        assert result["plan"]["chain"] == ["analytic", "lns"]
+        assert result["mode_used"] in {"analytic", "lns"}
+        assert len(result["assignments"]) == 800
+        assert result["conflicts_count"] == _count_adjacent_same_class(
+            result, {s["exam_student_id"]: s["exam_class_id"] for s in students}
+        )
+
+    def test_lns_reduces_analytic_conflicts(self) -> None:
+        rows, cols = 20, 20
+        seats = [seat(r, c, r * cols + c + 1) for r in range(rows) for c in range(cols)]
+        # Three classes barely fit the four king-move colours, so the lattice
+        # packing leaves conflicts for the windowed search to repair.
+        students = [student(f"s{i}", f"class-{i % 3}") for i in range(300)]
+        payload = base_payload(rows, cols, seats, students, strict_mode=False, timeout_seconds=0.3)
+        result = run_solver(payload)
+
+        assert result["plan"]["chain"] == ["analytic", "lns"]
+        assert result["mode_used"] == "lns"
+        assert len({a["exam_student_id"] for a in result["assignments"]}) == 300
+
+
+class TestCheckpointResume:
+    def _crowded_payload(self, **extra: Any) -> dict:
+        # Two classes in a full 4x4 hall: strict separation is impossible, so
+        # the solve runs the minimising phase. Checkpoints come from CP-SAT
+        # search, so the exact row DP is kept out of the plan.
+        seats = [seat(r, c, r * 4 + c + 1) for r in range(4) for c in range(4)]
+        students = [student(f"s{i}", f"class-{i % 2}") for i in range(16)]
+        payload = base_payload(4, 4, seats, students, timeout_seconds=5.0)
+        payload.update(exact_dp=False, **extra)
+        return payload
+
+    def test_incumbent_is_written_atomically(self, tmp_path) -> None:
+        path = tmp_path / "map.ckpt.json"
+        result = run_solver(
+            self._crowded_payload(checkpoint={"path": str(path), "interval_seconds": 0.01})
+        )
+
+        data = json.loads(path.read_text(encoding="utf-8"))
+        assert result["checkpoint"]["path"] == str(path)
+        assert result["checkpoint"]["writes"] >= 1
+        assert data["phase"] == "fallback"
+        assert data["objective"] == result["conflicts_count"]
+        assert data["bound"] <= data["objective"]
+        assert len(data["seats"]) == 16
+        assert [p.name for p in tmp_path.iterdir()] == ["map.ckpt.json"]
+
+    def test_resume_continues_minimising_from_checkpoint(self, tmp_path) -> None:
+        path = tmp_path / "map.ckpt.json"
+        first = run_solver(self._crowded_payload(checkpoint={"path": str(path)}))
+        resumed = run_solver(self._crowded_payload(resume_from=str(path)))
+
+        assert resumed["resume"]["used"] is True
+        assert resumed["resume"]["phase"] == "fallback"
+        assert resumed["mode_used"] == "fallback"
+        assert resumed["conflicts_count"] <= first["conflicts_count"]
+
+    def test_checkpoint_of_other_roster_is_ignored(self, tmp_path) -> None:
+        path = tmp_path / "map.ckpt.json"
+        run_solver(self._crowded_payload(checkpoint={"path": str(path)}))
+        other = self._crowded_payload(resume_from=str(path))
+        other["students"][0]["exam_class_id"] = "class-9"
+        result = run_solver(other)
+
+        assert result["status"] in {"optimal", "feasible"}
+        assert result["resume"]["used"] is False
+        assert "different hall or roster" in result["resume"]["message"]
+
+    def test_checkpoint_of_other_seat_selection_is_ignored(self, tmp_path) -> None:
+        # 20 students on 25 seats: the seed picks which seats stay empty.
+        seats = [seat(r, c, r * 5 + c + 1) for r in range(5) for c in range(5)]
+        students = [student(f"s{i}", f"class-{i % 2}") for i in range(20)]
+
+        def payload(seed: int, **extra: Any) -> dict:
+            data = base_payload(5, 5, seats, students, timeout_seconds=5.0)
+            data.update(exact_dp=False, seed=seed, **extra)
+            return data
+
+        path = tmp_path / "map.ckpt.json"
+        run_solver(payload(1, checkpoint={"path": str(path)}))
+        same = run_solver(payload(1, resume_from=str(path)))
+        other = run_solver(payload(2, resume_from=str(path)))
+
+        assert json.loads(path.read_text(encoding="utf-8"))["seed"] == 1
+        assert same["resume"]["used"] is True
+        assert other["status"] in {"optimal", "feasible"}
+        assert other["resume"]["used"] is False
+        assert "seat selection (seed 1)" in other["resume"]["message"]
+
+    def test_strict_checkpoint_does_not_bound_minimising(self, tmp_path) -> None:
+        path = tmp_path / "map.ckpt.json"
+        run_solver(self._crowded_payload(checkpoint={"path": str(path)}))
+        data = json.loads(path.read_text(encoding="utf-8"))
+        path.write_text(json.dumps({**data, "phase": "strict", "objective": 0}), encoding="utf-8")
+        result = run_solver(self._crowded_payload(resume_from=str(path)))
+
+        assert result["resume"]["used"] is True
+        assert result["status"] in {"optimal", "feasible"}
+        assert result["mode_used"] == "fallback"
+
+    def test_missing_checkpoint_solves_from_scratch(self, tmp_path) -> None:
+        result = run_solver(self._crowded_payload(resume_from=str(tmp_path / "none.json")))
+
+        assert result["status"] in {"optimal", "feasible"}
+        assert result["resume"] == {
+            "path": str(tmp_path / "none.json"),
+            "used": False,
+            "message": "no checkpoint file",
+        }
+
+
+class TestSymmetryBreaking:
+    def _full_hall(self, rows: int, cols: int, sizes: list[int], **extra: Any) -> dict:
+        seats = [seat(r, c, r * cols + c + 1) for r in range(rows) for c in range(cols)]
+        students = [
+            student(f"c{k}-s{i}", f"class-{k}") for k, size in enumerate(sizes) for i in range(size)
+        ]
+        payload = base_payload(rows, cols, seats, students, timeout_seconds=30.0)
+        payload.update(extra)
+        return payload
+
+    def test_interchangeable_groups_skip_locked_and_unequal_classes(self) -> None:
+        from exam_seating_solver import _interchangeable_class_groups
+
+        groups = _interchangeable_class_groups(
+            [1, 2, 3, 4, 5], {1: 9, 2: 9, 3: 9, 4: 4, 5: 4}, locked_codes={3}
+        )
+
+        assert groups == [[4, 5], [1, 2]]
+
+    def test_interchangeable_classes_appear_in_first_seat_order(self) -> None:
+        result = run_solver(self._full_hall(6, 6, [9, 9, 9, 9], symmetry_breaking="classes"))
+
+        first_seat = {}
+        for a in result["assignments"]:
+            cls = a["exam_class_id"]
+            first_seat[cls] = min(first_seat.get(cls, a["seat_number"]), a["seat_number"])
+        assert result["conflicts_count"] == 0
+        order = sorted(first_seat, key=first_seat.get)
+        assert order == ["class-0", "class-1", "class-2", "class-3"]
+
+    @pytest.mark.parametrize("mode", ["none", "classes", "full"])
+    def test_modes_agree_on_outcome(self, mode: str) -> None:
+        # Full halls: the 7x7 roster fits the king-move lattice colours
+        # (16, 12, 12, 9 seats); the 5x5 one cannot be separated and three
+        # interchangeable classes of 6 leave two conflicts at best.
+        feasible = run_solver(self._full_hall(7, 7, [16, 12, 12, 9], symmetry_breaking=mode))
+        crowded = run_solver(self._full_hall(5, 5, [7, 6, 6, 6], symmetry_breaking=mode))
+
+        assert feasible["mode_used"] == "strict"
+        assert feasible["conflicts_count"] == 0
+        assert crowded["status"] == "optimal"
+        assert crowded["mode_used"] == "fallback"
+        assert crowded["conflicts_count"] == 2
+
+    def test_default_mode_breaks_class_symmetry_only(self) -> None:
+        from exam_seating_solver import _parse_input
+
+        parsed = _parse_input(self._full_hall(2, 2, [1, 1]))
+
+        assert parsed.symmetry_breaking == "classes"
+        assert "symmetry_breaking" not in parsed.to_payload()
+
+    def test_unknown_mode_is_rejected(self) -> None:
+        result = run_solver(self._full_hall(1, 2, [1], symmetry_breaking="rotations"))
+
+        assert result["status"] == "error"
+        assert "Unsupported symmetry_breaking" in result["message"]
+
+
+class TestModelEncodings:
+    def _hall(self, sizes: list[int], side: int = 6, **extra: Any) -> dict:
+        seats = [seat(r, c, r * side + c + 1) for r in range(side) for c in range(side)]
+        seats[side + 1] = seat(1, 1, side + 2, locked=True, exam_student_id="c0-s0")
+        students = [
+            student(f"c{k}-s{i}", f"class-{k}") for k, size in enumerate(sizes) for i in range(size)
+        ]
+        payload = base_payload(side, side, seats, students, timeout_seconds=10.0)
+        payload.update(extra)
+        return payload
+
+    @pytest.mark.parametrize("encoding", ["boolean", "integer", "clique"])
+    def test_encodings_agree_on_strict_and_minimised_outcomes(self, encoding: str) -> None:
+        separable = run_solver(self._hall([9, 9, 9, 8], encoding=encoding))
+        crowded = run_solver(self._hall([7, 6, 6, 6], side=5, encoding=encoding))
+
+        assert separable["mode_used"] == "strict"
+        assert separable["conflicts_count"] == 0
+        assert _assignment_map(separable)["c0-s0"]["row"] == 1
+        assert crowded["status"] == "optimal"
+        class_by_student = {
+            s["exam_student_id"]: s["exam_class_id"]
+            for s in self._hall([7, 6, 6, 6], side=5)["students"]
+        }
+        assert crowded["conflicts_count"] == _count_adjacent_same_class(crowded, class_by_student)
+
+    def test_minimised_conflicts_match_across_encodings(self) -> None:
+        counts = {
+            encoding: run_solver(self._hall([7, 6, 6, 6], side=5, encoding=encoding))[
+                "conflicts_count"
+            ]
+            for encoding in ("boolean", "integer", "clique")
+        }
+
+        assert len(set(counts.values())) == 1
+
+    def test_block_cliques_cover_king_adjacency(self) -> None:
+        from exam_seating_solver import SeatCell, _block_cliques
+
+        seats = [
+            SeatCell(r, c, r * 3 + c + 1, False, False, None) for r in range(2) for c in range(3)
+        ]
+        pairs = {
+            (a, b)
+            for a in range(6)
+            for b in range(a + 1, 6)
+            if abs(seats[a].row - seats[b].row) <= 1 and abs(seats[a].col - seats[b].col) <= 1
+        }
+
+        assert _block_cliques(seats, pairs) == [[0, 1, 3, 4], [1, 2, 4, 5]]
+
+    def test_unknown_encoding_is_rejected(self) -> None:
+        result = run_solver(self._hall([1], encoding="sparse"))
+
+        assert result["status"] == "error"
+        assert "Unsupported encoding" in result["message"]
+
+
+class TestRowDynamicProgram:
+    def _narrow_hall(self, rows: int, sizes: list[int], **extra: Any) -> dict:
+        seats = [seat(r, c, r * 4 + c + 1) for r in range(rows) for c in range(4)]
+        students = [
+            student(f"c{k}-s{i}", f"class-{k}") for k, size in enumerate(sizes) for i in range(size)
+        ]
+        payload = base_payload(rows, 4, seats, students, timeout_seconds=10.0)
+        payload.update(extra)
+        return payload
+
+    def test_narrow_hall_is_planned_for_row_dp(self) -> None:
+        result = run_solver(self._narrow_hall(6, [4, 4, 4]))
+
+        assert result["plan"]["chain"] == ["row_dp"]
+        assert result["plan"]["estimates"]["row_dp_transitions"] > 0
+        assert result["status"] == "optimal"
+        assert result["mode_used"] == "strict"
+        assert result["conflicts_count"] == 0
+
+    def test_row_dp_matches_cp_sat_optimum(self) -> None:
+        exact = run_solver(self._narrow_hall(4, [8, 8]))
+        cp_sat = run_solver(self._narrow_hall(4, [8, 8], exact_dp=False))
+        students = self._narrow_hall(4, [8, 8])["students"]
+        class_by_student = {s["exam_student_id"]: s["exam_class_id"] for s in students}
+
+        assert exact["plan"]["chain"] == ["row_dp"]
+        assert cp_sat["status"] == "optimal"
+        assert exact["status"] == "optimal"
+        assert exact["mode_used"] == "fallback"
+        assert exact["conflicts_count"] == cp_sat["conflicts_count"]
+        assert exact["conflicts_count"] == _count_adjacent_same_class(exact, class_by_student)
+        assert "Full separation is impossible" in exact["message"]
+
+    def test_row_dp_is_deterministic(self) -> None:
+        first = run_solver(self._narrow_hall(5, [7, 7, 6], strict_mode=False))
+        second = run_solver(self._narrow_hall(5, [7, 7, 6], strict_mode=False))
+
+        assert first["plan"]["chain"] == ["row_dp"]
+        assert first["assignments"] == second["assignments"]
+
+    def test_row_dp_past_the_deadline_places_constructively(self) -> None:
+        import time
+
+        from exam_seating_solver import (
+            _Deadline,
+            _DeadlineExceeded,
+            _parse_input,
+            _prepare_problem,
+            _solve_exact,
+            _solve_row_dp,
+        )
+
+        parsed = _parse_input(self._narrow_hall(6, [4, 4, 4]))
+        prepared = _prepare_problem(parsed)
+        movable, assignable, adjacency, class_by_student, locked, _, all_seats = prepared
+        spent = _Deadline(1e-3)
+        time.sleep(0.01)
+
+        with pytest.raises(_DeadlineExceeded):
+            _solve_row_dp(
+                movable,
+                assignable,
+                adjacency,
+                class_by_student,
+                locked,
+                all_seats,
+                strict=True,
+                deadline=spent,
+            )
+        result = _solve_exact(
+            parsed,
+            prepared,
+            separable=True,
+            capacity=6,
+            largest_name="class-0",
+            largest_count=4,
+            deadline=spent,
+        )
+
+        assert result["mode_used"] in {"constructive", "constructive_fallback"}
+        assert result["message"].startswith("Row DP ran out of time")
+        assert len(result["assignments"]) == 12
+
+    def test_row_dp_keeps_locked_students(self) -> None:
+        payload = self._narrow_hall(6, [4, 4, 4])
+        payload["seats"][5] = seat(1, 1, 6, locked=True, exam_student_id="c2-s0")
+        result = run_solver(payload)
+
+        assert result["plan"]["chain"] == ["row_dp"]
+        assert result["mode_used"] == "strict"
+        assert _assignment_map(result)["c2-s0"]["row"] == 1
+        assert _assignment_map(result)["c2-s0"]["col"] == 1
+        assert len(result["assignments"]) == 12
+
+    def test_invalid_exact_dp_is_rejected(self) -> None:
+        result = run_solver(self._narrow_hall(2, [2], exact_dp="yes"))
+
+        assert result["status"] == "error"
+        assert "Invalid exact_dp" in result["message"]
+
+
+class TestDsaturEngine:
+    def _many_class_hall(self, rows: int, cols: int, classes: int, count: int) -> dict:
+        seats = [seat(r, c, r * cols + c + 1) for r in range(rows) for c in range(cols)]
+        students = [student(f"s{i}", f"class-{i % classes}") for i in range(count)]
+        return base_payload(rows, cols, seats, students, timeout_seconds=10.0)
+
+    def test_conflict_free_colouring_is_the_fast_path(self) -> None:
+        payload = self._many_class_hall(12, 12, 10, 140)
+        result = run_solver(payload)
+
+        assert result["plan"]["chain"][0] == "dsatur"
+        assert result["status"] == "optimal"
+        assert result["mode_used"] == "strict"
+        assert result["conflicts_count"] == 0
+        assert len(result["assignments"]) == 140
+
+    def test_locked_seats_are_precoloured(self) -> None:
+        from exam_seating_solver import _parse_input, _prepare_problem, _solve_dsatur
+
+        payload = self._many_class_hall(10, 10, 8, 96)
+        payload["seats"][11] = seat(1, 1, 12, locked=True, exam_student_id="s0")
+        payload["seats"][55] = seat(5, 5, 56, locked=True, exam_student_id="s8")
+        movable, assignable, adjacency, class_by_student, locked, _, all_seats = (
+            _prepare_problem(_parse_input(payload))
+        )
+        result = _solve_dsatur(movable, assignable, adjacency, class_by_student, locked, all_seats)
+
+        by_student = _assignment_map(result)
+        assert (by_student["s0"]["row"], by_student["s0"]["col"]) == (1, 1)
+        assert (by_student["s8"]["row"], by_student["s8"]["col"]) == (5, 5)
+        assert len(result["assignments"]) == 96
+        assert result["conflicts_count"] == 0
+
+    def test_colouring_seeds_cp_sat_when_conflicts_remain(self) -> None:
+        # One class needs more than a quarter of the 10x10 hall, so conflicts
+        # are unavoidable and CP-SAT minimises from the colouring's layout.
+        payload = self._many_class_hall(10, 10, 8, 0)
+        payload["students"] = [student(f"big-{i}", "class-big") for i in range(30)] + [
+            student(f"s{k}-{i}", f"class-{k}") for k in range(7) for i in range(10)
+        ]
+        payload["timeout_seconds"] = 2.0
+        result = run_solver(payload)
+        class_by_student = {s["exam_student_id"]: s["exam_class_id"] for s in payload["students"]}
+
+        assert result["plan"]["chain"][0] == "dsatur"
+        assert result["mode_used"] == "fallback"
+        assert result["conflicts_count"] > 0
+        assert len(result["assignments"]) == 100
+        assert result["conflicts_count"] == _count_adjacent_same_class(result, class_by_student)
+
+    def test_few_classes_keep_the_analytic_start(self) -> None:
+        payload = self._many_class_hall(6, 6, 3, 30)
+        payload.update(exact_dp=False, timeout_seconds=1.0)
+
+        assert run_solver(payload)["plan"]["chain"][0] != "dsatur"
+
+
+class TestAlternatives:
+    def _payload(self, **alternatives: Any) -> dict:
+        seats = [seat(r, c, r * 6 + c + 1) for r in range(6) for c in range(6)]
+        seats[0] = seat(0, 0, 1, locked=True, exam_student_id="s0")
+        students = [student(f"s{i}", f"class-{i % 4}") for i in range(24)]
+        payload = base_payload(6, 6, seats, students, timeout_seconds=10.0)
+        payload["alternatives"] = alternatives
+        return payload
+
+    def test_alternatives_are_diverse_and_within_tolerance(self) -> None:
+        result = run_solver(self._payload(count=3, min_distance=6, tolerance=0))
+        class_by_student = {f"s{i}": f"class-{i % 4}" for i in range(24)}
+
+        def layout(assignments: list[dict]) -> dict:
+            return {
+                (a["row"], a["col"]): class_by_student[a["exam_student_id"]] for a in assignments
+            }
+
+        layouts = [layout(result["assignments"])]
+        assert len(result["alternatives"]) == 3
+        for alternative in result["alternatives"]:
+            current = layout(alternative["assignments"])
+            distances = [
+                sum(1 for key, class_id in earlier.items() if current.get(key) != class_id)
+                for earlier in layouts
+            ]
+            assert min(distances) == alternative["distance"] >= 6
+            assert alternative["conflicts_count"] <= result["conflicts_count"]
+            assert len(alternative["assignments"]) == 24
+            assert _assignment_map(alternative)["s0"]["row"] == 0
+            layouts.append(current)
+
+    def test_minimising_alternatives_fit_a_short_budget(self) -> None:
+        # Strict separation is impossible, so every alternative must match a
+        # ceiling the whole-hall search barely reached.
+        seats = [seat(r, c, r * 10 + c + 1) for r in range(10) for c in range(10)]
+        students = [student(f"s{i}", f"class-{i % 3}") for i in range(80)]
+        payload = base_payload(10, 10, seats, students, timeout_seconds=5.0, seed=1)
+        payload["alternatives"] = {"count": 3}
+        result = run_solver(payload)
+
+        assert result["mode_used"] == "fallback"
+        assert result["alternatives"]
+        for alternative in result["alternatives"]:
+            assert alternative["conflicts_count"] <= result["conflicts_count"]
+            assert alternative["distance"] >= 8  # a tenth of the 80 seats used
+
+    def test_no_alternatives_by_default(self) -> None:
+        payload = self._payload()
+        del payload["alternatives"]
+
+        assert "alternatives" not in run_solver(payload)
+
+    @pytest.mark.parametrize(
+        "options, message",
+        [
+            ({"count": 11}, "alternatives.count"),
+            ({"count": 2, "min_distance": 0}, "alternatives.min_distance"),
+            ({"count": 2, "tolerance": -1}, "alternatives.tolerance"),
+        ],
+    )
+    def test_invalid_alternatives_are_rejected(self, options: dict, message: str) -> None:
+        result = run_solver(self._payload(**options))
+
+        assert result["status"] == "error"
+        assert message in result["message"]
+
+
+class TestDeadline:
+    def test_unused_time_passes_to_later_phases(self) -> None:
+        from exam_seating_solver import _Deadline
+
+        deadline = _Deadline(100.0)
+        # 5 s reserve; the first of two equal phases gets half of what is left.
+        assert deadline.share(80.0, later=1.0) == pytest.approx(47.5, abs=0.1)
+        # Had it finished at once, the next phase could take its whole cap.
+        assert deadline.share(80.0) == pytest.approx(80.0)
+        assert deadline.share(200.0) == pytest.approx(95.0, abs=0.1)
+
+    def test_default_deadline_covers_every_phase(self) -> None:
+        from exam_seating_solver import SeatingProblem, _deadline_seconds
+
+        strict = SeatingProblem(rows=1, cols=1, timeout_seconds=10.0)
+        assert _deadline_seconds(strict) == 25.0
+        relaxed = SeatingProblem(
+            rows=1, cols=1, timeout_seconds=10.0, strict_mode=False, alternatives_count=2
+        )
+        assert _deadline_seconds(relaxed) == 20.0
+        given = SeatingProblem(rows=1, cols=1, timeout_seconds=10.0, deadline_seconds=12.0)
+        assert _deadline_seconds(given) == 12.0
+
+    def test_solve_returns_before_the_deadline(self) -> None:
+        import time
+
+        # Non-strict minimisation on a crowded two-class hall would search
+        # for the full timeout_seconds without the deadline.
+        rows, cols = 30, 30
+        seats = [seat(r, c, r * cols + c + 1) for r in range(rows) for c in range(cols)]
+        students = [student(f"s{i}", f"class-{i % 2}") for i in range(rows * cols)]
+        payload = base_payload(
+            rows, cols, seats, students, strict_mode=False, timeout_seconds=60
+        )
+        payload["deadline_seconds"] = 4
+
+        started = time.monotonic()
+        result = run_solver(payload)
+
+        assert time.monotonic() - started < 4
+        assert result["status"] == "feasible"
+        assert len(result["assignments"]) == rows * cols
+
+    def test_constructive_stops_probing_once_the_reserve_is_spent(self) -> None:
+        import time
+
+        from exam_seating_solver import (
+            _constructive_assign,
+            _Deadline,
+            _parse_input,
+            _prepare_problem,
+        )
+
+        seats = [seat(r, c, r * 6 + c + 1) for r in range(6) for c in range(6)]
+        students = [student(f"s{i}", f"class-{i % 2}") for i in range(12)]
+        prepared = _prepare_problem(_parse_input(base_payload(6, 6, seats, students)))
+        movable, assignable, adjacency, class_by_student, locked, _, all_seats = prepared
+        spent = _Deadline(1e-3)
+        time.sleep(0.01)
+
+        results = [
+            _constructive_assign(
+                movable,
+                assignable,
+                adjacency,
+                class_by_student,
+                locked,
+                all_seats,
+                seed=1,
+                prefer_zero_conflicts=True,
+                deadline=deadline,
+            )
+            for deadline in (None, spent)
+        ]
+
+        assert all(len(result["assignments"]) == 12 for result in results)
+        assert results[1]["strict_mode"] is True
+        assert results[0]["conflicts_count"] < results[1]["conflicts_count"]
+
+    @pytest.mark.parametrize(
+        "value, message",
+        [(0, "deadline_seconds must be positive"), ("soon", "Invalid deadline_seconds")],
+    )
+    def test_invalid_deadline_is_rejected(self, value: Any, message: str) -> None:
+        payload = base_payload(1, 2, [seat(0, 0, 1), seat(0, 1, 2)], [student("s1", "a")])
+        payload["deadline_seconds"] = value
+        result = run_solver(payload)
+
+        assert result["status"] == "error"
+        assert result["message"] == message
+
+
+class TestFreeFormHalls:
+    def _curved_hall(self, rows: int = 5, per_row: int = 8) -> tuple[list[dict], float]:
+        """Staggered, curved benches of 0.6 x 0.4 m desks; desks within 0.5 m
+        of each other, in a bench or across benches, are adjacent."""
+        import math
+
+        seats = []
+        for r in range(rows):
+            radius = 6.0 + 0.9 * r
+            for c in range(per_row + r):
+                angle = (c + 0.5 * (r % 2)) * 0.9 / radius
+                item = seat(r, c, len(seats) + 1)
+                item.update(
+                    x=round(radius * math.sin(angle), 4),
+                    y=round(radius * math.cos(angle), 4),
+                    desk_width=0.6,
+                    desk_depth=0.4,
+                )
+                seats.append(item)
+        return seats, 0.5
+
+    def test_spatial_hash_matches_all_pairs(self) -> None:
+        import math
+        import random
+
+        from exam_seating_solver import SeatCell, _build_distance_adjacency
+
+        rng = random.Random(5)
+        seats = [
+            SeatCell(
+                row=0, col=i, seat_number=i + 1, is_disabled=False, locked=False,
+                exam_student_id=None, x=rng.uniform(0, 20), y=rng.uniform(0, 15),
+                desk_width=rng.choice([0.0, 0.5, 1.2]), desk_depth=rng.choice([0.0, 0.4]),
+            )
+            for i in range(400)
+        ]
+
+        def adjacent(a: SeatCell, b: SeatCell) -> bool:
+            gap_x = max(0.0, abs(a.x - b.x) - (a.desk_width + b.desk_width) / 2)
+            gap_y = max(0.0, abs(a.y - b.y) - (a.desk_depth + b.desk_depth) / 2)
+            return math.hypot(gap_x, gap_y) <= 0.7
+
+        expected = [
+            (i, j) for i in range(400) for j in range(i + 1, 400) if adjacent(seats[i], seats[j])
+        ]
+        assert _build_distance_adjacency(seats, 0.7) == expected
+
+    def test_unit_grid_coordinates_reproduce_the_grid(self) -> None:
+        from exam_seating_solver import (
+            SeatingProblem,
+            _build_adjacency,
+            _build_distance_adjacency,
+            _clique_cover_capacity,
+            conflict_free_capacity,
+        )
+
+        problem = SeatingProblem(rows=5, cols=7)
+        for r in range(5):
+            for c in range(7):
+                problem.add_seat(r, c, x=float(c), y=float(r))
+        index_by_key = {(s.row, s.col): i for i, s in enumerate(problem.seats)}
+        adjacency = _build_distance_adjacency(problem.seats, 1.5)
+
+        assert adjacency == _build_adjacency(index_by_key, 5, 7)
+        assert _clique_cover_capacity(problem.seats, problem.seats, adjacency) == (
+            conflict_free_capacity(problem.seats)
+        )
+
+    def test_curved_hall_is_seated_without_neighbours(self) -> None:
+        seats, distance = self._curved_hall()
+        students = [student(f"s{i}", f"class-{i % 4}") for i in range(40)]
+        payload = base_payload(5, 12, seats, students, timeout_seconds=10.0)
+        payload["map"]["adjacency_distance"] = distance
+        result = run_solver(payload)
+
+        assert result["status"] == "optimal"
+        assert result["mode_used"] == "strict"
+        assert result["plan"]["chain"][0] != "row_dp"
+        assert len(result["assignments"]) == 40
+        assert result["conflicts_count"] == 0
+
+    @pytest.mark.parametrize(
+        "change, message",
+        [
+            ({"drop_xy": True}, "Every seat needs x and y"),
+            ({"no_distance": True}, "map.adjacency_distance is required"),
+            ({"strategy": "zigzag"}, "zigzag strategy needs a grid hall"),
+            ({"distance": -1}, "map.adjacency_distance must not be negative"),
+        ],
+    )
+    def test_invalid_geometry_is_rejected(self, change: dict, message: str) -> None:
+        seats, distance = self._curved_hall(rows=1, per_row=3)
+        if change.get("drop_xy"):
+            del seats[0]["x"]
+        payload = base_payload(1, 3, seats, [student("s1", "a")])
+        if not change.get("no_distance"):
+            payload["map"]["adjacency_distance"] = change.get("distance", distance)
+        if "strategy" in change:
+            payload["strategy"] = change["strategy"]
+        result = run_solver(payload)
+
+        assert result["status"] == "error"
+        assert message in result["message"]
+
+
+class TestAisles:
+    def test_free_form_adjacency_skips_pairs_across_aisles(self) -> None:
+        from exam_seating_solver import Aisle, SeatCell, _build_distance_adjacency
+
+        seats = [
+            SeatCell(
+                row=0, col=c, seat_number=c + 1, is_disabled=False, locked=False,
+                exam_student_id=None, x=float(c), y=0.0,
+            )
+            for c in range(3)
+        ]
+
+        assert _build_distance_adjacency(seats, 1.0) == [(0, 1), (1, 2)]
+        assert _build_distance_adjacency(seats, 1.0, aisles=[Aisle("col", 0)]) == [(1, 2)]
+
+    def test_aisles_prune_crossing_pairs(self) -> None:
+        from exam_seating_solver import SeatingProblem, _prepare_problem
+
+        seats = [seat(r, c, r * 6 + c + 1) for r in range(4) for c in range(6)]
+        payload = base_payload(4, 6, seats, [student("s1", "a")])
+        payload["map"]["aisles"] = [{"after_col": 2}, {"after_row": 1, "span": [0, 2]}]
+        problem = SeatingProblem.from_payload(payload)
+        adjacency = _prepare_problem(problem)[2]
+        cells = [(problem.seats[a], problem.seats[b]) for a, b in adjacency]
+
+        assert not any(min(a.col, b.col) <= 2 < max(a.col, b.col) for a, b in cells)
+        crossing_row = [(a, b) for a, b in cells if a.row != b.row and min(a.row, b.row) == 1]
+        assert crossing_row
+        assert all(a.col >= 3 and b.col >= 3 for a, b in crossing_row)
+
+    def test_aisle_makes_neighbours_separable(self) -> None:
+        seats = [seat(0, 0, 1), seat(0, 1, 2)]
+        students = [student("s1", "a"), student("s2", "a")]
+        payload = base_payload(1, 2, seats, students)
+        assert run_solver(payload)["conflicts_count"] == 1
+
+        payload["map"]["aisles"] = [{"after_col": 0}]
+        result = run_solver(payload)
+
+        assert result["status"] == "optimal"
+        assert result["mode_used"] == "strict"
+        assert result["conflicts_count"] == 0
+
+    def test_mirror_check_sees_asymmetric_aisles(self) -> None:
+        from exam_seating_solver import Aisle, SeatingProblem, _mirror_symmetric, _prepare_problem
+
+        for after, symmetric in ((1, True), (0, False)):
+            problem = SeatingProblem.grid(2, 4, aisles=[Aisle("col", after)])
+            adjacency = _prepare_problem(problem)[2]
+            free = {idx: idx for idx in range(len(problem.seats))}
+
+            assert _mirror_symmetric(problem.seats, free, {}, {}, adjacency) is symmetric
+
+    def test_independent_blocks_are_solved_separately(self) -> None:
+        seats = [seat(r, c, r * 24 + c + 1) for r in range(10) for c in range(24)]
+        students = [student(f"s{i}", f"class-{i % 4}") for i in range(220)]
+        payload = base_payload(10, 24, seats, students, timeout_seconds=30.0)
+        payload["map"]["aisles"] = [{"after_col": 11}]
+        result = run_solver(payload)
+
+        assert result["plan"]["chain"] == ["components"]
+        assert result["status"] == "optimal"
+        assert result["mode_used"] == "strict"
+        assert result["conflicts_count"] == 0
+        seated = {(a["row"], a["col"]) for a in result["assignments"]}
+        assert len(seated) == 220
+        assert {a["exam_student_id"] for a in result["assignments"]} == {
+            s["exam_student_id"] for s in students
+        }
+        left = sum(1 for _, col in seated if col <= 11)
+        assert left == 110
+
+    def test_overloaded_part_falls_back_to_the_whole_hall(self, monkeypatch) -> None:
+        import exam_seating_solver
+
+        monkeypatch.setattr(exam_seating_solver, "COMPONENT_MIN_STUDENTS", 1)
+        monkeypatch.setattr(exam_seating_solver, "COMPONENT_MIN_SEATS", 8)
+        # Locked class-a students fill the left block's class-a lattice, so
+        # the even deal overloads it; the right block can take every class-a.
+        seats, students = [], []
+        for r in range(4):
+            for c in range(10):
+                if c < 4 and r % 2 == 0 and c % 2 == 0:
+                    students.append(student(f"locked-{r}-{c}", "class-a"))
+                    seats.append(
+                        seat(r, c, r * 10 + c + 1, locked=True, exam_student_id=f"locked-{r}-{c}")
+                    )
+                else:
+                    seats.append(seat(r, c, r * 10 + c + 1))
+        students += [student(f"a{i}", "class-a") for i in range(5)]
+        students += [student(f"{k}{i}", f"class-{k}") for k in "bcd" for i in range(8)]
+        payload = base_payload(4, 10, seats, students, timeout_seconds=10.0)
+        payload["map"]["aisles"] = [{"after_col": 3}]
+        result = run_solver(payload)
+
+        assert result["plan"]["chain"][:2] == ["components", "cp_sat_strict"]
+        assert result["mode_used"] == "strict"
+        assert result["conflicts_count"] == 0
+
+    def test_aisles_round_trip_through_the_payload(self) -> None:
+        from exam_seating_solver import Aisle, SeatingProblem
+
+        problem = SeatingProblem.grid(3, 5)
+        problem.aisles = [Aisle("col", 1), Aisle("row", 0, (2, 4))]
+        payload = problem.to_payload()
+
+        assert payload["map"]["aisles"] == [
+            {"after_col": 1},
+            {"after_row": 0, "span": [2, 4]},
+        ]
+        assert SeatingProblem.from_payload(payload).aisles == problem.aisles
+
+    @pytest.mark.parametrize(
+        "aisles, message",
+        [
+            ({"after_col": 1}, "map.aisles must be an array"),
+            ([{"after_col": 1, "after_row": 0}], "exactly one of after_col or after_row"),
+            ([{"after_col": "x"}], "Invalid map.aisles entry"),
+            ([{"after_col": 2}], "after_col must be between 0 and 1"),
+            ([{"after_row": 0, "span": [1, 5]}], "span must be [first, last]"),
+        ],
+    )
+    def test_invalid_aisles_are_rejected(self, aisles: object, message: str) -> None:
+        payload = base_payload(2, 3, [seat(0, 0, 1)], [student("s1", "a")])
+        payload["map"]["aisles"] = aisles
+        result = run_solver(payload)
+
+        assert result["status"] == "error"
+        assert message in result["message"]
+
+
+class TestCompactDiagnostics:
+    def _payload(self, **diagnostics: Any) -> dict:
+        # Ten of twelve students in one class: conflicts cannot be avoided.
+        seats = [seat(r, c, r * 4 + c + 1) for r in range(3) for c in range(4)]
+        students = [student(f"s{i}", "a" if i < 10 else "b") for i in range(12)]
+        payload = base_payload(3, 4, seats, students, timeout_seconds=10.0)
+        if diagnostics:
+            payload["diagnostics"] = diagnostics
+        return payload
+
+    def test_summary_matches_the_full_pair_list(self) -> None:
+        full = run_solver(self._payload())
+        compact = run_solver(self._payload(mode="compact", top_pairs=3, packed_pairs=True))
+        pairs = full["conflict_pairs"]
+        summary = compact["conflict_summary"]
+
+        assert compact["conflicts_count"] == full["conflicts_count"] == len(pairs) > 3
+        assert "conflict_summary" not in full
+        assert len(compact["conflict_pairs"]) == 3
+        assert summary["pairs_omitted"] == len(pairs) - 3
+        assert sum(summary["by_class"].values()) == len(pairs)
+        assert next(iter(summary["by_class"])) == "a"
+        assert {p["exam_class_id"] for p in compact["conflict_pairs"]} == {"a"}
+        assert sum(summary["rows"]) == sum(summary["cols"]) == 2 * len(pairs)
+        assert len(summary["rows"]) == 3 and len(summary["cols"]) == 4
+
+        seats = self._payload()["seats"]
+        packed = summary["packed_pairs"]
+        unpacked = [
+            {(seats[a]["row"], seats[a]["col"]), (seats[b]["row"], seats[b]["col"])}
+            for a, b in zip(packed[::2], packed[1::2])
+        ]
+        assert len(unpacked) == len(pairs)
+        assert all(
+            {(p["seat_a"]["row"], p["seat_a"]["col"]), (p["seat_b"]["row"], p["seat_b"]["col"])}
+            in unpacked
+            for p in compact["conflict_pairs"]
+        )
+
+    def test_packed_pairs_are_opt_in(self) -> None:
+        result = run_solver(self._payload(mode="compact"))
+
+        assert "packed_pairs" not in result["conflict_summary"]
+        assert len(result["conflict_pairs"]) == result["conflicts_count"]
+        assert result["conflict_summary"]["pairs_omitted"] == 0
+
+    @pytest.mark.parametrize(
+        "options, message",
+        [
+            ({"mode": "tiny"}, "Unsupported diagnostics.mode"),
+            ({"mode": "compact", "top_pairs": -1}, "diagnostics.top_pairs"),
+            ({"mode": "compact", "top_pairs": "x"}, "Invalid diagnostics"),
+        ],
+    )
+    def test_invalid_diagnostics_are_rejected(self, options: dict, message: str) -> None:
+        result = run_solver(self._payload(**options))
+
+        assert result["status"] == "error"
+        assert message in result["message"]
+
+
+class TestIdTables:
+    def _payload(self, **extra: Any) -> dict:
+        import uuid
+
+        groups = [str(uuid.UUID(int=k)) for k in (9, 3, 7)]
+        seats = [seat(r, c, r * 6 + c + 1) for r in range(4) for c in range(6)]
+        seats[0] = seat(0, 0, 1, locked=True, exam_student_id=str(uuid.UUID(int=1000)))
+        students = [
+            student(
+                str(uuid.UUID(int=1000 + i)),
+                f"section-{i % 2}",
+                separation_group_id=groups[i % 3],
+            )
+            for i in range(20)
+        ]
+        return {**base_payload(4, 6, seats, students), **extra}
+
+    def test_ids_round_trip_through_the_tables(self) -> None:
+        from exam_seating_solver import _parse_input, _prepare_problem
+
+        parsed = _parse_input(self._payload())
+        tables = _prepare_problem(parsed)[3]
+
+        assert tables.class_ids == sorted(tables.class_ids)
+        for record in parsed.students:
+            index = tables.student_index[record.exam_student_id]
+            assert tables.student_ids[index] == record.exam_student_id
+            code = tables.code_of_student[index]
+            assert tables.class_ids[code] == record.separation_group_id
+            assert tables.class_code[record.separation_group_id] == code
+            assert tables[record.exam_student_id] == record.separation_group_id
+        assert len(tables) == len(parsed.students)
+        assert tables.get("unknown") is None
+        assert tables.code("unknown") == -1
+
+    @pytest.mark.parametrize(
+        "extra",
+        [{"strategy": "zigzag"}, {"strict_mode": False, "exact_dp": False}, {}],
+    )
+    def test_results_carry_the_original_ids(self, extra: dict) -> None:
+        payload = self._payload(**extra)
+        result = run_solver(payload)
+        by_id = {s["exam_student_id"]: s for s in payload["students"]}
+
+        assert result["status"] in {"optimal", "feasible"}
+        assert sorted(a["exam_student_id"] for a in result["assignments"]) == sorted(by_id)
+        for item in result["assignments"]:
+            assert item["exam_class_id"] == by_id[item["exam_student_id"]]["exam_class_id"]
+        groups = {s["separation_group_id"] for s in payload["students"]}
+        assert all(pair["exam_class_id"] in groups for pair in result["conflict_pairs"])
+
+
+class TestModelCache:
+    def _payload(self, prefix: str, **extra: Any) -> dict:
+        seats = [seat(r, c, r * 8 + c + 1) for r in range(6) for c in range(8)]
+        seats[0] = seat(0, 0, 1, locked=True, exam_student_id=f"{prefix}s0")
+        students = [student(f"{prefix}s{i}", f"{prefix}class-{i % 4}") for i in range(30)]
+        payload = base_payload(6, 8, seats, students, timeout_seconds=10.0)
+        payload.update(extra)
+        return json.loads(json.dumps(payload))
+
+    def test_renamed_roster_reuses_the_model(self) -> None:
+        import exam_seating_solver
+        from exam_seating_solver import _solve_measured
+
+        exam_seating_solver._MODEL_CACHE.clear()
+        first, first_sample = _solve_measured(self._payload("a-"))
+        hit, hit_sample = _solve_measured(self._payload("b-"))
+        exam_seating_solver._MODEL_CACHE.clear()
+        fresh, fresh_sample = _solve_measured(self._payload("b-"))
+
+        assert first["plan"]["chain"][0] == "cp_sat_strict"
+        assert first_sample["cache"] == {"model": "miss"}
+        assert hit_sample["cache"] == {"model": "hit"}
+        assert fresh_sample["cache"] == {"model": "miss"}
+        assert hit["status"] == "optimal" and hit["conflicts_count"] == 0
+        # A cached model is the proto a fresh build makes: same seed, same layout.
+        assert hit["assignments"] == fresh["assignments"]
+
+    def test_directory_cache_survives_the_process_cache(self, tmp_path) -> None:
+        import exam_seating_solver
+        from exam_seating_solver import _solve_measured
+
+        exam_seating_solver._MODEL_CACHE.clear()
+        _solve_measured(self._payload("a-", model_cache=str(tmp_path)))
+        (cached,) = tmp_path.glob("*.model")
+        exam_seating_solver._MODEL_CACHE.clear()
+        result, sample = _solve_measured(self._payload("b-", model_cache=str(tmp_path)))
+
+        assert sample["cache"] == {"model": "hit"}
+        assert result["status"] == "optimal"
+
+        cached.write_bytes(b"not a model")
+        exam_seating_solver._MODEL_CACHE.clear()
+        result, sample = _solve_measured(self._payload("c-", model_cache=str(tmp_path)))
+
+        assert sample["cache"] == {"model": "miss"}
+        assert result["status"] == "optimal"
+
+    def test_new_seed_reuses_the_model(self, tmp_path) -> None:
+        import exam_seating_solver
+        from exam_seating_solver import _solve_measured
+
+        exam_seating_solver._MODEL_CACHE.clear()
+        _solve_measured(self._payload("a-", seed=1, model_cache=str(tmp_path)))
+        exam_seating_solver._MODEL_CACHE.clear()
+        result, sample = _solve_measured(self._payload("b-", seed=2, model_cache=str(tmp_path)))
+
+        assert sample["cache"] == {"model": "hit"}
+        assert result["status"] == "optimal"
+
+    def test_directory_is_pruned_least_recently_used_first(
+        self, tmp_path, monkeypatch
+    ) -> None:
+        import exam_seating_solver
+        from exam_seating_solver import _solve_measured
+
+        exam_seating_solver._MODEL_CACHE.clear()
+        _solve_measured(self._payload("a-", model_cache=str(tmp_path)))
+        (first,) = tmp_path.glob("*.model")
+        monkeypatch.setattr(exam_seating_solver, "MODEL_CACHE_DIR_MAX_BYTES", first.stat().st_size)
+        _solve_measured(self._payload("a-", strict_mode=False, model_cache=str(tmp_path)))
+
+        (kept,) = tmp_path.glob("*.model")
+        assert kept != first
+
+    def test_invalid_model_cache_is_rejected(self) -> None:
+        result = run_solver(self._payload("a-", model_cache=7))
+
+        assert result["status"] == "error"
+        assert result["message"] == "Invalid model_cache"
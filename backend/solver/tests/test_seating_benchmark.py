@@ -0,0 +1,124 @@
+"""Tests for the differential engine benchmark."""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+
+from .conftest import base_payload, seat, student
+
+
+def _locked_payload() -> dict:
+    seats = [seat(0, c, c + 1) for c in range(4)]
+    seats[0] = seat(0, 0, 1, locked=True, exam_student_id="s0")
+    seats[3] = seat(0, 3, 4, is_disabled=True)
+    students = [student(f"s{i}", f"class-{i % 2}") for i in range(3)]
+    return base_payload(1, 4, seats, students, timeout_seconds=2.0)
+
+
+def _placed(student_id: str, class_id: str, col: int) -> dict:
+    return {
+        "exam_student_id": student_id,
+        "exam_class_id": class_id,
+        "row": 0,
+        "col": col,
+        "seat_number": col + 1,
+    }
+
+
+class TestInvariants:
+    def test_every_engine_keeps_the_contract(self) -> None:
+        from seating_benchmark import DEFAULT_ENGINES, benchmark_payload, generate_payload
+
+        payload = generate_payload(120, classes=3, seed=5, timeout_seconds=2.0)
+        rows = benchmark_payload("generated", payload, DEFAULT_ENGINES)
+
+        assert [row["engine"] for row in rows] == list(DEFAULT_ENGINES)
+        for row in rows:
+            assert row["status"] in {"optimal", "feasible"}
+            assert row["violations"] == ""
+            assert row["bucket"] == "101-500"
+
+    def test_locked_and_disabled_seats_are_checked(self) -> None:
+        from exam_seating_solver import _parse_input, _prepare_problem
+        from seating_benchmark import check_invariants
+
+        prepared = _prepare_problem(_parse_input(_locked_payload()))
+        broken = {
+            "status": "feasible",
+            "conflicts_count": 0,
+            "assignments": [
+                _placed("s1", "class-1", 0),
+                _placed("s2", "class-0", 3),
+                _placed("s2", "class-0", 2),
+            ],
+        }
+        violations = check_invariants(prepared, broken)
+
+        assert "locked seat (0, 0) holds s1" in violations
+        assert "s2 placed on disabled seat (0, 3)" in violations
+        assert "s2 seated 2 times" in violations
+        assert "locked s0 missing from (0, 0)" in violations
+
+
+class TestReport:
+    def test_summary_groups_by_engine_and_bucket(self) -> None:
+        from seating_benchmark import summarize
+
+        rows = [
+            {"engine": "zigzag", "bucket": "0-100", "seconds": 0.1, "conflicts": 2,
+             "peak_rss_mb": 50.0, "violations": ""},
+            {"engine": "zigzag", "bucket": "0-100", "seconds": 0.3, "conflicts": 0,
+             "peak_rss_mb": 60.0, "violations": "s1 seated 0 times"},
+        ]
+        (summary,) = summarize(rows)
+
+        assert summary["runs"] == 2
+        assert summary["failed_runs"] == 1
+        assert summary["mean_seconds"] == 0.2
+        assert summary["max_conflicts"] == 2
+        assert summary["max_peak_rss_mb"] == 60.0
+
+    def test_cli_reads_batch_corpus_and_writes_csv(self, tmp_path, capsys) -> None:
+        from exam_seating_solver import CONTRACT_VERSION
+        from seating_benchmark import main
+
+        envelope = {"contract_version": CONTRACT_VERSION, "problems": [_locked_payload()] * 2}
+        (tmp_path / "halls.json").write_text(json.dumps(envelope), encoding="utf-8")
+
+        exit_code = main([str(tmp_path), "--engines", "constructive,zigzag"])
+        rows = list(csv.DictReader(io.StringIO(capsys.readouterr().out)))
+
+        assert exit_code == 0
+        assert [(row["payload"], row["engine"]) for row in rows] == [
+            ("halls.json#0", "constructive"),
+            ("halls.json#0", "zigzag"),
+            ("halls.json#1", "constructive"),
+            ("halls.json#1", "zigzag"),
+        ]
+
+    def test_build_rows_time_both_phases(self) -> None:
+        from seating_benchmark import BUILD_FIELDS, benchmark_build
+
+        seats = [seat(r, c, r * 4 + c + 1) for r in range(3) for c in range(4)]
+        students = [student(f"s{i}", f"class-{i % 3}") for i in range(9)]
+        rows = benchmark_build("hall", base_payload(3, 4, seats, students), repeat=2)
+
+        assert [row["phase"] for row in rows] == ["strict", "minimise"]
+        assert all(tuple(row) == BUILD_FIELDS for row in rows)
+        assert all(row["students"] == 9 and row["build_seconds"] >= 0 for row in rows)
+
+    def test_build_time_leaves_out_earlier_searches(self) -> None:
+        import time
+
+        from exam_seating_solver import _SolveClock
+
+        clock = _SolveClock()
+        time.sleep(0.05)  # a strict search the cascade never lapped
+        build_started = time.monotonic()
+        clock.charge("build", build_started)
+        clock.lap("search")
+
+        assert clock.phases["build"] < 0.05
+        assert clock.phases["search"] >= 0.05
@@ -0,0 +1,119 @@
+"""Tests for capacity planning (seating_capacity.plan_capacity)."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from .conftest import base_payload, run_solver, seat, student
+
+
+def _plan(classes: dict[str, int], halls: list[dict[str, Any]]) -> dict[str, Any]:
+    from seating_capacity import plan_capacity
+
+    return plan_capacity(
+        {
+            "contract_version": "1.0",
+            "classes": [{"exam_class_id": k, "students": v} for k, v in classes.items()],
+            "halls": halls,
+        }
+    )
+
+
+def _hall(hall_id: str, rows: int, cols: int, **extra: Any) -> dict[str, Any]:
+    return {"id": hall_id, "rows": rows, "cols": cols, **extra}
+
+
+class TestPlanCapacity:
+    def test_smallest_sufficient_hall_is_chosen(self) -> None:
+        result = _plan(
+            {"A": 20, "B": 20},
+            [_hall("big", 20, 20), _hall("small", 4, 4), _hall("medium", 10, 10)],
+        )
+
+        assert result["status"] == "ok"
+        assert result["rooms_needed"] == 1
+        assert [room["id"] for room in result["rooms"]] == ["medium"]
+        assert result["rooms"][0]["single_class_capacity"] == 25
+
+    def test_oversized_class_is_split_across_rooms(self) -> None:
+        result = _plan({"A": 40, "B": 10}, [_hall(f"h{i}", 6, 8) for i in range(4)])
+        rooms = result["rooms"]
+
+        assert result["status"] == "ok"
+        assert result["rooms_needed"] == 4
+        split: dict[str, int] = {}
+        for room in rooms:
+            assert room["students"] <= room["seats"]
+            for item in room["classes"]:
+                class_id, size = item["exam_class_id"], item["students"]
+                assert size <= room["single_class_capacity"]
+                split[class_id] = split.get(class_id, 0) + size
+        assert split == {"A": 40, "B": 10}
+
+    def test_planned_split_solves_without_conflicts(self) -> None:
+        halls = [_hall("a", 5, 6, disabled_seats=[{"row": 0, "col": 0}]), _hall("b", 6, 6)]
+        result = _plan({"A": 12, "B": 9, "C": 7}, halls)
+        assert result["status"] == "ok"
+
+        for room in result["rooms"]:
+            hall = next(h for h in halls if h["id"] == room["id"])
+            disabled = {(s["row"], s["col"]) for s in hall.get("disabled_seats", [])}
+            seats = [
+                seat(r, c, r * hall["cols"] + c + 1, is_disabled=(r, c) in disabled)
+                for r in range(hall["rows"])
+                for c in range(hall["cols"])
+            ]
+            students = [
+                student(f"{item['exam_class_id']}-{room['id']}-{i}", item["exam_class_id"])
+                for item in room["classes"]
+                for i in range(item["students"])
+            ]
+            solved = run_solver(base_payload(hall["rows"], hall["cols"], seats, students))
+
+            assert solved["mode_used"] == "strict"
+            assert solved["conflicts_count"] == 0
+
+    @pytest.mark.parametrize("seed", [4, 5, 8])
+    def test_planned_room_with_spare_seats_solves_strict(self, seed: int) -> None:
+        # Two classes fill whole parity groups; evenly spaced empties alone
+        # would break both groups.
+        sizes = {"A": 16, "B": 16, "C": 15, "D": 7, "E": 3, "F": 3}
+        result = _plan(sizes, [_hall("h", 8, 8)])
+        assert result["rooms_needed"] == 1
+
+        seats = [seat(r, c, r * 8 + c + 1) for r in range(8) for c in range(8)]
+        students = [student(f"{k}-{i}", k) for k, size in sizes.items() for i in range(size)]
+        solved = run_solver(base_payload(8, 8, seats, students, seed=seed))
+
+        assert solved["mode_used"] == "strict"
+        assert solved["conflicts_count"] == 0
+        assert len(solved["assignments"]) == 60
+
+    @pytest.mark.parametrize(
+        "classes, message",
+        [
+            ({"A": 50, "B": 50}, "only 64 usable seats"),
+            ({"A": 20}, "hold at most 16 of a single class"),
+        ],
+    )
+    def test_insufficient_halls_name_the_bound(self, classes: dict, message: str) -> None:
+        result = _plan(classes, [_hall("h1", 4, 8), _hall("h2", 4, 8)])
+
+        assert result["status"] == "insufficient"
+        assert message in result["message"]
+
+    @pytest.mark.parametrize(
+        "halls, message",
+        [
+            ([], "halls must not be empty"),
+            ([{"id": "x", "rows": 0, "cols": 3}], "Invalid halls payload"),
+            ([{"rows": 2, "cols": 3}], "Invalid halls payload"),
+        ],
+    )
+    def test_invalid_payloads_are_rejected(self, halls: list, message: str) -> None:
+        result = _plan({"A": 1}, halls)
+
+        assert result["status"] == "error"
+        assert result["message"] == message
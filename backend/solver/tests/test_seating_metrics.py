@@ -0,0 +1,96 @@
+"""Tests for the Prometheus metrics registry and the solver textfile output."""
+
+from __future__ import annotations
+
+from .conftest import base_payload, run_solver, seat, student
+
+
+def _sample(**extra) -> dict:
+    sample = {
+        "status": "optimal",
+        "mode_used": "strict",
+        "strategy": "default",
+        "engine": "cp_sat_strict",
+        "seconds": 3.0,
+        "phases": {"prepare": 0.2, "search": 2.8},
+        "variables": 5_000,
+        "constraints": 20_000,
+        "conflicts": 0,
+        "cache": {"checkpoint": "hit"},
+        "timed_out": False,
+    }
+    sample.update(extra)
+    return sample
+
+
+def _series(text: str) -> dict[str, float]:
+    return {
+        line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+        for line in text.splitlines()
+        if line and not line.startswith("#")
+    }
+
+
+class TestMetricsRegistry:
+    def test_solve_counters_and_histograms(self) -> None:
+        from seating_metrics import MetricsRegistry
+
+        registry = MetricsRegistry()
+        registry.record_solve(_sample())
+        registry.record_solve(_sample(status="feasible", seconds=400.0, timed_out=True))
+        series = _series(registry.render())
+
+        solves = (
+            'exam_seating_solves_total{engine="cp_sat_strict",mode_used="strict",'
+            'status="optimal",strategy="default"}'
+        )
+        assert series[solves] == 1
+        assert series['exam_seating_timeouts_total{strategy="default"}'] == 1
+        assert series['exam_seating_cache_lookups_total{cache="checkpoint",outcome="hit"}'] == 2
+        latency = 'exam_seating_solve_seconds_bucket{engine="cp_sat_strict",strategy="default",'
+        assert series[latency + 'le="5"}'] == 1
+        assert series[latency + 'le="600"}'] == 2
+        assert series[latency + 'le="+Inf"}'] == 2
+        assert series['exam_seating_phase_seconds_count{phase="search"}'] == 2
+        assert series["exam_seating_model_constraints_sum"] == 40_000
+
+    def test_render_and_load_round_trip(self) -> None:
+        from seating_metrics import MetricsRegistry
+
+        registry = MetricsRegistry()
+        registry.record_solve(_sample(mode_used='odd "mode"\\'))
+        text = registry.render()
+        reloaded = MetricsRegistry()
+        reloaded.load(text + "unrelated_metric 7\n")
+
+        assert reloaded.render() == text
+        assert "# TYPE exam_seating_solve_seconds histogram" in text
+        assert "unrelated_metric" not in reloaded.render()
+
+
+class TestSolverIntegration:
+    def _payload(self, **extra) -> dict:
+        seats = [seat(r, c, r * 4 + c + 1) for r in range(4) for c in range(4)]
+        students = [student(f"s{i}", f"class-{i % 4}") for i in range(8)]
+        payload = base_payload(4, 4, seats, students, timeout_seconds=60.0)
+        payload.update(extra)
+        return payload
+
+    def test_textfile_accumulates_across_solves(self, tmp_path) -> None:
+        textfile = tmp_path / "metrics" / "exam_seating.prom"
+        result = run_solver(self._payload(metrics_textfile=str(textfile)))
+        run_solver(self._payload(metrics_textfile=str(textfile)))
+
+        series = _series(textfile.read_text(encoding="utf-8"))
+        solves = {k: v for k, v in series.items() if k.startswith("exam_seating_solves_total")}
+        assert list(solves.values()) == [2]
+        assert f'status="{result["status"]}"' in next(iter(solves))
+        assert series['exam_seating_phase_seconds_count{phase="prepare"}'] == 2
+        assert "metrics_error" not in result
+        assert "timing" not in result
+
+    def test_invalid_textfile_option_is_rejected(self) -> None:
+        result = run_solver(self._payload(metrics_textfile=5))
+
+        assert result["status"] == "error"
+        assert result["message"] == "Invalid metrics_textfile"
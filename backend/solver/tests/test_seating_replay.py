@@ -0,0 +1,127 @@
+"""Tests for payload recording and the corpus replay benchmark."""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+
+from .conftest import SOLVER_PATH, base_payload, run_solver, seat, student
+
+
+def _payload(**extra) -> dict:
+    seats = [seat(r, c, r * 4 + c + 1) for r in range(3) for c in range(4)]
+    seats[0] = seat(0, 0, 1, locked=True, exam_student_id="student-0")
+    students = [student(f"student-{i}", f"class-{i % 3}") for i in range(9)]
+    payload = base_payload(3, 4, seats, students, timeout_seconds=5.0)
+    payload.update(extra)
+    return payload
+
+
+def _record(tmp_path, **extra) -> tuple[dict, dict]:
+    corpus = tmp_path / "corpus"
+    result = run_solver(_payload(record_corpus=str(corpus), **extra))
+    (file,) = corpus.glob("*.json")
+    return result, json.loads(file.read_text(encoding="utf-8"))
+
+
+class TestRecorder:
+    def test_recording_hashes_ids_and_keeps_the_outcome(self, tmp_path) -> None:
+        result, recording = _record(tmp_path, solve_log=str(tmp_path / "solves.jsonl"))
+        payload = recording["payload"]
+        text = json.dumps(payload)
+
+        assert "student-" not in text and "class-" not in text
+        assert "record_corpus" not in payload and "solve_log" not in payload
+        assert payload["seats"][0]["exam_student_id"] == payload["students"][0]["exam_student_id"]
+        assert len({item["exam_class_id"] for item in payload["students"]}) == 3
+        assert recording["outcome"]["status"] == result["status"]
+        assert recording["outcome"]["conflicts_count"] == result["conflicts_count"]
+        assert recording["outcome"]["chain"]
+        assert "record_error" not in result
+
+    def test_identical_inputs_share_one_recording(self, tmp_path) -> None:
+        corpus = tmp_path / "corpus"
+        run_solver(_payload(record_corpus=str(corpus)))
+        run_solver(_payload(record_corpus=str(corpus / ".." / "corpus")))
+
+        assert len(list(corpus.glob("*.json"))) == 1
+        assert not list(corpus.glob("*.tmp"))
+
+    def test_unwritable_corpus_is_reported_not_raised(self, tmp_path) -> None:
+        blocker = tmp_path / "file"
+        blocker.write_text("", encoding="utf-8")
+        result = run_solver(_payload(record_corpus=str(blocker / "corpus")))
+
+        assert result["status"] in {"optimal", "feasible"}
+        assert result["record_error"]
+
+    def test_invalid_record_corpus_is_rejected(self) -> None:
+        result = run_solver(_payload(record_corpus=3))
+
+        assert result["status"] == "error"
+        assert result["message"] == "Invalid record_corpus"
+
+
+class TestReplay:
+    def test_recorded_baseline_rows(self, tmp_path) -> None:
+        from seating_replay import ROW_FIELDS, main
+
+        _record(tmp_path)
+        out = tmp_path / "report.csv"
+        code = main([str(tmp_path / "corpus"), "--output", str(out)])
+        (row,) = list(csv.DictReader(io.StringIO(out.read_text(encoding="utf-8"))))
+
+        assert code == 0
+        assert tuple(row) == ROW_FIELDS
+        assert row["status"] == row["baseline_status"]
+        assert row["conflicts_delta"] == "0"
+        assert row["students"] == "9" and row["seats"] == "12"
+        assert row["regression"] == ""
+
+    def test_conflict_regression_fails_the_run(self, tmp_path) -> None:
+        from seating_replay import load_recordings, replay_payload
+
+        _record(tmp_path)
+        ((name, payload, recorded),) = load_recordings([str(tmp_path / "corpus")])
+
+        def worse(_payload: dict) -> tuple[dict, float]:
+            return {"status": "feasible", "conflicts_count": recorded["conflicts_count"] + 2}, 0.1
+
+        row = replay_payload(name, payload, recorded, worse)
+
+        assert row["conflicts_delta"] == 2
+        assert row["regression"] == "conflicts"
+
+    def test_candidate_solver_runs_as_a_subprocess(self, tmp_path) -> None:
+        from seating_replay import main
+
+        _record(tmp_path)
+        out = tmp_path / "report.json"
+        code = main(
+            [
+                str(tmp_path / "corpus"),
+                "--solver",
+                str(SOLVER_PATH),
+                "--baseline",
+                "current",
+                "--format",
+                "json",
+                "--output",
+                str(out),
+            ]
+        )
+        (row,) = json.loads(out.read_text(encoding="utf-8"))
+
+        assert code == 0
+        assert row["status"] == row["baseline_status"]
+        assert row["conflicts_delta"] == 0
+        assert row["seconds"] > 0 and row["baseline_seconds"] > 0
+
+    def test_benchmark_loads_recordings(self, tmp_path) -> None:
+        from seating_benchmark import load_corpus
+
+        _, recording = _record(tmp_path)
+        ((_, payload),) = load_corpus([str(tmp_path / "corpus")])
+
+        assert payload == recording["payload"]
@@ -0,0 +1,198 @@
+"""Tests for the local solver service (scheduler, fairness, HTTP front end)."""
+
+from __future__ import annotations
+
+import http.client
+import json
+import threading
+import time
+from typing import Any
+
+import pytest
+
+from .conftest import base_payload, seat, student
+
+
+def _small_payload(**extra: Any) -> dict[str, Any]:
+    payload = base_payload(
+        rows=1,
+        cols=3,
+        seats=[seat(0, 0, 1), seat(0, 1, 2), seat(0, 2, 3)],
+        students=[student("s1", "class-a"), student("s2", "class-a")],
+    )
+    payload.update(extra)
+    return payload
+
+
+def _slow_payload() -> dict[str, Any]:
+    # Non-strict minimisation on a crowded two-class hall: CP-SAT keeps
+    # searching for the full budget, long enough to cancel mid-solve.
+    rows, cols = 30, 30
+    seats = [seat(r, c, r * cols + c + 1) for r in range(rows) for c in range(cols)]
+    students = [student(f"s{i}", f"class-{i % 2}") for i in range(rows * cols)]
+    return base_payload(
+        rows, cols, seats, students, strict_mode=False, timeout_seconds=60
+    )
+
+
+@pytest.fixture
+def service():
+    from seating_service import SolverService
+
+    svc = SolverService(workers=1, max_threads=1)
+    yield svc
+    svc.close()
+
+
+class TestFairQueue:
+    def test_organizations_are_served_round_robin(self) -> None:
+        from seating_service import FairQueue, SolverJob
+
+        queue = FairQueue()
+        for job_id, org in (("a1", "A"), ("a2", "A"), ("a3", "A"), ("b1", "B")):
+            queue.push(SolverJob(job_id=job_id, organization_id=org, payload={}, threads=1))
+
+        order = [queue.pop().job_id for _ in range(4)]
+
+        assert order == ["a1", "b1", "a2", "a3"]
+        assert queue.pop() is None
+
+
+class TestSolverService:
+    def test_job_runs_to_completion(self, service) -> None:
+        job = service.submit(_small_payload(organization_id="org-1"))
+        finished = service.wait(job.job_id, timeout=30)
+
+        assert finished.status == "succeeded"
+        assert finished.result["status"] == "optimal"
+        assert finished.organization_id == "org-1"
+
+    def test_threads_are_capped_by_service(self, service) -> None:
+        job = service.submit(_small_payload(search_workers=8))
+
+        assert job.threads == 1
+        assert job.payload["search_workers"] == 1
+        service.wait(job.job_id, timeout=30)
+
+    def test_cancel_queued_and_running_jobs(self, service) -> None:
+        running = service.submit(_slow_payload())
+        queued = service.submit(_small_payload())
+        deadline = time.monotonic() + 10
+        while service.get(running.job_id).status != "running":
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+
+        assert service.cancel(queued.job_id).status == "cancelled"
+        service.cancel(running.job_id)
+        assert service.wait(running.job_id, timeout=10).status == "cancelled"
+
+        # The killed worker is replaced, so the pool keeps serving.
+        after = service.submit(_small_payload())
+        assert service.wait(after.job_id, timeout=30).status == "succeeded"
+
+    def test_cancel_after_finishing_keeps_the_result(self, service) -> None:
+        job = service.submit(_small_payload())
+        assert service.wait(job.job_id, timeout=30).status == "succeeded"
+
+        cancelled = service.cancel(job.job_id)
+
+        assert cancelled.status == "succeeded"
+        assert cancelled.result["status"] == "optimal"
+        after = service.submit(_small_payload())
+        assert service.wait(after.job_id, timeout=30).status == "succeeded"
+
+    def test_cancel_racing_a_finished_solve_restarts_the_worker(self, service) -> None:
+        worker = service._workers[0]
+        solved = threading.Event()
+        release = threading.Event()
+        original_run = worker.run
+
+        def run_then_pause(payload: dict[str, Any]) -> Any:
+            outcome = original_run(payload)
+            solved.set()
+            release.wait(10)
+            return outcome
+
+        worker.run = run_then_pause
+        job = service.submit(_small_payload())
+        assert solved.wait(30)
+
+        # The result is in hand but not yet recorded: the cancel wins.
+        assert service.cancel(job.job_id).status == "cancelled"
+        worker.run = original_run
+        release.set()
+
+        assert service.wait(job.job_id, timeout=10).status == "cancelled"
+        after = service.submit(_small_payload())
+        assert service.wait(after.job_id, timeout=30).status == "succeeded"
+
+    def test_full_queue_rejects_submission(self) -> None:
+        from seating_service import SolverService
+
+        svc = SolverService(workers=1, max_threads=1, max_queued=1)
+        try:
+            svc.submit(_slow_payload())
+            deadline = time.monotonic() + 10
+            while svc.stats()["running"] == 0:
+                assert time.monotonic() < deadline
+                time.sleep(0.05)
+            svc.submit(_small_payload())
+            with pytest.raises(OverflowError):
+                svc.submit(_small_payload())
+        finally:
+            svc.close()
+
+
+class TestHttpFrontEnd:
+    def _request(self, port: int, method: str, path: str, body: Any = None):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        conn.request(method, path, body=None if body is None else json.dumps(body))
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+
+    def test_submit_poll_and_health(self, service) -> None:
+        from seating_service import create_server
+
+        server = create_server(service, port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        port = server.server_address[1]
+        try:
+            status, job = self._request(port, "POST", "/jobs", _small_payload())
+            assert status == 202
+            deadline = time.monotonic() + 30
+            while True:
+                status, polled = self._request(port, "GET", f"/jobs/{job['job_id']}")
+                if polled["status"] == "succeeded" or time.monotonic() > deadline:
+                    break
+                time.sleep(0.05)
+            assert polled["result"]["conflicts_count"] == 0
+
+            status, health = self._request(port, "GET", "/health")
+            assert status == 200
+            assert health["max_threads"] == 1
+
+            status, _ = self._request(port, "GET", "/jobs/missing")
+            assert status == 404
+
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            conn.request("GET", "/metrics")
+            response = conn.getresponse()
+            metrics = response.read().decode()
+            assert response.status == 200
+            assert response.getheader("Content-Type").startswith("text/plain")
+            assert 'exam_seating_jobs_total{status="succeeded"} 1' in metrics
+            assert 'exam_seating_solves_total{engine="' in metrics
+            assert "exam_seating_queued_jobs 0" in metrics
+
+            plan_payload = {
+                "contract_version": "1.0",
+                "classes": [{"exam_class_id": "a", "students": 10}],
+                "halls": [{"id": "h1", "rows": 6, "cols": 8}],
+            }
+            status, plan = self._request(port, "POST", "/plan", plan_payload)
+            assert status == 200
+            assert plan["rooms"][0]["classes"] == [{"exam_class_id": "a", "students": 10}]
+        finally:
+            server.shutdown()
+            server.server_close()
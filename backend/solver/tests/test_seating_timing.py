@@ -0,0 +1,134 @@
+"""Tests for the solve log and the learned solve-time predictor."""
+
+from __future__ import annotations
+
+import json
+import math
+import random
+
+import pytest
+
+from .conftest import base_payload, run_solver, seat, student
+
+
+def _record(constraints: int, seconds: float, *, locked_density: float = 0.0) -> dict:
+    return {
+        "features": {
+            "students": constraints // 10,
+            "classes": 4,
+            "locked_density": locked_density,
+            "largest_class_ratio": 0.5,
+            "components": 1,
+        },
+        "estimates": {"constraints": constraints},
+        "strict": True,
+        "timing": {"optimal_seconds": seconds, "solve_seconds": seconds},
+    }
+
+
+def _synthetic_log(count: int = 60) -> list[dict]:
+    rng = random.Random(3)
+    records = []
+    for _ in range(count):
+        constraints = rng.randrange(1_000, 200_000)
+        noise = math.exp(rng.uniform(-0.3, 0.3))
+        records.append(_record(constraints, constraints * 1e-4 * noise))
+    return records
+
+
+class TestQuantileFit:
+    def test_prediction_covers_the_requested_quantile(self) -> None:
+        from seating_timing import fit
+
+        records = _synthetic_log()
+        model = fit(records, quantile=0.9)
+        covered = sum(
+            1 for r in records if model.predict_seconds(r) >= r["timing"]["optimal_seconds"] - 1e-9
+        )
+
+        assert model.samples == 60
+        assert covered / len(records) >= 0.85
+        assert model.predict_seconds(_record(100_000, 0)) == pytest.approx(10.0 * 1.35, rel=0.2)
+
+    def test_harder_halls_get_larger_budgets(self) -> None:
+        from seating_timing import fit
+
+        model = fit(_synthetic_log())
+
+        assert model.recommend_timeout(_record(150_000, 0)) > model.recommend_timeout(
+            _record(50_000, 0)
+        )
+
+    def test_timed_out_solves_do_not_pull_predictions_down(self) -> None:
+        from seating_timing import fit
+
+        records = _synthetic_log()
+        expected = fit(records).predict_seconds(_record(100_000, 0))
+        for record in records[1::2]:
+            # Stopped at a budget well below the time the search needed.
+            budget = record["timing"]["optimal_seconds"] * 0.3
+            record["timing"] = {"optimal_seconds": None, "solve_seconds": budget}
+            record["timeout_seconds"] = budget
+        model = fit(records)
+
+        assert model.censored == 30
+        assert model.predict_seconds(_record(100_000, 0)) == pytest.approx(expected, rel=0.1)
+
+    def test_too_few_records_is_an_error(self) -> None:
+        from seating_timing import fit
+
+        with pytest.raises(ValueError, match="need at least"):
+            fit(_synthetic_log(3))
+
+    def test_cli_fits_from_log_and_skips_torn_lines(self, tmp_path) -> None:
+        from seating_timing import TimingModel, main
+
+        log = tmp_path / "solve_log.jsonl"
+        log.write_text(
+            "".join(json.dumps(r) + "\n" for r in _synthetic_log()) + '{"features": ',
+            encoding="utf-8",
+        )
+        out = tmp_path / "model.json"
+
+        assert main(["fit", str(log), "--output", str(out)]) == 0
+        assert TimingModel.load(str(out)).samples == 60
+
+
+class TestSolverIntegration:
+    def _payload(self, **extra) -> dict:
+        seats = [seat(r, c, r * 4 + c + 1) for r in range(4) for c in range(4)]
+        students = [student(f"s{i}", f"class-{i % 4}") for i in range(8)]
+        payload = base_payload(4, 4, seats, students, timeout_seconds=60.0)
+        payload.update(extra)
+        return payload
+
+    def test_solve_is_logged_with_features_and_times(self, tmp_path) -> None:
+        log = tmp_path / "solve_log.jsonl"
+        result = run_solver(self._payload(solve_log=str(log)))
+        run_solver(self._payload(solve_log=str(log)))
+
+        lines = [json.loads(line) for line in log.read_text(encoding="utf-8").splitlines()]
+        assert len(lines) == 2
+        assert lines[0]["features"]["students"] == 8
+        assert lines[0]["status"] == result["status"]
+        assert lines[0]["timing"]["solve_seconds"] >= lines[0]["timing"]["first_solution_seconds"]
+        assert result["timing"]["timeout_seconds_used"] == 60.0
+
+    def test_adaptive_timeout_uses_model_recommendation(self, tmp_path) -> None:
+        from seating_timing import MIN_RECOMMENDED_SECONDS, fit
+
+        model_path = tmp_path / "model.json"
+        fit(_synthetic_log()).save(str(model_path))
+        result = run_solver(self._payload(timing_model=str(model_path), adaptive_timeout=True))
+
+        timing = result["timing"]
+        assert result["status"] == "optimal"
+        assert timing["recommended_timeout_seconds"] == MIN_RECOMMENDED_SECONDS
+        assert timing["timeout_seconds_used"] == MIN_RECOMMENDED_SECONDS
+
+    def test_unreadable_model_does_not_fail_the_solve(self, tmp_path) -> None:
+        result = run_solver(self._payload(timing_model=str(tmp_path / "missing.json")))
+
+        assert result["status"] == "optimal"
+        assert "model_error" in result["timing"]
+        assert result["timing"]["timeout_seconds_used"] == 60.0
@@ -616,6 +616,93 @@ public function it_previews_and_confirms_continuous_roll_numbers_from_seating_ma
         $this->assertSame('5', $outsideExamStudent->exam_roll_number);
     }
 
+    /** @test */
+    public function it_confirms_roll_numbers_when_seated_students_swap_numbers(): void
+    {
+        $fixture = $this->createFixture([
+            'exam_seating_maps.create',
+            'exams.roll_numbers.assign',
+        ]);
+
+        $map = ExamSeatingMap::create([
+            'organization_id' => $fixture['organization']->id,
+            'school_id' => $fixture['school']->id,
+            'exam_id' => $fixture['exam']->id,
+            'name' => 'Permuted map',
+            'rows' => 1,
+            'columns' => 2,
+            'start_seat_number' => 1,
+        ]);
+
+        $baseAdmission = $fixture['examStudent']->studentAdmission;
+        $this->assertNotNull($baseAdmission);
+
+        $secondStudent = Student::factory()->create([
+            'organization_id' => $fixture['organization']->id,
+            'school_id' => $fixture['school']->id,
+            'full_name' => 'Second Student',
+        ]);
+        $secondAdmission = StudentAdmission::create([
+            'organization_id' => $fixture['organization']->id,
+            'school_id' => $fixture['school']->id,
+            'student_id' => $secondStudent->id,
+            'academic_year_id' => $baseAdmission->academic_year_id,
+            'class_id' => $baseAdmission->class_id,
+            'class_academic_year_id' => $baseAdmission->class_academic_year_id,
+            'admission_year' => (string) now()->year,
+            'enrollment_status' => 'active',
+            'is_boarder' => false,
+        ]);
+        $secondExamStudent = ExamStudent::create([
+            'organization_id' => $fixture['organization']->id,
+            'school_id' => $fixture['school']->id,
+            'exam_id' => $fixture['exam']->id,
+            'exam_class_id' => $fixture['examClass']->id,
+            'student_admission_id' => $secondAdmission->id,
+            'exam_roll_number' => '1',
+        ]);
+        $fixture['examStudent']->update(['exam_roll_number' => '2']);
+
+        // The seat order hands each student the other's current number.
+        foreach ([[$fixture['examStudent'], 1], [$secondExamStudent, 2]] as [$examStudent, $column]) {
+            ExamSeatAssignment::create([
+                'organization_id' => $fixture['organization']->id,
+                'school_id' => $fixture['school']->id,
+                'exam_seating_map_id' => $map->id,
+                'exam_id' => $fixture['exam']->id,
+                'exam_student_id' => $examStudent->id,
+                'row_number' => 1,
+                'column_number' => $column,
+                'seat_number' => $column,
+                'is_disabled' => false,
+                'is_locked' => true,
+            ]);
+        }
+
+        $solverService = app(ExamSeatingSolverService::class);
+        $map->input_checksum = $solverService->buildSolverInput($map->fresh(['assignments']))['checksum'];
+        $map->save();
+
+        $preview = $this->jsonAs($fixture['user'], 'POST', "/api/exams/{$fixture['exam']->id}/seating-maps/{$map->id}/roll-numbers/preview");
+        $preview->assertOk()
+            ->assertJsonPath('start_roll', 1)
+            ->assertJsonPath('collision_count', 0)
+            ->assertJsonPath('items.0.new_roll_number', '1')
+            ->assertJsonPath('items.1.new_roll_number', '2');
+
+        $confirm = $this->jsonAs($fixture['user'], 'POST', "/api/exams/{$fixture['exam']->id}/seating-maps/{$map->id}/roll-numbers/confirm", [
+            'revision' => $preview->json('revision'),
+            'input_checksum' => $preview->json('input_checksum'),
+        ]);
+
+        $confirm->assertOk()
+            ->assertJsonPath('updated', 2)
+            ->assertJsonPath('errors', []);
+
+        $this->assertSame('1', $fixture['examStudent']->fresh()->exam_roll_number);
+        $this->assertSame('2', $secondExamStudent->fresh()->exam_roll_number);
+    }
+
     /** @test */
     public function it_applies_roll_numbers_to_second_map_after_first_without_stale_checksum(): void
     {
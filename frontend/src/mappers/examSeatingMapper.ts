@@ -4,6 +4,7 @@ import type {
   ExamSeatingAssignmentStudent,
   ExamSeatingClassColor,
   ExamSeatingConflictPair,
+  ExamSeatingConflictSummary,
   ExamSeatingMap,
   ExamSeatingMapDetail,
   ExamSeatingMapFormData,
@@ -36,6 +37,19 @@ const mapConflictPairApiToDomain = (
   examClassIdB: api.exam_class_id_b,
 });
 
+const mapConflictSummaryApiToDomain = (
+  api: ExamSeatingApi.ExamSeatingConflictSummary | null | undefined
+): ExamSeatingConflictSummary | null => {
+  if (!api) return null;
+  return {
+    byClass: api.by_class,
+    rows: api.rows,
+    columns: api.cols,
+    pairsOmitted: api.pairs_omitted,
+    packedPairs: api.packed_pairs,
+  };
+};
+
 const mapSolverDiagnosticsApiToDomain = (
   api: ExamSeatingApi.ExamSeatingSolverDiagnostics | null | undefined
 ): ExamSeatingSolverDiagnostics | null => {
@@ -43,6 +57,7 @@ const mapSolverDiagnosticsApiToDomain = (
   return {
     conflictsCount: api.conflicts_count,
     conflictPairs: api.conflict_pairs?.map(mapConflictPairApiToDomain),
+    conflictSummary: mapConflictSummaryApiToDomain(api.conflict_summary),
     message: api.message,
     modeUsed: api.mode_used,
     status: api.status,
@@ -19,9 +19,18 @@ export interface ExamSeatingConflictPair {
   exam_class_id_b: string;
 }
 
+export interface ExamSeatingConflictSummary {
+  by_class: Record<string, number>;
+  rows: number[];
+  cols: number[];
+  pairs_omitted: number;
+  packed_pairs?: number[];
+}
+
 export interface ExamSeatingSolverDiagnostics {
   conflicts_count?: number;
   conflict_pairs?: ExamSeatingConflictPair[];
+  conflict_summary?: ExamSeatingConflictSummary | null;
   message?: string;
   mode_used?: string;
   status?: string;
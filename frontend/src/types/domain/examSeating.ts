@@ -19,9 +19,18 @@ export interface ExamSeatingConflictPair {
   examClassIdB: string;
 }
 
+export interface ExamSeatingConflictSummary {
+  byClass: Record<string, number>;
+  rows: number[];
+  columns: number[];
+  pairsOmitted: number;
+  packedPairs?: number[];
+}
+
 export interface ExamSeatingSolverDiagnostics {
   conflictsCount?: number;
   conflictPairs?: ExamSeatingConflictPair[];
+  conflictSummary?: ExamSeatingConflictSummary | null;
   message?: string;
   modeUsed?: string;
   status?: string;
@@ -769,11 +769,11 @@ class RollNumberManager(QMainWindow):
             return
 
         # Only update model; save_changes will commit to DB
+        row_by_id = {row["ID"]: row for row in self.model._data}
         for sid, num in matched:
-            for r, row in enumerate(self.model._data):
-                if row["ID"] == sid:
-                    self.model._data[r]["شمېرې"] = num
-                    break
+            row = row_by_id.get(sid)
+            if row is not None:
+                row["شمېرې"] = num
         self.model.layoutChanged.emit()
         self.show_message_box("بریالی", f"{len(matched)} زده کوونکو ته نمبرې ورکړل شوې.")
 
@@ -10,7 +10,6 @@ import os, sys, random, textwrap
 import threading
 import time
 from pathlib import Path
-from ortools.sat.python import cp_model
 
 import openpyxl
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
@@ -58,6 +57,20 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from nazim.db_singleton import DBManager
 from nazim.modules.rollnumber.SeatingMapReportDialog import SeatingMapReportDialog
 
+# The web backend's exam seating solver is reused in-process. Its directory can
+# be overridden when the desktop app is deployed away from the backend tree.
+_SEATING_SOLVER_DIR = os.environ.get(
+    "NAZIM_SEATING_SOLVER_DIR",
+    str(Path(__file__).resolve().parent / "backend" / "solver"),
+)
+if _SEATING_SOLVER_DIR not in sys.path:
+    sys.path.append(_SEATING_SOLVER_DIR)
+try:
+    from exam_seating_solver import SeatingProblem, solve_problem
+except ImportError:  # solver (or OR-Tools) missing → heuristic fallback only
+    SeatingProblem = None
+    solve_problem = None
+
 # ───────────────────────── constants ───────────────────────────────────────────
 UNDO_LIMIT = 30
 VIEW_CLASSES = "vw_ClassesInExams"  # should expose exam_id, class_name
@@ -606,6 +619,7 @@ class RollNumberMappingApp(QMainWindow):
         # Copy data
         students = list(self.student_data)
         seat_numbers = [cw.number for cw in available_seats]
+        seat_positions = [pos[cw] for cw in available_seats]
 
         # Solver time budget scales with hall size but stays bounded.
         time_budget = max(5.0, min(30.0, n / 40.0))
@@ -623,7 +637,8 @@ class RollNumberMappingApp(QMainWindow):
         def worker():
             try:
                 best, best_cost = self._solve_seating(
-                    m, n, students, neighbor_pairs, seat_numbers, cancel_event, time_budget
+                    m, n, students, neighbor_pairs, seat_numbers, seat_positions,
+                    cancel_event, time_budget
                 )
             except Exception:
                 # Any solver failure → robust heuristic fallback.
@@ -636,90 +651,44 @@ class RollNumberMappingApp(QMainWindow):
         threading.Thread(target=worker, daemon=True).start()
 
     # ───────────────────── CP-SAT exact solver ─────────────────────
-    def _solve_seating(self, m, n, students, neighbor_pairs, seat_numbers, cancel_event, time_budget):
+    def _solve_seating(
+        self, m, n, students, neighbor_pairs, seat_numbers, seat_positions, cancel_event, time_budget
+    ):
         """
         Assign students to seats while minimising same-class adjacency, using
-        OR-Tools CP-SAT. The model works at the *class* level (students within a
-        class are interchangeable for adjacency), which keeps it small and fast
-        even for 1000+ seat halls.
+        the backend exam seating solver in-process (class-level OR-Tools CP-SAT
+        model, 8-directional adjacency — the same engine the web app uses).
 
         Returns (assignment, cost) where assignment[k] = seat index for student k
         and cost = number of remaining same-class adjacent pairs (0 when perfect).
         """
-        from ortools.sat.python import cp_model
+        if solve_problem is None:
+            return self._greedy_fallback(m, n, students, neighbor_pairs, cancel_event, time_budget)
 
-        # Group students by class (values are indices into `students`).
-        classes = {}
+        problem = SeatingProblem(
+            rows=self.rows,
+            cols=self.cols,
+            strict_mode=False,
+            seed=random.randrange(1, 2**31 - 1),
+            timeout_seconds=float(time_budget),
+        )
+        seat_by_position = {}
+        for j, (r, c) in enumerate(seat_positions):
+            problem.add_seat(r, c, seat_numbers[j])
+            seat_by_position[(r, c)] = j
+        # Student index doubles as the id so results map straight back.
         for k, s in enumerate(students):
-            classes.setdefault(s["Class"], []).append(k)
-        class_names = list(classes.keys())
-        counts = {c: len(ks) for c, ks in classes.items()}
-
-        model = cp_model.CpModel()
-
-        # y[j, c] == 1  ⇔  seat j is occupied by a student of class c.
-        y = {(j, c): model.NewBoolVar(f"y_{j}_{c}") for j in range(n) for c in class_names}
-
-        # Each seat holds at most one class (empty seats allowed when n > m).
-        for j in range(n):
-            model.Add(sum(y[(j, c)] for c in class_names) <= 1)
-
-        # Each class occupies exactly as many seats as it has students.
-        for c in class_names:
-            model.Add(sum(y[(j, c)] for j in range(n)) == counts[c])
-
-        # One conflict var per adjacent seat pair: forced to 1 iff both seats
-        # end up holding the same class.
-        conflicts = []
-        for (a, b) in neighbor_pairs:
-            cf = model.NewBoolVar(f"cf_{a}_{b}")
-            for c in class_names:
-                model.Add(cf >= y[(a, c)] + y[(b, c)] - 1)
-            conflicts.append(cf)
+            problem.add_student(str(k), str(s["Class"]))
 
-        model.Minimize(sum(conflicts))
-
-        solver = cp_model.CpSolver()
-        solver.parameters.max_time_in_seconds = float(time_budget)
-        # Use all cores for a large hall; ignore if the field name differs.
-        try:
-            solver.parameters.num_workers = 8
-        except Exception:
-            pass
-
-        class _Canceller(cp_model.CpSolverSolutionCallback):
-            def __init__(self, ev):
-                super().__init__()
-                self._ev = ev
-
-            def on_solution_callback(self):
-                if self._ev.is_set():
-                    self.StopSearch()
-
-        status = solver.Solve(model, _Canceller(cancel_event))
-
-        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        result = solve_problem(problem, should_stop=cancel_event.is_set)
+        if not result.ok:
             # No usable solution within budget → heuristic fallback.
             return self._greedy_fallback(m, n, students, neighbor_pairs, cancel_event, time_budget)
 
-        # Determine which class sits in each seat.
-        class_seats = {c: [] for c in class_names}
-        for j in range(n):
-            for c in class_names:
-                if solver.Value(y[(j, c)]) == 1:
-                    class_seats[c].append(j)
-                    break
-
-        # Map students → seats. Sort each class's seats by seat number so roll
-        # numbers flow in a natural reading order across the hall.
         assignment = [0] * m
-        for c in class_names:
-            seats_c = sorted(class_seats[c], key=lambda j: seat_numbers[j])
-            for idx, k in enumerate(classes[c]):
-                assignment[k] = seats_c[idx]
-
-        cost = int(round(solver.ObjectiveValue()))
-        return assignment, cost
+        for placed in result.assignments:
+            assignment[int(placed.exam_student_id)] = seat_by_position[(placed.row, placed.col)]
+        return assignment, result.conflicts_count
 
     # ───────────────────── heuristic fallback ─────────────────────
     def _greedy_fallback(self, m, n, students, neighbor_pairs, cancel_event, time_budget):